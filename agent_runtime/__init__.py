@@ -0,0 +1,9 @@
+"""Helpers shared by the example agents for calling Toolhouse tools"""
+
+from .dispatch import ToolResult, email_arguments, find_tool, run_tool, send_email
+from .history import ConversationHistory, estimate_tokens, model_summarizer, truncating_summarizer
+from .runtime import AgentRun, AgentRuntime, AgentStep, ToolSchemaCache
+
+__all__ = ["AgentRun", "AgentRuntime", "AgentStep", "ConversationHistory", "ToolResult", "ToolSchemaCache",
+           "email_arguments", "estimate_tokens", "find_tool", "model_summarizer", "run_tool", "send_email",
+           "truncating_summarizer"]
@@ -0,0 +1,196 @@
+import time
+import uuid
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    # Toolhouse only runs local tools for real ToolUseBlock instances
+    from anthropic.types import ToolUseBlock
+except ImportError:
+    ToolUseBlock = None
+
+# Error kinds reported by ToolResult.error_kind
+UNKNOWN_TOOL = "unknown_tool"
+INVALID_ARGUMENTS = "invalid_arguments"
+TOOL_ERROR = "tool_error"
+TRANSPORT = "transport"
+NOT_RUN = "not_run"
+
+# Names the send_email schema may use for each field, in order of preference
+EMAIL_FIELDS = {
+    "to": ("to", "recipient", "recipient_email", "to_email", "email"),
+    "subject": ("subject", "title"),
+    "body": ("body", "content", "html", "html_body", "message", "text"),
+}
+
+
+class ToolResult:
+    """
+    Outcome of running one Toolhouse tool directly
+
+    Attributes:
+        name: Tool name
+        arguments: Arguments the tool was called with
+        output: Text the tool returned (also set for tool errors)
+        error: Error message, or None if the tool succeeded
+        error_kind: One of UNKNOWN_TOOL, INVALID_ARGUMENTS, TOOL_ERROR,
+            TRANSPORT or NOT_RUN, or None on success
+        elapsed: Time spent on the call in seconds
+    """
+
+    __slots__ = ("name", "arguments", "output", "error", "error_kind", "elapsed")
+
+    def __init__(self, name: str, arguments: Dict[str, Any], output: str = "", error: Optional[str] = None,
+                 error_kind: Optional[str] = None, elapsed: float = 0.0):
+        self.name = name
+        self.arguments = arguments
+        self.output = output
+        self.error = error
+        self.error_kind = error_kind
+        self.elapsed = elapsed
+
+    @property
+    def ok(self) -> bool:
+        """True if the tool ran and reported success"""
+        return self.error is None
+
+    def __repr__(self) -> str:
+        status = f"error_kind={self.error_kind!r}" if self.error else "ok"
+        return f"ToolResult({self.name}, {status}, elapsed={self.elapsed:.3f}s)"
+
+
+def find_tool(tools: Sequence[Dict[str, Any]], name: str) -> Optional[Dict[str, Any]]:
+    """Return the schema of the tool called `name` from a get_tools() list, or None"""
+    for tool in tools:
+        if tool.get("name") == name:
+            return tool
+    return None
+
+
+def missing_arguments(schema: Dict[str, Any], arguments: Dict[str, Any]) -> List[str]:
+    """Return the required properties of a tool schema that `arguments` lacks"""
+    required = schema.get("input_schema", {}).get("required", [])
+    return [key for key in required if arguments.get(key) in (None, "")]
+
+
+def _result_text(block: Any) -> str:
+    content = block.get("content", "") if isinstance(block, dict) else getattr(block, "content", "")
+    if isinstance(content, list):
+        return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return str(content)
+
+
+def _is_local_tool(th_client: Any, name: str) -> bool:
+    local_tools = getattr(th_client, "local_tools", None)
+    try:
+        return name in local_tools.get_registered_tools()
+    except Exception:
+        return False
+
+
+def run_tool(th_client: Any, name: str, arguments: Dict[str, Any],
+             tools: Optional[Sequence[Dict[str, Any]]] = None) -> ToolResult:
+    """
+    Run a known Toolhouse tool with structured arguments, without a model call
+
+    The call goes through the client's regular run_tools(), as an
+    anthropic ToolUseBlock built here instead of one emitted by the model,
+    so local and hosted tools both work. Nothing is raised: every failure
+    is reported on the returned ToolResult; an exception raised by a local
+    tool is a TOOL_ERROR, any other exception a TRANSPORT error.
+
+    Args:
+        th_client: Toolhouse client using the Anthropic provider
+        name: Tool name, e.g. "send_email"
+        arguments: Tool input
+        tools: Tool schemas from th_client.get_tools(); when given, the
+            tool must exist and the required arguments must be present
+
+    Returns:
+        ToolResult
+    """
+    start = time.perf_counter()
+
+    def failure(kind: str, message: str, output: str = "") -> ToolResult:
+        return ToolResult(name, arguments, output, error=message, error_kind=kind,
+                          elapsed=time.perf_counter() - start)
+
+    if tools is not None:
+        schema = find_tool(tools, name)
+        if schema is None:
+            return failure(UNKNOWN_TOOL, f"Tool {name!r} is not enabled for this Toolhouse key")
+        missing = missing_arguments(schema, arguments)
+        if missing:
+            return failure(INVALID_ARGUMENTS, f"Missing required arguments for {name}: {', '.join(missing)}")
+
+    call_id = f"toolu_{uuid.uuid4().hex[:24]}"
+    if ToolUseBlock is not None:
+        call = ToolUseBlock(type="tool_use", id=call_id, name=name, input=arguments)
+    else:
+        call = SimpleNamespace(type="tool_use", id=call_id, name=name, input=arguments)
+    response = SimpleNamespace(stop_reason="tool_use", content=[call])
+    try:
+        messages = th_client.run_tools(response, append=False)
+    except Exception as e:
+        return failure(TOOL_ERROR if _is_local_tool(th_client, name) else TRANSPORT, str(e))
+
+    blocks = []
+    for message in messages:
+        content = message.get("content") if isinstance(message, dict) else None
+        if isinstance(content, list):
+            blocks.extend(content)
+    if not blocks:
+        return failure(NOT_RUN, f"Toolhouse returned no result for {name}")
+    block = blocks[0]
+    output = _result_text(block)
+    is_error = block.get("is_error") if isinstance(block, dict) else getattr(block, "is_error", False)
+    if is_error:
+        return failure(TOOL_ERROR, output or f"{name} failed", output)
+    return ToolResult(name, arguments, output, elapsed=time.perf_counter() - start)
+
+
+def email_arguments(to: str, subject: str, body: str,
+                    schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Build send_email arguments, using the field names of the tool's schema
+
+    Args:
+        to: Recipient address
+        subject: Subject line
+        body: Message body (HTML or plain text)
+        schema: send_email schema from get_tools(); without it the fields
+            are named to, subject and body
+
+    Returns:
+        Tool input for send_email
+    """
+    values = {"to": to, "subject": subject, "body": body}
+    properties = (schema or {}).get("input_schema", {}).get("properties", {})
+    arguments = {}
+    for field, aliases in EMAIL_FIELDS.items():
+        key = next((alias for alias in aliases if alias in properties), field)
+        arguments[key] = values[field]
+    return arguments
+
+
+def send_email(th_client: Any, to: str, subject: str, body: str,
+               tools: Optional[Sequence[Dict[str, Any]]] = None) -> ToolResult:
+    """
+    Send an email with Toolhouse's send_email tool, without a model call
+
+    The body is delivered exactly as given, so large reports are never
+    truncated by an output token limit.
+
+    Args:
+        th_client: Toolhouse client using the Anthropic provider
+        to: Recipient address
+        subject: Subject line
+        body: Message body (HTML or plain text)
+        tools: Tool schemas from th_client.get_tools(), used to validate
+            the call and match the schema's argument names
+
+    Returns:
+        ToolResult
+    """
+    schema = find_tool(tools, "send_email") if tools is not None else None
+    return run_tool(th_client, "send_email", email_arguments(to, subject, body, schema), tools)
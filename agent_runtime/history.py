@@ -0,0 +1,252 @@
+import json
+import math
+from typing import Any, Callable, Dict, List, Optional
+
+# Characters per token for estimate_tokens(); close enough for English text and JSON
+CHARS_PER_TOKEN = 4
+# Tokens added per message for role and formatting
+MESSAGE_OVERHEAD = 4
+# Longest tool input or result kept in a transcript, in characters
+TRANSCRIPT_FIELD_CHARS = 500
+
+SUMMARY_PROMPT = """Summarize the conversation below for your own later reference.
+Keep the user's goals, preferences and personal details, decisions made, facts found with tools
+(with their sources), and open questions. Write plain prose, at most {max_words} words.
+
+{transcript}"""
+
+
+def _field(item: Any, name: str, default: Any = None) -> Any:
+    return item.get(name, default) if isinstance(item, dict) else getattr(item, name, default)
+
+
+def _clip(text: str, limit: int = TRANSCRIPT_FIELD_CHARS) -> str:
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+def _block_text(block: Any, clip: bool = False) -> str:
+    if isinstance(block, str):
+        return block
+    kind = _field(block, "type")
+    if kind == "tool_use":
+        arguments = json.dumps(_field(block, "input", {}), default=str)
+        return f"[called {_field(block, 'name')}({_clip(arguments) if clip else arguments})]"
+    if kind == "tool_result":
+        content = _field(block, "content", "")
+        if isinstance(content, list):
+            content = " ".join(_block_text(part) for part in content)
+        return f"[tool result: {_clip(str(content)) if clip else content}]"
+    text = _field(block, "text")
+    return str(text) if text is not None else str(block)
+
+
+def message_text(message: Any, clip: bool = False) -> str:
+    """
+    Return the text of a chat message, with tool calls and results written out
+
+    Args:
+        message: Anthropic or OpenAI message, as a dict or SDK object
+        clip: Shorten long tool inputs and results (for transcripts)
+
+    Returns:
+        Plain text
+    """
+    content = _field(message, "content") or ""
+    parts = [content] if isinstance(content, str) else [_block_text(block, clip) for block in content]
+    for call in _field(message, "tool_calls") or []:
+        function = _field(call, "function")
+        arguments = str(_field(function, "arguments", ""))
+        parts.append(f"[called {_field(function, 'name')}({_clip(arguments) if clip else arguments})]")
+    return " ".join(part for part in parts if part)
+
+
+def estimate_tokens(message: Any) -> int:
+    """Estimate the input tokens of one message from its length"""
+    return MESSAGE_OVERHEAD + math.ceil(len(message_text(message)) / CHARS_PER_TOKEN)
+
+
+def transcript(messages: List[Any]) -> str:
+    """Render messages as a plain-text transcript, one line per message"""
+    return "\n".join(f"{_field(message, 'role')}: {message_text(message, clip=True)}" for message in messages)
+
+
+def starts_turn(message: Any) -> bool:
+    """True for a message the user typed, as opposed to tool results sent back in a user message"""
+    if _field(message, "role") != "user":
+        return False
+    content = _field(message, "content")
+    return isinstance(content, str) or not any(_field(block, "type") == "tool_result" for block in content or [])
+
+
+def truncating_summarizer(max_chars: int = 4000) -> Callable[[str, List[Any]], str]:
+    """
+    Return a summarizer that keeps the end of the transcript, without a model call
+
+    Args:
+        max_chars: Longest summary kept, in characters
+
+    Returns:
+        summarize(summary, messages) for ConversationHistory
+    """
+    def summarize(summary: str, messages: List[Any]) -> str:
+        text = "\n".join(part for part in (summary, transcript(messages)) if part)
+        return text if len(text) <= max_chars else "..." + text[-max_chars:]
+    return summarize
+
+
+def model_summarizer(runtime: Any, max_words: int = 250) -> Callable[[str, List[Any]], str]:
+    """
+    Return a summarizer that asks the runtime's model to fold turns into the summary
+
+    The turns are sent as a transcript, so the call needs no tools even
+    when they contain tool calls.
+
+    Args:
+        runtime: AgentRuntime
+        max_words: Length limit given to the model
+
+    Returns:
+        summarize(summary, messages) for ConversationHistory
+    """
+    def summarize(summary: str, messages: List[Any]) -> str:
+        text = transcript(messages)
+        if summary:
+            text = f"Summary so far: {summary}\n\n{text}"
+        prompt = SUMMARY_PROMPT.format(max_words=max_words, transcript=text)
+        response = runtime.create([{"role": "user", "content": prompt}], system="", max_tokens=max_words * 2,
+                                  use_tools=False)
+        return runtime.text(response).strip()
+    return summarize
+
+
+class ConversationHistory:
+    """
+    Chat history that stays within an input-token budget
+
+    Every message is kept in `messages` until `for_request()` finds the
+    history over budget. It then folds the oldest turns into a rolling
+    summary, keeping at least the last `keep_turns` turns verbatim (fewer
+    only if they alone exceed the budget; the current turn is always
+    kept). A turn is a user message plus everything up to the next one,
+    so tool_use blocks are never separated from their tool_result.
+
+    Token counts are computed once per message with `count_tokens`, which
+    can be swapped for an exact tokenizer.
+    """
+
+    def __init__(self, max_tokens: int = 8000, keep_turns: int = 4,
+                 count_tokens: Callable[[Any], int] = estimate_tokens,
+                 summarize: Optional[Callable[[str, List[Any]], str]] = None,
+                 max_summary_tokens: Optional[int] = None):
+        """
+        Initialize the history
+
+        Args:
+            max_tokens: Input-token budget for the messages of one request
+                (system prompt and tool schemas not included)
+            keep_turns: Recent turns always kept verbatim when they fit
+            count_tokens: Returns the tokens of one message
+            summarize: summarize(summary, messages) -> new summary, e.g.
+                model_summarizer(runtime); defaults to truncating_summarizer()
+            max_summary_tokens: Longer summaries lose their oldest part;
+                defaults to a quarter of max_tokens
+        """
+        self.max_tokens = max_tokens
+        self.keep_turns = keep_turns
+        self.count_tokens = count_tokens
+        self.summarize = summarize or truncating_summarizer()
+        self.max_summary_tokens = max_summary_tokens or max_tokens // 4
+        self.messages: List[Any] = []
+        self.summary = ""
+        self.compactions = 0
+        self._tokens: List[int] = []
+        self._summary_tokens = 0
+
+    def append(self, message: Any) -> None:
+        """Add one message"""
+        self.messages.append(message)
+        self._tokens.append(self.count_tokens(message))
+
+    def extend(self, messages: List[Any]) -> None:
+        """Add several messages, e.g. the tool messages of a run"""
+        for message in messages:
+            self.append(message)
+
+    def clear(self) -> None:
+        """Forget all messages and the summary"""
+        self.messages, self._tokens = [], []
+        self.summary, self._summary_tokens = "", 0
+
+    @property
+    def tokens(self) -> int:
+        """Tokens of the next request's messages, including the summary"""
+        return self._summary_tokens + sum(self._tokens)
+
+    def _summary_messages(self) -> List[Any]:
+        if not self.summary:
+            return []
+        # A user/assistant pair keeps the roles alternating before the first kept turn
+        return [{"role": "user", "content": f"Summary of our conversation so far:\n{self.summary}"},
+                {"role": "assistant", "content": "Thanks, I'll keep that in mind."}]
+
+    def _turn_starts(self) -> List[int]:
+        starts = [i for i, message in enumerate(self.messages) if starts_turn(message)]
+        return starts if starts and starts[0] == 0 else [0] + starts
+
+    def compact(self, summarize: Optional[Callable[[str, List[Any]], str]] = None) -> bool:
+        """
+        Fold the oldest turns into the summary until the history fits the budget
+
+        Args:
+            summarize: Summarizer for this call, overriding the default
+
+        Returns:
+            True if any turns were folded
+        """
+        if self.tokens <= self.max_tokens or not self.messages:
+            return False
+        starts = self._turn_starts()
+        # Fold whole turns, oldest first, never the current (last) one
+        cut = 0
+        for index, start in enumerate(starts[1:], 1):
+            cut = start
+            remaining = sum(self._tokens[cut:])
+            # Leave room for the summary the folded turns will produce
+            if len(starts) - index <= self.keep_turns and remaining + self.max_summary_tokens <= self.max_tokens:
+                break
+        if cut == 0:
+            return False
+
+        folded = self.messages[:cut]
+        try:
+            self.summary = (summarize or self.summarize)(self.summary, folded)
+        except Exception as e:
+            print(f"Error summarizing conversation history, keeping a truncated transcript: {str(e)}")
+            self.summary = truncating_summarizer()(self.summary, folded)
+        self.messages, self._tokens = self.messages[cut:], self._tokens[cut:]
+        self._summary_tokens = sum(self.count_tokens(message) for message in self._summary_messages())
+        while self._summary_tokens > self.max_summary_tokens and self.summary:
+            # Keep the most recent part of an oversized summary, in proportion to the overrun
+            keep = int(len(self.summary) * self.max_summary_tokens / self._summary_tokens) - 3
+            self.summary = "..." + self.summary[-keep:] if keep > 0 else ""
+            self._summary_tokens = sum(self.count_tokens(message) for message in self._summary_messages())
+        self.compactions += 1
+        return True
+
+    def for_request(self, summarize: Optional[Callable[[str, List[Any]], str]] = None) -> List[Any]:
+        """
+        Return the messages to send, compacting the history first if it is over budget
+
+        Args:
+            summarize: Summarizer for this call, overriding the default
+
+        Returns:
+            The summary (if any) followed by the verbatim recent turns
+        """
+        self.compact(summarize)
+        return self._summary_messages() + list(self.messages)
+
+    def stats(self) -> Dict[str, int]:
+        """Return message, token and compaction counts"""
+        return {"messages": len(self.messages), "tokens": self.tokens, "max_tokens": self.max_tokens,
+                "compactions": self.compactions, "summary_tokens": self._summary_tokens}
@@ -0,0 +1,372 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ANTHROPIC = "anthropic"
+OPENAI = "openai"
+
+
+class ToolSchemaCache:
+    """
+    Tool schemas of a Toolhouse client, fetched once and reused
+
+    `th_client.get_tools()` is an HTTP round trip that returns the same
+    schemas every time. This cache fetches them on first use and hands
+    the same list to every model call until the TTL runs out or
+    `invalidate()` is called (e.g. after changing the client's metadata
+    or enabling tools). Concurrent callers share a single fetch, and a
+    failed refresh keeps serving the previous list.
+    """
+
+    def __init__(self, th_client: Any, ttl: float = 300.0, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the cache
+
+        Args:
+            th_client: Toolhouse client
+            ttl: Seconds before the schemas are fetched again
+            clock: Monotonic clock in seconds (injectable for testing)
+        """
+        self.th_client = th_client
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.fetches = 0
+        self._tools: Optional[List[Dict[str, Any]]] = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> List[Dict[str, Any]]:
+        """
+        Return the tool schemas, fetching them if missing or expired
+
+        Raises:
+            Exception: The first fetch failed (later failures serve the
+                previous schemas)
+        """
+        with self._lock:
+            if self._tools is not None and self.clock() - self._fetched_at < self.ttl:
+                self.hits += 1
+                return self._tools
+            try:
+                tools = list(self.th_client.get_tools())
+            except Exception as e:
+                if self._tools is None:
+                    raise
+                print(f"Error refreshing Toolhouse tools, using cached schemas: {str(e)}")
+                self._fetched_at = self.clock()
+                return self._tools
+            self._tools = tools
+            self._fetched_at = self.clock()
+            self.fetches += 1
+            return tools
+
+    def invalidate(self) -> None:
+        """Drop the cached schemas; the next get() fetches them again"""
+        with self._lock:
+            self._tools = None
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit and fetch counters and the number of cached tools"""
+        with self._lock:
+            return {"hits": self.hits, "fetches": self.fetches, "tools": len(self._tools or [])}
+
+
+class AgentStep:
+    """
+    Timing of one step of the tool loop: a model call and the tools it asked for
+
+    Attributes:
+        number: Step number, starting at 1
+        model_elapsed: Seconds spent in the model call
+        tool_elapsed: Wall-clock seconds spent running this step's tools
+        tool_calls: (tool name, seconds) for every tool call of the step
+    """
+
+    __slots__ = ("number", "model_elapsed", "tool_elapsed", "tool_calls")
+
+    def __init__(self, number: int, model_elapsed: float, tool_elapsed: float = 0.0,
+                 tool_calls: Optional[List[Tuple[str, float]]] = None):
+        self.number = number
+        self.model_elapsed = model_elapsed
+        self.tool_elapsed = tool_elapsed
+        self.tool_calls = tool_calls or []
+
+    def __repr__(self) -> str:
+        tools = ", ".join(f"{name} {elapsed:.3f}s" for name, elapsed in self.tool_calls)
+        return f"AgentStep({self.number}, model={self.model_elapsed:.3f}s, tools={self.tool_elapsed:.3f}s [{tools}])"
+
+
+class AgentRun:
+    """
+    Outcome of AgentRuntime.run()
+
+    Attributes:
+        response: The last model response
+        messages: Messages the run added to the conversation (assistant
+            tool calls and their results), excluding the last response
+        steps: One AgentStep per model call
+        exhausted: True if the step budget ran out while the model was
+            still calling tools; the last response then comes from an
+            extra call that was not allowed to call tools
+    """
+
+    __slots__ = ("response", "messages", "steps", "exhausted")
+
+    def __init__(self, response: Any, messages: List[Any], steps: List[AgentStep], exhausted: bool = False):
+        self.response = response
+        self.messages = messages
+        self.steps = steps
+        self.exhausted = exhausted
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds spent in model calls and tools"""
+        return sum(step.model_elapsed + step.tool_elapsed for step in self.steps)
+
+    def __repr__(self) -> str:
+        status = ", exhausted" if self.exhausted else ""
+        return f"AgentRun({len(self.steps)} steps, elapsed={self.elapsed:.3f}s{status})"
+
+
+class AgentRuntime:
+    """
+    Model client plus Toolhouse client, sharing one cached list of tool schemas
+
+    Every model call made through `create()`, `run()` or `respond()` gets
+    the same tool list from a ToolSchemaCache instead of calling
+    get_tools() again, so multi-step turns cost no extra Toolhouse round
+    trips. `stats()` counts runs, model calls and tool calls, including
+    how many runs were answered directly by the first model call.
+    """
+
+    def __init__(self, client: Any, th_client: Any, model: str, system: Optional[str] = None,
+                 max_tokens: int = 1024, provider: str = ANTHROPIC, tools_ttl: float = 300.0,
+                 tool_schemas: Optional[ToolSchemaCache] = None):
+        """
+        Initialize the runtime
+
+        Args:
+            client: Anthropic client, or OpenAI client with provider="openai"
+            th_client: Toolhouse client for the same provider
+            model: Model name
+            system: Default system prompt (Anthropic only)
+            max_tokens: Default output token limit (Anthropic only)
+            provider: "anthropic" or "openai"
+            tools_ttl: Seconds the tool schemas are cached
+            tool_schemas: Existing cache of th_client's schemas to share
+                (tools_ttl is then ignored)
+        """
+        if provider not in (ANTHROPIC, OPENAI):
+            raise ValueError(f"Unsupported provider: {provider}")
+        self.client = client
+        self.th_client = th_client
+        self.model = model
+        self.system = system
+        self.max_tokens = max_tokens
+        self.provider = provider
+        self.tool_schemas = tool_schemas or ToolSchemaCache(th_client, ttl=tools_ttl)
+        self.runs = 0
+        self.direct_answers = 0
+        self.model_calls = 0
+        self.tool_calls_run = 0
+        self.exhausted_runs = 0
+        self._stats_lock = threading.Lock()
+
+    @property
+    def tools(self) -> List[Dict[str, Any]]:
+        """The cached tool schemas"""
+        return self.tool_schemas.get()
+
+    def invalidate_tools(self) -> None:
+        """Fetch the tool schemas again on the next call"""
+        self.tool_schemas.invalidate()
+
+    def set_metadata(self, key: str, value: Any) -> None:
+        """Set Toolhouse metadata (e.g. timezone) and refetch the schemas, which may depend on it"""
+        self.th_client.set_metadata(key, value)
+        self.invalidate_tools()
+
+    def create(self, messages: List[Any], system: Optional[str] = None, max_tokens: Optional[int] = None,
+               use_tools: bool = True, **kwargs) -> Any:
+        """
+        Make one model call with the cached tools
+
+        Args:
+            messages: Conversation so far
+            system: System prompt, overriding the default
+            max_tokens: Output token limit, overriding the default
+            use_tools: Offer the Toolhouse tools to the model
+            **kwargs: Passed to the client (e.g. tool_choice, temperature)
+
+        Returns:
+            The provider's response object
+        """
+        if self.provider == OPENAI:
+            params: Dict[str, Any] = {"model": self.model, "messages": messages}
+            if use_tools:
+                params["tools"] = self.tools
+            return self.client.chat.completions.create(**params, **kwargs)
+
+        params = {"model": self.model, "max_tokens": max_tokens or self.max_tokens, "messages": messages}
+        system = self.system if system is None else system
+        if system:
+            params["system"] = system
+        if use_tools:
+            params["tools"] = self.tools
+        return self.client.messages.create(**params, **kwargs)
+
+    def run_tools(self, response: Any) -> List[Any]:
+        """Run the tools a response asked for and return the messages to append"""
+        return self.th_client.run_tools(response)
+
+    def tool_calls(self, response: Any) -> List[Any]:
+        """Return the tool calls a response asks for (empty when the model is done)"""
+        if self.provider == OPENAI:
+            choice = response.choices[0]
+            return list(choice.message.tool_calls or []) if choice.finish_reason == "tool_calls" else []
+        if response.stop_reason != "tool_use":
+            return []
+        return [block for block in response.content if getattr(block, "type", None) == "tool_use"]
+
+    def _run_tool_call(self, call: Any) -> Tuple[List[Any], float]:
+        # Run one tool_use block on its own, so several can run at once
+        start = time.perf_counter()
+        try:
+            messages = self.th_client.run_tools(SimpleNamespace(stop_reason="tool_use", content=[call]), append=False)
+            results = [block for message in messages for block in message["content"]]
+        except Exception as e:
+            # Report the failure to the model instead of aborting the whole run
+            results = [{"type": "tool_result", "tool_use_id": call.id, "content": f"Error: {str(e)}", "is_error": True}]
+        return results, time.perf_counter() - start
+
+    def run_tool_calls(self, response: Any, max_workers: int = 4) -> Tuple[List[Any], List[Tuple[str, float]]]:
+        """
+        Run every tool call of a response, concurrently when there are several
+
+        Args:
+            response: Model response asking for tools
+            max_workers: Maximum number of tools running at once
+
+        Returns:
+            (messages, timings): the assistant message and the tool results
+            to append, in call order, and (tool name, seconds) per call
+        """
+        if self.provider == OPENAI:
+            # OpenAI tool calls run through Toolhouse as one batch
+            start = time.perf_counter()
+            messages = self.run_tools(response)
+            return messages, [("tools", time.perf_counter() - start)]
+
+        calls = self.tool_calls(response)
+        if len(calls) == 1:
+            outcomes = [self._run_tool_call(calls[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(calls))),
+                                    thread_name_prefix="agent-tool") as executor:
+                # map() keeps the results in call order
+                outcomes = list(executor.map(self._run_tool_call, calls))
+        results = [block for blocks, _ in outcomes for block in blocks]
+        messages = [{"role": "assistant", "content": response.content}, {"role": "user", "content": results}]
+        return messages, [(call.name, elapsed) for call, (_, elapsed) in zip(calls, outcomes)]
+
+    def run(self, messages: List[Any], max_steps: int = 8, max_workers: int = 4,
+            on_step: Optional[Callable[[AgentStep], None]] = None, **kwargs) -> AgentRun:
+        """
+        Call the model and run its tools until it stops calling tools
+
+        Each step is one model call plus the tools it asked for; tool calls
+        from the same response run concurrently. The loop ends when a
+        response contains no tool calls. If the model is still calling
+        tools after max_steps model calls, those calls are run and one more
+        call is made with tool_choice "none", so the run always ends with an
+        answer. The tools are still sent on that call, as the API requires
+        them whenever the messages contain tool calls.
+
+        Args:
+            messages: Conversation so far (not modified)
+            max_steps: Maximum number of model calls offering tools
+            max_workers: Maximum number of tools running at once
+            on_step: Called with each finished AgentStep (e.g. for progress)
+            **kwargs: Passed to create()
+
+        Returns:
+            AgentRun with the last response, the added messages and step timings
+        """
+        use_tools = kwargs.pop("use_tools", True)
+        added: List[Any] = []
+        steps: List[AgentStep] = []
+        exhausted = False
+        while True:
+            start = time.perf_counter()
+            if exhausted:
+                # Budget spent: keep the tools (the conversation has tool blocks) but forbid calling them
+                final_kwargs = dict(kwargs, tool_choice="none" if self.provider == OPENAI else {"type": "none"})
+                response = self.create(messages + added, use_tools=use_tools, **final_kwargs)
+            else:
+                response = self.create(messages + added, use_tools=use_tools, **kwargs)
+            step = AgentStep(len(steps) + 1, time.perf_counter() - start)
+            steps.append(step)
+
+            if exhausted or not self.tool_calls(response):
+                # A response without tool calls is the final answer: no further model call
+                if on_step:
+                    on_step(step)
+                run = AgentRun(response, added, steps, exhausted=exhausted)
+                self._record(run)
+                return run
+
+            start = time.perf_counter()
+            tool_messages, step.tool_calls = self.run_tool_calls(response, max_workers)
+            step.tool_elapsed = time.perf_counter() - start
+            added.extend(tool_messages)
+            if on_step:
+                on_step(step)
+            exhausted = len(steps) >= max_steps
+
+    def _record(self, run: AgentRun) -> None:
+        with self._stats_lock:
+            self.runs += 1
+            self.model_calls += len(run.steps)
+            self.tool_calls_run += sum(len(step.tool_calls) for step in run.steps)
+            if len(run.steps) == 1 and not run.exhausted:
+                self.direct_answers += 1
+            if run.exhausted:
+                self.exhausted_runs += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return run counters
+
+        direct_answers counts runs whose first response was the final
+        answer, i.e. runs that skipped the follow-up model call.
+        """
+        with self._stats_lock:
+            return {"runs": self.runs, "direct_answers": self.direct_answers,
+                    "direct_rate": self.direct_answers / self.runs if self.runs else 0.0,
+                    "model_calls": self.model_calls, "tool_calls": self.tool_calls_run,
+                    "exhausted": self.exhausted_runs, "tool_schemas": self.tool_schemas.stats()}
+
+    def respond(self, messages: List[Any], **kwargs) -> Tuple[Any, List[Any]]:
+        """
+        Run one user turn through the tool loop (see run())
+
+        Args:
+            messages: Conversation so far (not modified)
+            **kwargs: Passed to run()
+
+        Returns:
+            (final_response, tool_messages): tool_messages are the tool
+            calls and results to append to the conversation before the
+            final response
+        """
+        run = self.run(messages, **kwargs)
+        return run.response, run.messages
+
+    def text(self, response: Any) -> str:
+        """Return the text of a response"""
+        if self.provider == OPENAI:
+            return response.choices[0].message.content or ""
+        return "".join(block.text for block in response.content if hasattr(block, "text"))
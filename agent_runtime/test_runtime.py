@@ -0,0 +1,89 @@
+"""
+Tests for AgentRuntime's tool loop
+
+Run from the repository root with `python -m pytest agent_runtime`. The
+model and Toolhouse clients are fakes, so no network calls are made.
+"""
+from types import SimpleNamespace
+
+from agent_runtime import AgentRuntime
+
+TOOLS = [{"name": "search", "description": "Search the web", "input_schema": {"type": "object"}}]
+
+
+def tool_use(call_id: str) -> SimpleNamespace:
+    return SimpleNamespace(type="tool_use", id=call_id, name="search", input={"query": "toolhouse"})
+
+
+def answer(text: str) -> SimpleNamespace:
+    return SimpleNamespace(stop_reason="end_turn", content=[SimpleNamespace(type="text", text=text)])
+
+
+class FakeMessages:
+    """Anthropic `client.messages`: records every call and calls a tool until told not to"""
+
+    def __init__(self, direct: bool = False):
+        self.direct = direct
+        self.calls = []
+
+    def create(self, **params):
+        self.calls.append(params)
+        if self.direct or params.get("tool_choice") == {"type": "none"}:
+            return answer("final answer")
+        return SimpleNamespace(stop_reason="tool_use", content=[tool_use(f"call_{len(self.calls)}")])
+
+
+class FakeToolhouse:
+    def __init__(self):
+        self.runs = 0
+
+    def get_tools(self):
+        return TOOLS
+
+    def run_tools(self, response, append=True):
+        self.runs += 1
+        results = [{"type": "tool_result", "tool_use_id": block.id, "content": "result"} for block in response.content]
+        return [{"role": "user", "content": results}]
+
+
+def make_runtime(direct: bool = False):
+    client = SimpleNamespace(messages=FakeMessages(direct))
+    return AgentRuntime(client, FakeToolhouse(), model="test-model"), client.messages
+
+
+def test_exhausted_run_keeps_the_tools_but_forbids_calling_them():
+    runtime, messages = make_runtime()
+
+    run = runtime.run([{"role": "user", "content": "Research Toolhouse"}], max_steps=2)
+
+    assert run.exhausted
+    assert runtime.text(run.response) == "final answer"
+    assert len(messages.calls) == 3
+    final = messages.calls[-1]
+    # The final request carries tool_use/tool_result blocks, so it must define the tools
+    assert final["tools"] == TOOLS
+    assert final["tool_choice"] == {"type": "none"}
+    assert any(block["type"] == "tool_result" for message in final["messages"][1:]
+               if message["role"] == "user" for block in message["content"])
+    assert runtime.th_client.runs == 2
+    assert runtime.stats()["exhausted"] == 1
+
+
+def test_exhausted_call_overrides_the_callers_tool_choice():
+    runtime, messages = make_runtime()
+
+    runtime.run([{"role": "user", "content": "Research Toolhouse"}], max_steps=1, tool_choice={"type": "any"})
+
+    assert [call["tool_choice"] for call in messages.calls] == [{"type": "any"}, {"type": "none"}]
+    assert all(call["tools"] == TOOLS for call in messages.calls)
+
+
+def test_direct_answer_makes_a_single_call():
+    runtime, messages = make_runtime(direct=True)
+
+    run = runtime.run([{"role": "user", "content": "Hi"}])
+
+    assert not run.exhausted
+    assert runtime.text(run.response) == "final answer"
+    assert len(messages.calls) == 1
+    assert runtime.stats()["direct_answers"] == 1
@@ -1,17 +1,22 @@
 import os
+import sys
 import streamlit as st
 import time
 from anthropic import Anthropic
 from toolhouse import Toolhouse, Provider
 from dotenv import load_dotenv
 
+# Make the shared agent_runtime package (at the repository root) importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from agent_runtime import AgentRuntime, send_email
+
 # Load environment variables
 load_dotenv()
 
 # Initialize clients
 @st.cache_resource
-def initialize_clients():
-    """Initialize Anthropic and Toolhouse clients, prioritizing session state keys."""
+def initialize_runtime():
+    """Initialize Anthropic and Toolhouse clients, prioritizing session state keys; tool schemas are fetched once"""
     # Try getting keys from Streamlit session state first
     anthropic_api_key = st.session_state.get("ANTHROPIC_API_KEY")
     toolhouse_api_key = st.session_state.get("TOOLHOUSE_API_KEY")
@@ -35,7 +40,7 @@ def initialize_clients():
     # Ensure provider is correctly passed if needed by Toolhouse - Provider.ANTHROPIC seems correct
     th_client = Toolhouse(api_key=toolhouse_api_key, provider=Provider.ANTHROPIC)
 
-    return anthropic_client, th_client
+    return AgentRuntime(anthropic_client, th_client, model="claude-3-7-sonnet-20250219", max_tokens=4096)
 
 # System prompt for the due diligence assistant
 def create_system_prompt(startup_name, website_url) -> str:
@@ -92,7 +97,7 @@ def create_email_system_prompt(startup_name) -> str:
     or mention that you are "currently gathering information". Send only the actual complete findings.
     """
 
-def run_due_diligence(anthropic_client, th_client, startup_name, website_url):
+def run_due_diligence(runtime, startup_name, website_url):
     """Run the due diligence process and ensure complete output"""
     system_prompt = create_system_prompt(startup_name, website_url)
     
@@ -106,27 +111,26 @@ def run_due_diligence(anthropic_client, th_client, startup_name, website_url):
     progress_placeholder = st.empty()
     status_text = st.empty()
     
-    # Step 1: Initial query with tool access
+    # Step 1: Research with tool access until the model stops calling tools;
+    # tool calls from the same response run concurrently
     progress_placeholder.progress(0.1)
-    status_text.text("Step 1/4: Gathering initial information...")
-    
-    response = anthropic_client.messages.create(
-        model="claude-3-7-sonnet-20250219",
-        max_tokens=4096,
-        system=system_prompt,
-        tools=th_client.get_tools(),
-        messages=messages
-    )
-    progress_placeholder.progress(0.25)
+    status_text.text("Step 1/2: Gathering information...")
     
-    # Step 2: Run tools based on the response
-    status_text.text("Step 2/4: Processing research data...")
-    tool_results = th_client.run_tools(response)
-    messages.extend(tool_results)
+    def show_step(step):
+        progress_placeholder.progress(min(0.1 + 0.1 * step.number, 0.5))
+        tools = ", ".join(name for name, _ in step.tool_calls)
+        if tools:
+            status_text.text(f"Step 1/2: Gathering information (research step {step.number}: {tools})...")
+    
+    research = runtime.run(messages, system=system_prompt, max_steps=6, on_step=show_step)
+    messages.extend(research.messages)
+    if research.response.content:
+        messages.append({"role": "assistant", "content": research.response.content})
     progress_placeholder.progress(0.5)
     
-    # Step 3: Generate comprehensive report with all gathered information
-    status_text.text("Step 3/4: Analyzing results and compiling report...")
+    # Step 2: Generate comprehensive report with all gathered information;
+    # the model may still look up missing details before writing it
+    status_text.text("Step 2/2: Analyzing results and compiling report...")
     final_prompt = """
     Based on all the information you've gathered, compile a comprehensive due diligence report.
     
@@ -143,45 +147,10 @@ def run_due_diligence(anthropic_client, th_client, startup_name, website_url):
     """
     messages.append({"role": "user", "content": final_prompt})
     
-    final_response = anthropic_client.messages.create(
-        model="claude-3-7-sonnet-20250219",
-        max_tokens=4096,
-        system=system_prompt,
-        tools=th_client.get_tools(),
-        messages=messages
-    )
+    report = runtime.run(messages, system=system_prompt, max_steps=3)
     
-    # Step 4: Process any final tool calls if needed
-    status_text.text("Step 4/4: Finalizing report...")
-    final_tool_results = th_client.run_tools(final_response)
-    if final_tool_results:
-        messages.extend(final_tool_results)
-        
-        # If there were more tool calls, generate one final response
-        final_final_prompt = """
-        Now that you have all the information, create the final complete due diligence report
-        with proper HTML formatting and tables. Include everything you've found about the company.
-        """
-        messages.append({"role": "user", "content": final_final_prompt})
-        
-        final_final_response = anthropic_client.messages.create(
-            model="claude-3-7-sonnet-20250219",
-            max_tokens=4096,
-            system=system_prompt,
-            messages=messages
-        )
-        
-        # Extract the report content from the final response
-        report_content = ""
-        for content_block in final_final_response.content:
-            if hasattr(content_block, "text"):
-                report_content += content_block.text
-    else:
-        # Extract the report content from the assistant's response
-        report_content = ""
-        for content_block in final_response.content:
-            if hasattr(content_block, "text"):
-                report_content += content_block.text
+    # Extract the report content from the final response
+    report_content = runtime.text(report.response)
     
     # Add default styling to ensure attractive formatting
     css_style = """
@@ -285,8 +254,8 @@ def run_due_diligence(anthropic_client, th_client, startup_name, website_url):
     
     return report_content, messages
 
-def send_email_report(anthropic_client, th_client, startup_name, email_address, report_content):
-    """Send the due diligence report via email ensuring full content is transmitted"""
+def send_email_report_with_llm(runtime, startup_name, email_address, report_content):
+    """Send the report by asking the model to call send_email (slow, token-limited; fallback only)"""
     # Create a system prompt specifically for email sending
     email_system_prompt = create_email_system_prompt(startup_name)
     
@@ -312,22 +281,41 @@ def send_email_report(anthropic_client, th_client, startup_name, email_address,
     }]
     
     # Send the email using Toolhouse
-    email_response = anthropic_client.messages.create(
-        model="claude-3-7-sonnet-20250219",
-        max_tokens=4096,  # Increase token limit to handle large reports
-        system=email_system_prompt,
-        tools=th_client.get_tools(),
-        messages=email_message
-    )
+    email_response = runtime.create(email_message, system=email_system_prompt)
     
     # Execute email sending tool
-    email_results = th_client.run_tools(email_response)
+    email_results = runtime.run_tools(email_response)
     
-    # Check if email was sent successfully
-    success = any("send_email" in str(msg) for msg in email_results)
+    # Check that the model actually called send_email
+    success = any(getattr(block, "type", None) == "tool_use" and block.name == "send_email"
+                  for block in email_response.content)
     
     return success, email_results
 
+def send_email_report(runtime, startup_name, email_address, report_content, llm_fallback=False):
+    """
+    Send the due diligence report via email, exactly as generated
+    
+    The report is passed straight to the send_email tool, so it is never
+    summarized or truncated and no model call is needed. The model-driven
+    path is only tried if the direct call fails and llm_fallback is set.
+    
+    Returns:
+        (success, details): details is the ToolResult of the direct call,
+        or the tool messages of the fallback
+    """
+    try:
+        tools = runtime.tools
+    except Exception as e:
+        print(f"Error loading Toolhouse tools: {str(e)}")
+        tools = None
+    
+    result = send_email(runtime.th_client, email_address, f"{startup_name} Investment Research", report_content, tools=tools)
+    if not result.ok and llm_fallback:
+        print(f"Direct send_email failed ({result.error_kind}): {result.error}")
+        return send_email_report_with_llm(runtime, startup_name, email_address, report_content)
+    return result.ok, [result]
+
 # Set up Streamlit UI
 def main():
     st.set_page_config(
@@ -455,13 +443,12 @@ def main():
     if submitted and startup_name and website_url:
         # Initialize clients
         try:
-            anthropic_client, th_client = initialize_clients()
+            runtime = initialize_runtime()
             
             # Run the due diligence process
             with st.spinner(f"Performing due diligence on {startup_name}..."):
                 report, messages = run_due_diligence(
-                    anthropic_client, 
-                    th_client, 
+                    runtime, 
                     startup_name, 
                     website_url
                 )
@@ -501,24 +488,25 @@ def main():
                 
                 with st.form("email_form"):
                     email_address = st.text_input("Your Email Address", placeholder="your@email.com")
-                    send_email = st.form_submit_button("Send Report via Email")
+                    llm_fallback = st.checkbox("Retry via AI if the direct send fails", value=False)
+                    send_button = st.form_submit_button("Send Report via Email")
                     
-                    if send_email:
+                    if send_button:
                         if not email_address:
                             st.warning("Please enter your email address")
                         else:
                             # Initialize clients
                             try:
-                                anthropic_client, th_client = initialize_clients()
+                                runtime = initialize_runtime()
                                 
                                 # Send the email
                                 with st.spinner("Sending email..."):
                                     success, email_results = send_email_report(
-                                        anthropic_client,
-                                        th_client,
+                                        runtime,
                                         st.session_state.startup_name,
                                         email_address,
-                                        st.session_state.report_content
+                                        st.session_state.report_content,
+                                        llm_fallback=llm_fallback
                                     )
                                 
                                 if success:
@@ -526,7 +514,8 @@ def main():
                                     st.session_state.debug_email_results = email_results
                                     st.success(f"✅ Report has been sent to {email_address}")
                                 else:
-                                    st.error("Failed to send email. Please try again.")
+                                    reason = email_results[0].error if email_results and hasattr(email_results[0], "error") else "please try again"
+                                    st.error(f"Failed to send email: {reason}")
                                     
                             except Exception as e:
                                 st.error(f"An error occurred: {str(e)}")
@@ -1,8 +1,12 @@
 import os
-from typing import List
+import sys
 from anthropic import Anthropic
 from toolhouse import Toolhouse, Provider
 
+# Make the shared agent_runtime package (at the repository root) importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from agent_runtime import AgentRuntime, ConversationHistory, model_summarizer
+
 # Load API keys from environment variables
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
 TOOLHOUSE_API_KEY = os.getenv("TOOLHOUSE_API_KEY")
@@ -11,9 +15,6 @@ TOOLHOUSE_API_KEY = os.getenv("TOOLHOUSE_API_KEY")
 client = Anthropic(api_key=ANTHROPIC_API_KEY)
 th = Toolhouse(api_key=TOOLHOUSE_API_KEY, provider=Provider.ANTHROPIC)
 
-# Set timezone for the AI Agent
-th.set_metadata("timezone", "-7")
-
 # Define system message for the AI agent
 system_message = """
         IMPORTANT: Be extremely concise in all your answers. Keep it to 280 characters.
@@ -25,13 +26,20 @@ system_message = """
         Only respond with the details of the answer, like a real customer support agent would do.
         """
 
-# Initialize message history
-messages: List = []
+# Fetch the tool schemas once and hand the same list to every model call
+runtime = AgentRuntime(client, th, model="claude-3-5-sonnet-20240620", system=system_message)
+
+# Set timezone for the AI Agent
+runtime.set_metadata("timezone", "-7")
+
+# Initialize message history; once it exceeds the token budget, older turns are
+# replaced with a summary written by the model and the recent turns are kept verbatim
+history = ConversationHistory(max_tokens=8000, keep_turns=6, summarize=model_summarizer(runtime))
 # Flag to check if it's the first question
 first_question = True
 
 
-def process_response(messages):
+def process_response(history):
     global first_question
 
     # Prompt user for question (different for first and follow-up questions)
@@ -45,41 +53,26 @@ def process_response(messages):
 
     # Exit if user types '/quit' '/exit'
     if input_question.lower() in ["/quit", "/exit"]:
+        stats = runtime.stats()
+        print(f"\033[90m{stats['direct_answers']} of {stats['runs']} turns answered without tools, "
+              f"{stats['model_calls']} model calls, {stats['tool_calls']} tool calls\033[0m")
         exit()
 
     # Add user's question to message history
-    messages.append({"role": "user", "content": f"{input_question}"})
-
-    # Generate initial response using Anthropic model
-    response = client.messages.create(
-        model="claude-3-5-sonnet-20240620",
-        max_tokens=1024,
-        system=system_message,
-        # Get the tools from toolhouse SDK to perform actions based on the request
-        tools=th.get_tools(),
-        messages=messages,
-    )
-
-    # Run tools based on the response
-    messages += th.run_tools(response)
-
-    # Generate final response
-    agent_setup = client.messages.create(
-        model="claude-3-5-sonnet-20240620",
-        max_tokens=1024,
-        system=system_message,
-        tools=th.get_tools(),
-        messages=messages,
-    )
-    agent_reply = agent_setup.content[0].text
+    history.append({"role": "user", "content": f"{input_question}"})
+
+    # Generate a response, running tools until the model answers; a direct answer needs one model call
+    agent_setup, tool_messages = runtime.respond(history.for_request())
+    history.extend(tool_messages)
+    agent_reply = runtime.text(agent_setup)
 
     # Print AI agent's response
-    print("\033[33mSupport AI AGENT:\033[0m", agent_setup.content[0].text)
+    print("\033[33mSupport AI AGENT:\033[0m", agent_reply)
 
     # Add AI's response to message history
-    messages.append({"role": "assistant", "content": f"{agent_reply}"})
+    history.append({"role": "assistant", "content": f"{agent_reply}"})
 
 
 # Main loop to continuously process responses
 while True:
-    process_response(messages)
+    process_response(history)
@@ -1,17 +1,22 @@
 import os
+import sys
 import streamlit as st
 import json
 import re
 from anthropic import Anthropic
 from toolhouse import Toolhouse, Provider
 
+# Make the shared agent_runtime package (at the repository root) importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from agent_runtime import AgentRuntime
+
 
 
 
 # Initialize clients
 @st.cache_resource
-def initialize_clients():
-    """Initialize Anthropic and Toolhouse clients"""
+def initialize_runtime():
+    """Initialize Anthropic and Toolhouse clients, sharing one cached copy of the tool schemas"""
     anthropic_api_key = st.session_state.get("ANTHROPIC_API_KEY")
     toolhouse_api_key = st.session_state.get("TOOLHOUSE_API_KEY")
 
@@ -25,9 +30,9 @@ def initialize_clients():
     anthropic_client = Anthropic(api_key=anthropic_api_key)
     th_client = Toolhouse(api_key=toolhouse_api_key, provider=Provider.ANTHROPIC)
     
-    return anthropic_client, th_client
+    return AgentRuntime(anthropic_client, th_client, model="claude-3-5-sonnet-20240620")
 
-def search_jobs(anthropic_client, th_client, location,job_position):
+def search_jobs(runtime, location,job_position):
     """Search for jobs using Toolhouse tools"""
     # Create a simple message
     messages = [{
@@ -35,26 +40,8 @@ def search_jobs(anthropic_client, th_client, location,job_position):
         "content": f"Search for job openings for following job position:{job_position} in the following location:{location}. Return the results as a JSON object with format {{\"job_openings\": [{{\"title\": \"Job Title\", \"link\": \"URL\"}}]}}"
     }]
     
-    # Call Claude with Toolhouse tools
-    response = anthropic_client.messages.create(
-        model="claude-3-5-sonnet-20240620",
-        max_tokens=1024,
-        system=f"Search for job openings in {location}",
-        tools=th_client.get_tools(),
-        messages=messages
-    )
-    
-    # Process tool results
-    tool_results = th_client.run_tools(response)
-    
-    # Final response with tool results incorporated
-    final_response = anthropic_client.messages.create(
-        model="claude-3-5-sonnet-20240620",
-        max_tokens=1024,
-        system=f"Search for job openings in {location}",
-        tools=th_client.get_tools(),
-        messages=messages + tool_results
-    )
+    # Call Claude with the cached Toolhouse tools, running them until it answers (one call if it answers directly)
+    final_response, tool_results = runtime.respond(messages, system=f"Search for job openings in {location}")
     
     return final_response, tool_results
 
@@ -157,12 +144,12 @@ job_position = st.text_input("Enter job position", "software engineer")
 if st.button("Find Jobs"):
     try:
         # Initialize clients
-        anthropic_client, th_client = initialize_clients()
+        runtime = initialize_runtime()
         
         # Show loading spinner during search
         with st.spinner(f"Searching for jobs in {location}..."):
-            final_response, tool_results = search_jobs(anthropic_client, th_client, location,job_position)
-            response_text = final_response.content[0].text
+            final_response, tool_results = search_jobs(runtime, location,job_position)
+            response_text = runtime.text(final_response)
             
             # Extract jobs
             jobs = extract_jobs(response_text)
@@ -195,4 +182,12 @@ if st.button("Find Jobs"):
             st.warning(f"No jobs found in {location}. Try another location.")
             
     except Exception as e:
-        st.error(f"An error occurred: {str(e)}")
\ No newline at end of file
+        st.error(f"An error occurred: {str(e)}")
+
+# Show how many searches skipped the follow-up model call
+if st.session_state.get("ANTHROPIC_API_KEY") and st.session_state.get("TOOLHOUSE_API_KEY"):
+    stats = initialize_runtime().stats()
+    if stats["runs"]:
+        st.sidebar.caption(f"{stats['direct_answers']} of {stats['runs']} searches answered without tools "
+                           f"({stats['direct_rate']:.0%}) · {stats['model_calls']} model calls · "
+                           f"{stats['tool_calls']} tool calls")
@@ -1,9 +1,13 @@
 import os
-from typing import List
+import sys
 from anthropic import Anthropic
 from toolhouse import Toolhouse, Provider
 from dotenv import load_dotenv
 
+# Make the shared agent_runtime package (at the repository root) importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from agent_runtime import AgentRuntime, ConversationHistory, model_summarizer
+
 load_dotenv()
 
 
@@ -52,12 +56,16 @@ Use your tools wisely:
 - Use time awareness to provide appropriate greetings in the target language
 """
 
-# Initialize message history
-messages: List = []
+# Fetch the tool schemas once and hand the same list to every model call
+runtime = AgentRuntime(client, th, model="claude-3-5-sonnet-20240620", system=system_message)
+
+# Initialize message history; once it exceeds the token budget, older turns are
+# replaced with a summary written by the model and the recent turns are kept verbatim
+history = ConversationHistory(max_tokens=8000, keep_turns=6, summarize=model_summarizer(runtime))
 # Flag to check if it's the first question
 first_question = True
 
-def process_response(messages):
+def process_response(history):
     global first_question
     
     # Prompt user for question (different for first and follow-up questions)
@@ -69,40 +77,25 @@ def process_response(messages):
     
     # Exit if user types '/quit' '/exit'
     if input_question.lower() in ["/quit", "/exit"]:
+        stats = runtime.stats()
+        print(f"\033[90m{stats['direct_answers']} of {stats['runs']} turns answered without tools, "
+              f"{stats['model_calls']} model calls, {stats['tool_calls']} tool calls\033[0m")
         exit()
     
     # Add user's question to message history
-    messages.append({"role": "user", "content": f"{input_question}" })
-    
-    # Generate initial response using Anthropic model
-    response = client.messages.create(
-                model="claude-3-5-sonnet-20240620", 
-                max_tokens=1024,
-                system=system_message,
-                # Get the tools from toolhouse SDK to perform actions based on the request
-                tools=th.get_tools(),
-                messages=messages
-            )
-    
-    # Run tools based on the response
-    messages += th.run_tools(response)
+    history.append({"role": "user", "content": f"{input_question}" })
     
-    # Generate final response
-    agent_setup = client.messages.create(
-        model="claude-3-5-sonnet-20240620",
-        max_tokens=1024,
-        system=system_message,
-        tools=th.get_tools(),
-        messages=messages
-    )
-    agent_reply = agent_setup.content[0].text
+    # Generate a response, running tools until the model answers; a direct answer needs one model call
+    agent_setup, tool_messages = runtime.respond(history.for_request())
+    history.extend(tool_messages)
+    agent_reply = runtime.text(agent_setup)
     
     # Print AI agent's response
-    print("\033[35mLanguage Tutor:\033[0m", agent_setup.content[0].text)
+    print("\033[35mLanguage Tutor:\033[0m", agent_reply)
     
     # Add AI's response to message history
-    messages.append({"role": "assistant", "content": f"{agent_reply}" })
+    history.append({"role": "assistant", "content": f"{agent_reply}" })
 
 # Main loop to continuously process responses
 while True:
-    process_response(messages)
\ No newline at end of file
+    process_response(history)
\ No newline at end of file
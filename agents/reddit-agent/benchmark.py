@@ -0,0 +1,363 @@
+"""
+Benchmarks for the Reddit client
+
+Runs against a local fake Reddit server so results are repeatable and
+do not spend real API quota.
+
+Usage:
+    python benchmark.py [cache|coalesce|connections|dedup|details|fanout|metrics|models|rank|search|stream]
+"""
+import argparse
+import gc
+import json
+import random
+import threading
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+import requests
+
+from ranking import EngagementRanker, PostColumns
+from rate_limiter import RateLimiter
+from dedup import NearDuplicateDetector
+from fake_reddit import EPOCH, FakeRedditServer, make_listing
+from metrics import ClientMetrics
+from models import parse_listing
+from reddit import RedditClient, json_loads
+from response_cache import ResponseCache
+from search_index import SearchIndex
+from single_flight import SingleFlight
+
+
+def unthrottled() -> RateLimiter:
+    """Limiter that never waits, so benchmarks measure the transport only"""
+    return RateLimiter(rate=1e9, burst=1_000_000)
+
+
+SUBREDDITS: List[str] = [f"sub{i}" for i in range(12)]
+
+
+def bench_connections(refreshes: int = 5) -> None:
+    """Compare TCP connections per refresh: module-level requests.get vs pooled session"""
+    with FakeRedditServer() as server:
+        start = time.perf_counter()
+        for _ in range(refreshes):
+            for subreddit in SUBREDDITS:
+                requests.get(f"{server.url}/r/{subreddit}/hot.json", params={"limit": 5}).json()
+        legacy_time = time.perf_counter() - start
+        legacy_connections = server.connections
+
+        server.reset()
+        with RedditClient(base_url=server.url, rate_limiter=unthrottled()) as client:
+            start = time.perf_counter()
+            for _ in range(refreshes):
+                for subreddit in SUBREDDITS:
+                    client.get_hot_posts(subreddit, 5)
+            pooled_time = time.perf_counter() - start
+        pooled_connections = server.connections
+
+    print(f"{len(SUBREDDITS)} subreddits x {refreshes} refreshes")
+    print(f"requests.get   : {legacy_connections / refreshes:6.1f} connections/refresh, {legacy_time * 1000:8.1f} ms")
+    print(f"pooled session : {pooled_connections / refreshes:6.1f} connections/refresh, {pooled_time * 1000:8.1f} ms")
+
+
+def bench_fanout(count: int = 20, latency: float = 0.2) -> None:
+    """Compare a serial subreddit loop with the concurrent fetch_subreddits fan-out"""
+    subreddits = [f"sub{i}" for i in range(count)]
+    with FakeRedditServer(latency=latency) as server, RedditClient(base_url=server.url, rate_limiter=unthrottled()) as client:
+        start = time.perf_counter()
+        for subreddit in subreddits:
+            client.get_hot_posts(subreddit, 5)
+        serial_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = client.fetch_subreddits(subreddits, "hot", 5, max_workers=count)
+        fanout_time = time.perf_counter() - start
+        slowest = max(result.elapsed for result in results)
+
+    print(f"{count} subreddits, {latency * 1000:.0f} ms server latency")
+    print(f"serial loop (no sleeps) : {serial_time * 1000:8.1f} ms")
+    print(f"fetch_subreddits        : {fanout_time * 1000:8.1f} ms (slowest request {slowest * 1000:.1f} ms)")
+
+
+def bench_coalesce(sessions: int = 20, latency: float = 0.2) -> None:
+    """Count upstream requests when many sessions ask for the same listing at once"""
+    def burst(single_flights: List[SingleFlight]) -> int:
+        with FakeRedditServer(latency=latency) as server:
+            clients = [RedditClient(base_url=server.url, rate_limiter=unthrottled(), single_flight=single_flight)
+                       for single_flight in single_flights]
+            threads = [threading.Thread(target=client.get_hot_posts, args=("LocalLLaMA", 5)) for client in clients]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            for client in clients:
+                client.close()
+            return server.requests
+
+    independent = burst([SingleFlight() for _ in range(sessions)])
+    shared = SingleFlight()
+    coalesced = burst([shared] * sessions)
+
+    print(f"{sessions} concurrent sessions requesting r/LocalLLaMA/hot, {latency * 1000:.0f} ms server latency")
+    print(f"without coalescing : {independent:3d} requests")
+    print(f"shared SingleFlight: {coalesced:3d} requests {shared.stats()}")
+
+
+def bench_cache(refreshes: int = 10) -> None:
+    """Count upstream requests for repeated refreshes with and without the response cache"""
+    now = [0.0]
+    cache = ResponseCache(ttls={"hot": 30}, clock=lambda: now[0])
+    with FakeRedditServer() as server:
+        with RedditClient(base_url=server.url, rate_limiter=unthrottled()) as client:
+            for _ in range(refreshes):
+                client.fetch_subreddits(SUBREDDITS, "hot", 5)
+        uncached = server.requests
+
+        server.reset()
+        with RedditClient(base_url=server.url, rate_limiter=unthrottled(), cache=cache) as client:
+            for _ in range(refreshes):
+                # Each refresh is 10 simulated seconds apart, so entries expire every third refresh
+                client.fetch_subreddits(SUBREDDITS, "hot", 5)
+                now[0] += 10
+        cached = server.requests
+
+    print(f"{len(SUBREDDITS)} subreddits x {refreshes} refreshes, 30 s TTL, refresh every 10 s")
+    print(f"no cache : {uncached} upstream requests")
+    print(f"cache    : {cached} upstream requests, {cache.stats()}")
+
+
+def bench_stream(total: int = 5000) -> None:
+    """Stream a large listing page by page and compare with the single-page API"""
+    with FakeRedditServer(total_posts=total) as server, RedditClient(base_url=server.url, rate_limiter=unthrottled()) as client:
+        single = client.get_new_posts("sub0", limit=total)
+
+        server.reset()
+        start = time.perf_counter()
+        streamed = sum(1 for _ in client.iter_new_posts("sub0"))
+        stream_time = time.perf_counter() - start
+        pages = server.requests
+
+        server.reset()
+        capped = sum(1 for _ in client.iter_new_posts("sub0", max_items=250))
+        capped_pages = server.requests
+
+    print(f"listing of {total} posts")
+    print(f"get_new_posts(limit={total})      : {len(single)} posts (one page)")
+    print(f"iter_new_posts()               : {streamed} posts in {pages} pages, {stream_time * 1000:.1f} ms")
+    print(f"iter_new_posts(max_items=250)  : {capped} posts in {capped_pages} pages")
+
+
+def legacy_parse(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """The per-method dictionary building the client used before the Post model"""
+    posts = []
+    for post in data['data']['children']:
+        post_data = post['data']
+        posts.append({
+            'title': post_data['title'],
+            'url': f"https://www.reddit.com{post_data['permalink']}",
+            'subreddit': post_data['subreddit'],
+            'author': post_data['author'],
+            'score': post_data['score'],
+            'num_comments': post_data['num_comments'],
+            'created_utc': post_data['created_utc'],
+            'selftext': post_data.get('selftext', ''),
+            'is_self': post_data['is_self']
+        })
+    return posts
+
+
+def bench_models(count: int = 100_000) -> None:
+    """Compare memory and parse time of legacy post dictionaries, the client's default parsing and Post objects"""
+    raw = json.dumps(make_listing("LocalLLaMA", count)).encode()
+
+    def measure(parse):
+        data = json_loads(raw)
+        elapsed = float("inf")
+        for _ in range(5):
+            start = time.perf_counter()
+            parse(data)
+            elapsed = min(elapsed, time.perf_counter() - start)
+
+        del data
+        gc.collect()
+        tracemalloc.start()
+        posts = parse(json_loads(raw))
+        # The decoded JSON is dropped here, so only memory retained by the posts is counted
+        gc.collect()
+        retained, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del posts
+        return elapsed, retained
+
+    start = time.perf_counter()
+    json_loads(raw)
+    decode_time = time.perf_counter() - start
+
+    legacy_time, legacy_bytes = measure(legacy_parse)
+    with RedditClient(rate_limiter=unthrottled()) as client:
+        default_time, default_bytes = measure(client._parse_listing)
+    model_time, model_bytes = measure(parse_listing)
+
+    print(f"{count} posts, {len(raw) / 1e6:.1f} MB of JSON, decoded by {json_loads.__module__} in {decode_time * 1000:.1f} ms")
+    print(f"legacy dicts     : {legacy_time * 1000:8.1f} ms parse, {legacy_bytes / 1e6:7.1f} MB retained")
+    print(f"default (dicts)  : {default_time * 1000:8.1f} ms parse, {default_bytes / 1e6:7.1f} MB retained")
+    print(f"models=True Post : {model_time * 1000:8.1f} ms parse, {model_bytes / 1e6:7.1f} MB retained")
+
+
+def bench_details(count: int = 20, latency: float = 0.2) -> None:
+    """Compare serial get_post_details calls with the concurrent iter_post_details"""
+    with FakeRedditServer(latency=latency) as server, RedditClient(base_url=server.url, rate_limiter=unthrottled()) as client:
+        urls = [f"{server.url}/r/sub0/comments/p{i}/post_{i}/" for i in range(count)]
+
+        start = time.perf_counter()
+        for url in urls:
+            client.get_post_details(url)
+        serial_time = time.perf_counter() - start
+
+        server.reset()
+        start = time.perf_counter()
+        first = None
+        # Every URL twice: duplicates are only fetched once
+        for _ in client.iter_post_details(urls + urls, max_workers=count):
+            first = first or time.perf_counter() - start
+        bulk_time = time.perf_counter() - start
+
+    print(f"{count} posts, {latency * 1000:.0f} ms server latency")
+    print(f"serial get_post_details : {serial_time * 1000:8.1f} ms")
+    print(f"iter_post_details       : {bulk_time * 1000:8.1f} ms, first result after {first * 1000:.1f} ms, "
+          f"{server.requests} requests for {2 * count} URLs")
+
+
+def bench_search(count: int = 20_000) -> None:
+    """Time offline full-text queries over posts the client has fetched"""
+    index = SearchIndex()
+    with FakeRedditServer(total_posts=count) as server:
+        with RedditClient(base_url=server.url, rate_limiter=unthrottled(), index=index) as client:
+            start = time.perf_counter()
+            for _ in client.iter_new_posts("sub0"):
+                pass
+            index_time = time.perf_counter() - start
+
+            server.reset()
+            timings = []
+            for query in ["post 42", "lorem ipsum", "lorem ipsum", "post 19999"]:
+                start = time.perf_counter()
+                results = client.search_local(query, subreddit="sub0", limit=10)
+                timings.append((query, len(results), time.perf_counter() - start))
+
+    print(f"fetched and indexed {len(index)} posts in {index_time * 1000:.1f} ms")
+    for query, hits, elapsed in timings:
+        print(f"search_local({query!r:14}) : {hits:2} results in {elapsed * 1000:6.2f} ms")
+    print(f"network requests during search: {server.requests}")
+
+
+def bench_rank(count: int = 100_000, k: int = 25) -> None:
+    """Time engagement ranking of a large candidate set"""
+    posts = parse_listing(make_listing("LocalLLaMA", count))
+    rng = random.Random(42)
+    for post in posts:
+        post.score = int(rng.paretovariate(1.2))
+        post.num_comments = int(post.score * rng.random())
+        post.created_utc = EPOCH - rng.uniform(0, 48 * 3600)
+
+    start = time.perf_counter()
+    columns = PostColumns.from_posts(posts)
+    build_time = time.perf_counter() - start
+
+    ranker = EngagementRanker()
+    rank_time = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        top = ranker.top_k(columns, k, now=EPOCH)
+        rank_time = min(rank_time, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    scores = ranker.scores(columns, now=EPOCH)
+    sorted(range(count), key=scores.__getitem__, reverse=True)[:k]
+    sort_time = time.perf_counter() - start
+
+    print(f"{count} posts, top {k}")
+    print(f"build columns        : {build_time * 1000:8.2f} ms (once per fetch)")
+    print(f"score + argpartition : {rank_time * 1000:8.2f} ms")
+    print(f"score + sorted()     : {sort_time * 1000:8.2f} ms")
+    print(f"best post: {top[0]!r}")
+
+
+def bench_dedup(count: int = 10_000, duplicates: int = 1_000) -> None:
+    """Time near-duplicate grouping of posts with crossposted copies mixed in"""
+    rng = random.Random(42)
+    words = ["".join(rng.choice("abcdefghijklmnop") for _ in range(6)) for _ in range(5000)]
+    posts = [{"title": " ".join(rng.choice(words) for _ in range(12)), "selftext": "", "score": 1, "num_comments": 0}
+             for _ in range(count)]
+    posts += [dict(post, title=f"[x-post] {post['title']}!") for post in rng.sample(posts, duplicates)]
+
+    detector = NearDuplicateDetector()
+    start = time.perf_counter()
+    kept = detector.deduplicate(posts)
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(posts)} posts ({duplicates} crossposted copies)")
+    print(f"MinHash + LSH: {elapsed * 1000:8.1f} ms, {len(posts) - len(kept)} duplicates removed")
+
+
+def bench_metrics(requests_count: int = 500, rounds: int = 5) -> None:
+    """Measure the per-request overhead of ClientMetrics and show its Prometheus export"""
+    metrics = ClientMetrics()
+    timings = {None: float("inf"), metrics: float("inf")}
+    with FakeRedditServer() as server:
+        clients = {option: RedditClient(base_url=server.url, rate_limiter=unthrottled(), metrics=option)
+                   for option in timings}
+        # Alternate rounds so both configurations see the same server conditions
+        for _ in range(rounds):
+            for option, client in clients.items():
+                start = time.perf_counter()
+                for i in range(requests_count):
+                    client.get_hot_posts(f"sub{i % 20}", 5)
+                timings[option] = min(timings[option], (time.perf_counter() - start) / requests_count)
+        for client in clients.values():
+            client.close()
+    disabled, enabled = timings[None], timings[metrics]
+
+    # The end-to-end difference is within network noise; time the bookkeeping itself too
+    scratch = ClientMetrics()
+    start = time.perf_counter()
+    for _ in range(10_000):
+        endpoint = ResponseCache.endpoint_type("https://www.reddit.com/r/sub0/hot.json")
+        scratch.observe_rate_limit_wait(0.0)
+        scratch.observe_request(endpoint, "200", 0.05, 2048)
+    bookkeeping = (time.perf_counter() - start) / 10_000
+
+    print(f"{requests_count} requests")
+    print(f"metrics disabled: {disabled * 1e6:8.1f} us/request")
+    print(f"metrics enabled : {enabled * 1e6:8.1f} us/request")
+    print(f"bookkeeping     : {bookkeeping * 1e6:8.1f} us/request")
+    print("\n".join(line for line in metrics.to_prometheus().splitlines()
+                    if line.startswith(("reddit_requests_total", "reddit_request_duration_seconds_count"))))
+
+
+BENCHMARKS = {
+    "cache": bench_cache,
+    "coalesce": bench_coalesce,
+    "connections": bench_connections,
+    "dedup": bench_dedup,
+    "details": bench_details,
+    "fanout": bench_fanout,
+    "metrics": bench_metrics,
+    "models": bench_models,
+    "rank": bench_rank,
+    "search": bench_search,
+    "stream": bench_stream,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reddit client benchmarks")
+    parser.add_argument("benchmark", nargs="?", choices=sorted(BENCHMARKS), help="Benchmark to run (default: all)")
+    args = parser.parse_args()
+
+    for name in ([args.benchmark] if args.benchmark else sorted(BENCHMARKS)):
+        print(f"== {name} ==")
+        BENCHMARKS[name]()
+        print()
@@ -0,0 +1,186 @@
+import re
+import zlib
+from collections import defaultdict
+from typing import Dict, Iterator, List, Sequence
+
+import numpy as np
+
+from reddit import PostRecord
+
+# Shingles hashed per vectorized MinHash step; bounds the temporary (num_perm, chunk) array
+_CHUNK = 16384
+
+_NON_WORD = re.compile(r"[^\w]+", re.UNICODE)
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and collapse punctuation and whitespace to single spaces"""
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+
+class NearDuplicateDetector:
+    """
+    Groups near-duplicate posts with MinHash and locality-sensitive hashing
+
+    Crossposts (grouped with the post they copy) and posts of the same
+    external link are grouped first by exact match, whatever their titles.
+    Then each post's title and selftext are normalized and split into character
+    shingles. A MinHash signature estimates the Jaccard similarity of two
+    shingle sets, and LSH banding only compares posts that share at least
+    one band of their signature, so grouping takes roughly linear time
+    instead of comparing every pair. Candidate pairs are confirmed against
+    `threshold` before being merged into a group.
+    """
+
+    def __init__(self, threshold: float = 0.7, num_perm: int = 128, bands: int = 16,
+                 shingle_size: int = 5, max_chars: int = 2000, seed: int = 1):
+        """
+        Initialize the detector
+
+        Args:
+            threshold: Estimated Jaccard similarity at which two posts are
+                considered duplicates
+            num_perm: Number of MinHash permutations (signature length)
+            bands: Number of LSH bands; num_perm must be divisible by it.
+                With 128 permutations, 16 bands of 8 rows make pairs
+                around 0.7 similarity likely to become candidates
+            shingle_size: Characters per shingle
+            max_chars: Only the first max_chars characters of each post are
+                used, which keeps long selftexts from dominating the cost
+            seed: Seed of the hash permutations
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.max_chars = max_chars
+        # Multiply-shift hashing: (a * x + b) mod 2**64, keeping the high 32 bits;
+        # uint64 arithmetic wraps, which provides the modulo for free
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)
+
+    def _shingles(self, text: str) -> np.ndarray:
+        text = normalize_text(text)[:self.max_chars]
+        size = self.shingle_size
+        if len(text) <= size:
+            grams = {text}
+        else:
+            grams = {text[i:i + size] for i in range(len(text) - size + 1)}
+        return np.fromiter((zlib.crc32(gram.encode()) for gram in grams), dtype=np.uint64, count=len(grams))
+
+    @staticmethod
+    def _link_keys(post: PostRecord) -> Iterator[str]:
+        # A crosspost and its original share the original's fullname
+        original = post.get('crosspost_parent') or (f"t3_{post['id']}" if post.get('id') else None)
+        if original:
+            yield "post:" + original
+        if post.get('link_url'):
+            yield "link:" + post['link_url']
+
+    def signatures(self, posts: Sequence[PostRecord]) -> np.ndarray:
+        """Return a (len(posts), num_perm) array of MinHash signatures of title + selftext"""
+        shingles = [self._shingles(f"{post['title']} {post.get('selftext', '')}") for post in posts]
+        signatures = np.empty((len(posts), self.num_perm), dtype=np.uint64)
+        start = 0
+        while start < len(shingles):
+            # Hash the shingles of as many posts as fit in one chunk at once,
+            # then take the per-post minimum of each permutation
+            end, size = start, 0
+            while end < len(shingles) and (end == start or size + len(shingles[end]) <= _CHUNK):
+                size += len(shingles[end])
+                end += 1
+            values = np.concatenate(shingles[start:end])
+            with np.errstate(over="ignore"):
+                hashes = (np.outer(self._a, values) + self._b[:, None]) >> np.uint64(32)
+            offsets = np.cumsum([0] + [len(s) for s in shingles[start:end - 1]])
+            signatures[start:end] = np.minimum.reduceat(hashes, offsets, axis=1).T
+            start = end
+        return signatures
+
+    def group(self, posts: Sequence[PostRecord]) -> List[List[int]]:
+        """
+        Group near-duplicate posts
+
+        Args:
+            posts: Posts to group (dictionaries or Post objects)
+
+        Returns:
+            Groups of indices into `posts`, one group per distinct post
+            (singletons included), ordered by first occurrence
+        """
+        count = len(posts)
+        if not count:
+            return []
+        parent = list(range(count))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        def union(i: int, j: int) -> None:
+            root_i, root_j = find(i), find(j)
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+        first_with_key: Dict[str, int] = {}
+        for i, post in enumerate(posts):
+            for key in self._link_keys(post):
+                union(first_with_key.setdefault(key, i), i)
+
+        signatures = self.signatures(posts)
+        for band in range(self.bands):
+            columns = signatures[:, band * self.rows:(band + 1) * self.rows]
+            buckets: Dict[bytes, List[int]] = defaultdict(list)
+            for i in range(count):
+                buckets[columns[i].tobytes()].append(i)
+            for members in buckets.values():
+                first = members[0]
+                for other in members[1:]:
+                    root_first, root_other = find(first), find(other)
+                    if root_first == root_other:
+                        continue
+                    similarity = np.count_nonzero(signatures[first] == signatures[other]) / self.num_perm
+                    if similarity >= self.threshold:
+                        union(root_first, root_other)
+
+        groups: Dict[int, List[int]] = {}
+        for i in range(count):
+            groups.setdefault(find(i), []).append(i)
+        return list(groups.values())
+
+    def group_posts(self, posts: Sequence[PostRecord]) -> List[List[PostRecord]]:
+        """
+        Group near-duplicate posts, canonical post first
+
+        The canonical post of a group is the one with the highest score
+        (then most comments), which is usually the copy worth answering.
+
+        Args:
+            posts: Posts to group
+
+        Returns:
+            One list per distinct post, starting with its canonical copy
+        """
+        grouped = []
+        for indices in self.group(posts):
+            members = [posts[i] for i in indices]
+            members.sort(key=lambda post: (post['score'], post['num_comments']), reverse=True)
+            grouped.append(members)
+        return grouped
+
+    def deduplicate(self, posts: Sequence[PostRecord]) -> List[PostRecord]:
+        """
+        Keep only the canonical post of each group of near-duplicates
+
+        Args:
+            posts: Posts to deduplicate
+
+        Returns:
+            Canonical posts, in the order their groups first appear
+        """
+        return [members[0] for members in self.group_posts(posts)]
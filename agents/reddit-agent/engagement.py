@@ -0,0 +1,369 @@
+import hashlib
+import html
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from reddit import PostRecord, normalize_post_url
+
+ENGAGEMENT_LEVELS = ("High", "Medium", "Low")
+
+# Tool the model is forced to call, so responses arrive as validated JSON
+# instead of a markdown table that has to be scraped
+RESPONSE_TOOL = {
+    "name": "submit_responses",
+    "description": "Submit one suggested Reddit comment for every post, keyed by the post's ID.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "responses": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "post_id": {"type": "string", "description": "The ID given on the post's 'ID:' line"},
+                        "suggested_response": {"type": "string", "description": "A 2-3 sentence comment"},
+                        "engagement_potential": {"type": "string", "enum": list(ENGAGEMENT_LEVELS)},
+                        "rationale": {"type": "string", "description": "One sentence on why this should get upvotes"},
+                    },
+                    "required": ["post_id", "suggested_response", "engagement_potential"],
+                },
+            }
+        },
+        "required": ["responses"],
+    },
+}
+
+# Generation modes; each sends different user prompts, so each has its own prompt version
+PER_POST = "per_post"
+BATCH = "batch"
+
+# User prompts ({tool}: RESPONSE_TOOL's name, {posts}: format_posts_for_prompt() output)
+POST_PROMPT = ("Help me write an engaging Reddit response for this post. Give me a brief but valuable "
+               "response that would likely get upvotes, and submit it with the {tool} tool.\n\n{posts}")
+BATCH_PROMPT = ("Help me write engaging Reddit responses for these posts. For each one, give me a brief but "
+                "valuable response that would likely get upvotes.\n\n{posts}")
+BATCH_SUBMIT_PROMPT = """
+Submit your responses for the posts I shared earlier with the {tool} tool.
+Use exactly one entry per post, with the post's ID copied from its "ID:" line.
+"""
+
+GENERATION_PROMPTS = {PER_POST: (POST_PROMPT,), BATCH: (BATCH_PROMPT, BATCH_SUBMIT_PROMPT)}
+
+_JSON_FENCE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL)
+
+
+class GenerationResult:
+    """
+    Outcome of generating the response for one post
+
+    Attributes:
+        post_id: ID of the post (see post_key)
+        post: The post
+        response: Validated response (as returned by parse_responses), or
+            None if generation failed
+        error: Error message, or None if generation succeeded
+        elapsed: Time spent on the request in seconds
+    """
+
+    __slots__ = ("post_id", "post", "response", "error", "elapsed")
+
+    def __init__(self, post_id: str, post: PostRecord, response: Optional[Dict[str, Any]],
+                 error: Optional[str] = None, elapsed: float = 0.0):
+        self.post_id = post_id
+        self.post = post
+        self.response = response
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def ok(self) -> bool:
+        """True if a valid response was generated"""
+        return self.error is None
+
+    def __repr__(self) -> str:
+        status = f"error={self.error!r}" if self.error else "ok"
+        return f"GenerationResult({self.post_id}, {status}, elapsed={self.elapsed:.3f}s)"
+
+
+def prompt_version(system_prompt: str, mode: str = PER_POST) -> str:
+    """
+    Fingerprint of everything that shapes a response
+
+    Covers the system prompt, the response schema, the generation mode and
+    the user prompt templates that mode sends.
+
+    Args:
+        system_prompt: System prompt for the model
+        mode: PER_POST or BATCH
+    """
+    material = "\0".join((mode, system_prompt, json.dumps(RESPONSE_TOOL, sort_keys=True),
+                          *GENERATION_PROMPTS[mode]))
+    return hashlib.sha256(material.encode()).hexdigest()[:16]
+
+
+def post_key(post: PostRecord) -> str:
+    """Return the ID used to match a generated response to its post"""
+    return post.get('id') or normalize_post_url(post['url'])
+
+
+def index_posts(posts: Sequence[PostRecord]) -> Dict[str, PostRecord]:
+    """Build the post ID -> post index used for O(1) response matching"""
+    return {post_key(post): post for post in posts}
+
+
+def format_posts_for_prompt(posts: Sequence[PostRecord], post_details: Optional[Dict[str, PostRecord]] = None,
+                            max_selftext: int = 300, max_comments: int = 3, max_comment_chars: int = 200) -> str:
+    """
+    Describe posts for the model, each labelled with the ID its response must use
+
+    Args:
+        posts: Posts to respond to
+        post_details: Optional normalized URL -> post details with top_comments
+        max_selftext: Characters of selftext to include
+        max_comments: Number of top comments to include
+        max_comment_chars: Characters of each comment to include
+
+    Returns:
+        Prompt text listing the posts
+    """
+    post_details = post_details or {}
+    text = "Here are the Reddit posts to respond to:\n\n"
+    for post in posts:
+        text += f"ID: {post_key(post)}\n"
+        text += f"Title: {post['title']}\n"
+        text += f"Subreddit: r/{post['subreddit']}\n"
+
+        # Include post content if it's a text post
+        if post.get('is_self', False) and post.get('selftext', ''):
+            selftext = post['selftext']
+            if len(selftext) > max_selftext:
+                selftext = selftext[:max_selftext] + "..."
+            text += f"Content: {selftext}\n"
+
+        # Include the top comments so responses fit the discussion
+        details = post_details.get(normalize_post_url(post['url']))
+        if details and details.get('top_comments'):
+            text += "Top Comments:\n"
+            for comment in details['top_comments'][:max_comments]:
+                body = comment['body']
+                if len(body) > max_comment_chars:
+                    body = body[:max_comment_chars] + "..."
+                text += f"- u/{comment['author']} ({comment['score']} points): {body}\n"
+
+        text += f"URL: {post['url']}\n\n"
+    return text
+
+
+def extract_payload(content: Sequence[Any]) -> Any:
+    """
+    Return the structured payload of a model response
+
+    Uses the input of a submit_responses tool call if there is one, and
+    otherwise the first JSON document found in the text blocks.
+
+    Args:
+        content: `content` blocks of an Anthropic message
+
+    Raises:
+        ValueError: No JSON payload could be found
+    """
+    text = ""
+    for block in content:
+        if getattr(block, "type", None) == "tool_use" and block.name == RESPONSE_TOOL["name"]:
+            return block.input
+        if hasattr(block, "text"):
+            text += block.text
+
+    fenced = _JSON_FENCE.search(text)
+    if fenced:
+        text = fenced.group(1)
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        raise ValueError("Response contains no JSON")
+    payload, _ = json.JSONDecoder().raw_decode(text[min(starts):])
+    return payload
+
+
+def parse_responses(payload: Any, posts_by_id: Dict[str, PostRecord]) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+    """
+    Validate generated responses and match them to posts by ID
+
+    Entries with an unknown or repeated post ID, an empty response or an
+    invalid engagement level are rejected rather than guessed at, so a
+    response is never attributed to the wrong post.
+
+    Args:
+        payload: {"responses": [...]} or a bare list of response objects
+        posts_by_id: Index from index_posts()
+
+    Returns:
+        (responses, problems): responses keyed by post ID, each holding
+        'post', 'suggested_response', 'engagement_potential' and
+        'rationale'; problems lists every rejected entry and every post
+        left without a response
+    """
+    entries = payload.get("responses") if isinstance(payload, dict) else payload
+    if not isinstance(entries, list):
+        raise ValueError("Expected a list of responses")
+
+    levels = {level.lower(): level for level in ENGAGEMENT_LEVELS}
+    responses: Dict[str, Dict[str, Any]] = {}
+    problems: List[str] = []
+    for number, entry in enumerate(entries, 1):
+        if not isinstance(entry, dict):
+            problems.append(f"Entry {number} is not an object")
+            continue
+        post_id = str(entry.get("post_id", "")).strip()
+        post = posts_by_id.get(post_id)
+        if post is None:
+            problems.append(f"Entry {number} has unknown post ID {post_id!r}")
+            continue
+        if post_id in responses:
+            problems.append(f"Entry {number} repeats post ID {post_id!r}")
+            continue
+        suggested = entry.get("suggested_response")
+        if not isinstance(suggested, str) or not suggested.strip():
+            problems.append(f"Entry {number} ({post_id}) has no suggested response")
+            continue
+        level = levels.get(str(entry.get("engagement_potential", "")).strip().lower())
+        if level is None:
+            problems.append(f"Entry {number} ({post_id}) has invalid engagement potential "
+                            f"{entry.get('engagement_potential')!r}")
+            continue
+        responses[post_id] = {
+            'post': post,
+            'suggested_response': suggested.strip(),
+            'engagement_potential': level,
+            'rationale': str(entry.get("rationale", "")).strip(),
+        }
+
+    for post_id, post in posts_by_id.items():
+        if post_id not in responses:
+            problems.append(f"No response for post {post_id} ({post['title']})")
+    return responses, problems
+
+
+def format_analysis(responses: Dict[str, Dict[str, Any]]) -> str:
+    """Render the rationale of every response as a markdown list"""
+    return "\n".join(f"- **{data['post']['title']}** ({data['engagement_potential']}): {data['rationale']}"
+                     for data in responses.values() if data['rationale'])
+
+
+def format_email_html(responses: Dict[str, Dict[str, Any]], include_analysis: bool = True) -> str:
+    """
+    Render responses as an HTML email, ready to send without a model formatting it
+
+    Args:
+        responses: Responses keyed by post ID (see parse_responses)
+        include_analysis: Append each response's rationale
+
+    Returns:
+        HTML body with one table row per post
+    """
+    cell = "padding: 8px; border: 1px solid #ddd; vertical-align: top;"
+    rows = []
+    for data in responses.values():
+        post = data['post']
+        rows.append(
+            f"<tr><td style='{cell}'><a href='{html.escape(post['url'], quote=True)}'>{html.escape(post['title'])}</a>"
+            f"<br><small>r/{html.escape(post['subreddit'])}</small></td>"
+            f"<td style='{cell}'>{html.escape(data['suggested_response'])}</td>"
+            f"<td style='{cell}'>{html.escape(data['engagement_potential'])}</td></tr>"
+        )
+    body = ("<h1>Reddit Engagement Opportunities</h1>"
+            "<p>Here are your engagement opportunities for maximum karma:</p>"
+            "<table style='border-collapse: collapse; width: 100%;'>"
+            f"<tr><th style='{cell}'>Post</th><th style='{cell}'>Suggested Response</th>"
+            f"<th style='{cell}'>Engagement Potential</th></tr>"
+            + "".join(rows) + "</table>")
+    if include_analysis:
+        items = [f"<li><b>{html.escape(data['post']['title'])}</b> ({html.escape(data['engagement_potential'])}): "
+                 f"{html.escape(data['rationale'])}</li>" for data in responses.values() if data['rationale']]
+        if items:
+            body += "<h2>Full Analysis</h2><ul>" + "".join(items) + "</ul>"
+    return body
+
+
+def generate_response(anthropic_client: Any, post: PostRecord, system_prompt: str,
+                      post_details: Optional[Dict[str, PostRecord]] = None,
+                      model: str = "claude-3-7-sonnet-20250219", max_tokens: int = 512,
+                      timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Generate and validate the response for a single post with one request
+
+    Args:
+        anthropic_client: Anthropic client
+        post: Post to respond to
+        system_prompt: System prompt for the model
+        post_details: Optional normalized URL -> post details with top_comments
+        model: Model name
+        max_tokens: Output token limit of the request
+        timeout: Request timeout in seconds
+
+    Returns:
+        The validated response (see parse_responses)
+
+    Raises:
+        ValueError: The model returned no valid response for the post
+    """
+    user_message = POST_PROMPT.format(tool=RESPONSE_TOOL['name'], posts=format_posts_for_prompt([post], post_details))
+    kwargs = {"timeout": timeout} if timeout is not None else {}
+    response = anthropic_client.messages.create(
+        model=model,
+        max_tokens=max_tokens,
+        system=system_prompt,
+        tools=[RESPONSE_TOOL],
+        tool_choice={"type": "tool", "name": RESPONSE_TOOL['name']},
+        messages=[{"role": "user", "content": user_message}],
+        **kwargs
+    )
+    post_id = post_key(post)
+    responses, problems = parse_responses(extract_payload(response.content), {post_id: post})
+    if post_id not in responses:
+        raise ValueError("; ".join(problems))
+    return responses[post_id]
+
+
+def iter_generated_responses(anthropic_client: Any, posts: Sequence[PostRecord], system_prompt: str,
+                             post_details: Optional[Dict[str, PostRecord]] = None, max_workers: int = 4,
+                             timeout: Optional[float] = 60, **kwargs) -> Iterator[GenerationResult]:
+    """
+    Generate responses with one small request per post, concurrently
+
+    A slow or failing post only affects its own result. Results are
+    yielded as soon as each request finishes, so callers can show them
+    progressively.
+
+    Args:
+        anthropic_client: Anthropic client (safe to share between threads)
+        posts: Posts to respond to; duplicates by ID are generated once
+        system_prompt: System prompt for the model
+        post_details: Optional normalized URL -> post details with top_comments
+        max_workers: Maximum number of requests in flight at once
+        timeout: Per-request timeout in seconds
+        **kwargs: Passed to generate_response (model, max_tokens)
+
+    Yields:
+        One GenerationResult per unique post, in completion order
+    """
+    unique_posts = index_posts(posts)
+    if not unique_posts:
+        return
+
+    def generate(post_id: str, post: PostRecord) -> GenerationResult:
+        start = time.perf_counter()
+        try:
+            response = generate_response(anthropic_client, post, system_prompt, post_details,
+                                         timeout=timeout, **kwargs)
+            return GenerationResult(post_id, post, response, elapsed=time.perf_counter() - start)
+        except Exception as e:
+            return GenerationResult(post_id, post, None, error=str(e), elapsed=time.perf_counter() - start)
+
+    workers = max(1, min(max_workers, len(unique_posts)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="generate") as executor:
+        futures = [executor.submit(generate, post_id, post) for post_id, post in unique_posts.items()]
+        for future in as_completed(futures):
+            yield future.result()
@@ -0,0 +1,153 @@
+"""
+Fake Reddit API for tests and benchmarks
+
+FakeRedditServer serves Reddit-shaped listings and post details on a
+local port, so the client can be exercised without network access or
+API quota.
+"""
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+# Fixed creation time of the newest fake post, so repeated fetches return identical posts
+EPOCH = time.time()
+
+
+def make_listing(subreddit: str, count: int, offset: int = 0, total: Optional[int] = None) -> Dict[str, Any]:
+    """Build a Reddit-shaped listing payload with `count` fake posts starting at `offset`"""
+    children = []
+    end = offset + count if total is None else min(offset + count, total)
+    for i in range(offset, end):
+        children.append({
+            "kind": "t3",
+            "data": {
+                "id": f"{subreddit.lower()}{i}",
+                "name": f"t3_{subreddit.lower()}{i}",
+                "title": f"Post {i} in r/{subreddit}",
+                "permalink": f"/r/{subreddit}/comments/{subreddit.lower()}{i}/post_{i}/",
+                "subreddit": subreddit,
+                "author": f"user{i}",
+                "score": 100 - i,
+                "num_comments": i * 3,
+                "created_utc": EPOCH - i * 60,
+                "selftext": "Lorem ipsum dolor sit amet " * 10,
+                "is_self": True,
+            },
+        })
+    after = f"t3_{subreddit.lower()}{end - 1}" if total is not None and children and end < total else None
+    return {"kind": "Listing", "data": {"after": after, "children": children}}
+
+
+def make_post_details(subreddit: str, post_id: str, comments: int = 10) -> List[Dict[str, Any]]:
+    """Build a Reddit-shaped post details payload (post listing + comment listing)"""
+    post = make_listing(subreddit, 1)
+    post["data"]["children"][0]["data"]["id"] = post_id
+    children = [{
+        "kind": "t1",
+        "data": {"id": f"{post_id}c{i}", "parent_id": f"t3_{post_id}", "depth": 0,
+                 "author": f"commenter{i}", "body": f"Comment {i}", "score": 10 - i, "replies": ""},
+    } for i in range(comments)]
+    return [post, {"kind": "Listing", "data": {"after": None, "children": children}}]
+
+
+class FakeRedditServer:
+    """
+    Minimal HTTP/1.1 server that answers listing requests like Reddit
+
+    Counts every TCP connection it accepts, which is what the connection
+    benchmark compares. Setting `throttle` answers that many of the next
+    requests with 429 and a Retry-After of `retry_after` seconds.
+    """
+
+    def __init__(self, latency: float = 0.0, total_posts: int = 1000, throttle: int = 0,
+                 retry_after: float = 1.0):
+        server = self
+        self.latency = latency
+        self.total_posts = total_posts
+        self.throttle = throttle
+        self.retry_after = retry_after
+        self.connections = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                # Headers and body are written separately; avoid Nagle stalls on keep-alive
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                with server._lock:
+                    server.connections += 1
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                    throttled = server.throttle > 0
+                    if throttled:
+                        server.throttle -= 1
+                if server.latency:
+                    time.sleep(server.latency)
+                if throttled:
+                    body = b'{"message": "Too Many Requests", "error": 429}'
+                    self.send_response(429)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Retry-After", f"{server.retry_after:g}")
+                    self.send_header("X-Ratelimit-Remaining", "0")
+                    self.send_header("X-Ratelimit-Reset", f"{server.retry_after:g}")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                parsed = urlparse(self.path)
+                query = parse_qs(parsed.query)
+                subreddit = parsed.path.split("/")[2] if parsed.path.startswith("/r/") else "all"
+                limit = min(int(query.get("limit", ["25"])[0]), 100)
+                after = query.get("after", [""])[0]
+                offset = int(after[len(f"t3_{subreddit.lower()}"):]) + 1 if after else 0
+                etag = f'"{abs(hash(self.path))}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                if "/comments/" in parsed.path:
+                    payload = make_post_details(subreddit, parsed.path.split("/")[4])
+                else:
+                    payload = make_listing(subreddit, limit, offset, server.total_posts)
+                body = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        class Server(ThreadingHTTPServer):
+            daemon_threads = True
+            request_queue_size = 128
+
+        self.httpd = Server(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self) -> "FakeRedditServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.connections = 0
+            self.requests = 0
@@ -0,0 +1,150 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from reddit import PostRecord
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS generated_responses (
+    post_id TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+def content_hash(post: PostRecord) -> str:
+    """Hash the parts of a post a generated response depends on"""
+    content = "\0".join((post['subreddit'], post['title'], post.get('selftext', '') or ""))
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+class GeneratedResponseCache:
+    """
+    Persistent cache of generated responses, shared by every app session
+
+    Entries are addressed by post ID, a hash of the post's title and
+    selftext, and the prompt version. A lookup misses, and drops the
+    stale entry, when the post was edited, the prompt changed or the
+    entry is older than the TTL, so a cached response always matches
+    what the model would have been asked.
+    """
+
+    def __init__(self, path: str = "reddit_posts.db", ttl: float = 7 * 24 * 3600,
+                 clock: Callable[[], float] = time.time):
+        """
+        Open (or create) the cache
+
+        Args:
+            path: SQLite database file (may be shared with PostStore), or
+                ":memory:" for a temporary cache
+            ttl: Seconds a generated response stays valid
+            clock: Wall clock returning UNIX seconds (injectable for testing)
+        """
+        self.path = path
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+    def get(self, post_id: str, post: PostRecord, prompt_version: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up the cached response for a post
+
+        Args:
+            post_id: ID the response is keyed by
+            post: The post as it is now, used to detect edits
+            prompt_version: Version of the prompt the response must come from
+
+        Returns:
+            The stored response fields, or None on a miss
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT content_hash, prompt_version, response, created_at FROM generated_responses WHERE post_id = ?",
+                (post_id,),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            stored_hash, stored_version, response, created_at = row
+            if (stored_hash != content_hash(post) or stored_version != prompt_version
+                    or self.clock() - created_at >= self.ttl):
+                self._conn.execute("DELETE FROM generated_responses WHERE post_id = ?", (post_id,))
+                self.misses += 1
+                self.invalidations += 1
+                return None
+            self.hits += 1
+        return json.loads(response)
+
+    def put(self, post_id: str, post: PostRecord, prompt_version: str, response: Dict[str, Any]) -> None:
+        """
+        Store a generated response
+
+        Args:
+            post_id: ID the response is keyed by
+            post: The post the response was generated for
+            prompt_version: Version of the prompt used
+            response: JSON-serializable response fields (without the post)
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO generated_responses (post_id, content_hash, prompt_version, response, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (post_id, content_hash(post), prompt_version, json.dumps(response), self.clock()),
+            )
+
+    def get_many(self, posts_by_id: Dict[str, PostRecord], prompt_version: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Look up cached responses for several posts
+
+        Args:
+            posts_by_id: Post ID -> post
+            prompt_version: Version of the prompt the responses must come from
+
+        Returns:
+            Responses of the cached posts, keyed by post ID, each with its
+            'post' attached and 'cached' set to True
+        """
+        responses = {}
+        for post_id, post in posts_by_id.items():
+            fields = self.get(post_id, post, prompt_version)
+            if fields is not None:
+                responses[post_id] = {**fields, 'post': post, 'cached': True}
+        return responses
+
+    def put_many(self, responses: Dict[str, Dict[str, Any]], prompt_version: str) -> None:
+        """Store responses keyed by post ID, each holding its 'post'"""
+        for post_id, data in responses.items():
+            if not data.get('cached'):
+                fields = {key: value for key, value in data.items() if key not in ('post', 'cached')}
+                self.put(post_id, data['post'], prompt_version, fields)
+
+    def purge_expired(self) -> int:
+        """Delete expired entries and return how many were removed"""
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM generated_responses WHERE created_at <= ?",
+                                      (self.clock() - self.ttl,)).rowcount
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit, miss and invalidation counters and the number of entries"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM generated_responses").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "invalidations": self.invalidations, "entries": entries}
@@ -0,0 +1,205 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATES = frozenset({DONE, FAILED, CANCELLED})
+
+
+class Job:
+    """
+    One unit of background work and everything a page needs to show it
+
+    The job function receives the Job and reports through it: `report()`
+    updates progress and appends partial results, and `cancelled` tells it
+    to stop early. All fields are read through `snapshot()`, which is safe
+    to call from the page while the job runs.
+    """
+
+    def __init__(self, session_id: str, kind: str, clock: Callable[[], float] = time.time):
+        self.session_id = session_id
+        self.kind = kind
+        self.status = PENDING
+        self.progress = 0.0
+        self.message = ""
+        self.partial: List[Any] = []
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created = clock()
+        self.finished: Optional[float] = None
+        self._clock = clock
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        """True once the job was cancelled or superseded; job functions should return early"""
+        return self._cancelled.is_set()
+
+    @property
+    def done(self) -> bool:
+        """True once the job finished, failed or was cancelled"""
+        return self.status in FINISHED_STATES
+
+    def cancel(self) -> None:
+        """Ask the job to stop; its result is discarded"""
+        self._cancelled.set()
+
+    def report(self, progress: Optional[float] = None, message: Optional[str] = None,
+               partial: Any = None) -> None:
+        """
+        Publish progress from the job function
+
+        Args:
+            progress: Fraction complete, 0 to 1
+            message: Short description of the current step
+            partial: A partial result to append (e.g. one generated response)
+        """
+        with self._lock:
+            if progress is not None:
+                self.progress = min(max(progress, 0.0), 1.0)
+            if message is not None:
+                self.message = message
+            if partial is not None:
+                self.partial.append(partial)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a consistent copy of the job's state"""
+        with self._lock:
+            return {"kind": self.kind, "status": self.status, "progress": self.progress, "message": self.message,
+                    "partial": list(self.partial), "result": self.result, "error": self.error,
+                    "elapsed": (self.finished or self._clock()) - self.created}
+
+    def _start(self) -> None:
+        with self._lock:
+            self.status = RUNNING
+
+    def _finish(self, status: str, result: Any = None, error: Optional[str] = None) -> None:
+        with self._lock:
+            self.status = status
+            self.result = result
+            self.error = error
+            if status == DONE:
+                self.progress = 1.0
+            self.finished = self._clock()
+
+    def __repr__(self) -> str:
+        return f"Job({self.session_id}/{self.kind}, {self.status}, progress={self.progress:.0%})"
+
+
+class JobRunner:
+    """
+    Runs long fetch and generation work off the Streamlit script thread
+
+    Jobs are keyed by (session ID, kind), so every browser session has at
+    most one job of each kind. A rerun of the page looks its job up with
+    `get()` and renders the progress and partial results so far instead of
+    starting the work again; submitting a new job of the same kind cancels
+    the old one. Finished jobs stay available until `pop()` or until they
+    are older than `retention`.
+
+    Job functions run in worker threads and must not call Streamlit.
+    """
+
+    def __init__(self, max_workers: int = 4, retention: float = 3600.0,
+                 clock: Callable[[], float] = time.time):
+        """
+        Initialize the runner
+
+        Args:
+            max_workers: Maximum number of jobs running at once, across sessions
+            retention: Seconds a finished job is kept for its session to collect
+            clock: Wall clock returning UNIX seconds (injectable for testing)
+        """
+        self.retention = retention
+        self.clock = clock
+        self._jobs: Dict[Tuple[str, str], Job] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+
+    def submit(self, session_id: str, kind: str, fn: Callable[..., Any], *args, **kwargs) -> Job:
+        """
+        Start a job, cancelling the session's previous job of the same kind
+
+        Args:
+            session_id: Session the job belongs to
+            kind: Job kind, e.g. "fetch" or "generate"
+            fn: Called as fn(job, *args, **kwargs) in a worker thread; its
+                return value becomes the job's result
+            *args, **kwargs: Passed to fn
+
+        Returns:
+            The new Job
+        """
+        job = Job(session_id, kind, clock=self.clock)
+        with self._lock:
+            self._prune()
+            previous = self._jobs.get((session_id, kind))
+            if previous is not None:
+                previous.cancel()
+            self._jobs[session_id, kind] = job
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job: Job, fn: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> None:
+        if job.cancelled:
+            job._finish(CANCELLED)
+            return
+        job._start()
+        try:
+            result = fn(job, *args, **kwargs)
+        except Exception as e:
+            print(f"Error in {job.kind} job: {str(e)}")
+            job._finish(FAILED, error=str(e))
+            return
+        job._finish(CANCELLED if job.cancelled else DONE, result)
+
+    def get(self, session_id: str, kind: str) -> Optional[Job]:
+        """Return the session's current job of a kind, or None"""
+        with self._lock:
+            return self._jobs.get((session_id, kind))
+
+    def pop(self, session_id: str, kind: str) -> Optional[Job]:
+        """Remove and return the session's job of a kind once it is done (None while it runs)"""
+        with self._lock:
+            job = self._jobs.get((session_id, kind))
+            if job is None or not job.done:
+                return None
+            return self._jobs.pop((session_id, kind))
+
+    def cancel(self, session_id: str, kind: str) -> None:
+        """Cancel and forget the session's job of a kind"""
+        with self._lock:
+            job = self._jobs.pop((session_id, kind), None)
+        if job is not None:
+            job.cancel()
+
+    def _prune(self) -> None:
+        # Drop finished jobs nobody collected, e.g. from closed browser tabs
+        cutoff = self.clock() - self.retention
+        for key, job in list(self._jobs.items()):
+            if job.done and job.finished is not None and job.finished < cutoff:
+                del self._jobs[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of tracked jobs by status"""
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Cancel every job and stop the worker threads"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+            self._jobs.clear()
+        for job in jobs:
+            job.cancel()
+        self._executor.shutdown(wait=wait)
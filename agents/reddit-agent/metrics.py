@@ -0,0 +1,184 @@
+import json
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Any, Dict, List, Sequence, TextIO, Tuple
+
+# Upper bounds of the request latency histogram buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class ClientMetrics:
+    """
+    Request instrumentation for RedditClient
+
+    Records, per endpoint type (hot, new, top, search, details): a latency
+    histogram of every HTTP attempt, status code counters, bytes received,
+    cache hits/misses/revalidations and classified errors (per caller,
+    including callers that shared a coalesced request), plus the total
+    time spent waiting for the rate limiter. Export with to_prometheus()
+    or to_json_lines().
+
+    Instrumentation is opt-in: a client without a ClientMetrics skips it
+    entirely, so disabled metrics cost a single `is None` check per request.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS, prefix: str = "reddit"):
+        """
+        Initialize empty metrics
+
+        Args:
+            buckets: Latency histogram bucket upper bounds in seconds
+            prefix: Prefix of the exported metric names
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.prefix = prefix
+        self._latency: Dict[str, _Histogram] = {}
+        self._statuses: Dict[Tuple[str, str], int] = defaultdict(int)
+        self._bytes: Dict[str, int] = defaultdict(int)
+        self._cache: Dict[Tuple[str, str], int] = defaultdict(int)
+        self._errors: Dict[Tuple[str, str], int] = defaultdict(int)
+        self._rate_limit_wait = 0.0
+        self._lock = threading.Lock()
+
+    def observe_request(self, endpoint: str, status: str, elapsed: float, size: int = 0) -> None:
+        """
+        Record one HTTP attempt
+
+        Args:
+            endpoint: Endpoint type
+            status: Status code, or "network" if no response was received
+            elapsed: Seconds from sending the request to receiving the body
+            size: Response body size in bytes
+        """
+        with self._lock:
+            histogram = self._latency.get(endpoint)
+            if histogram is None:
+                histogram = self._latency[endpoint] = _Histogram(len(self.buckets) + 1)
+            histogram.counts[bisect_left(self.buckets, elapsed)] += 1
+            histogram.sum += elapsed
+            histogram.count += 1
+            self._statuses[endpoint, status] += 1
+            self._bytes[endpoint] += size
+
+    def observe_cache(self, endpoint: str, result: str) -> None:
+        """
+        Record a cache outcome
+
+        Args:
+            endpoint: Endpoint type
+            result: "hit", "miss", "stale" (expired entry found), "revalidated"
+                (304) or "coalesced" (served by another client's request)
+        """
+        with self._lock:
+            self._cache[endpoint, result] += 1
+
+    def observe_error(self, endpoint: str, kind: str) -> None:
+        """Record a failed request by RedditError kind"""
+        with self._lock:
+            self._errors[endpoint, kind] += 1
+
+    def observe_rate_limit_wait(self, seconds: float) -> None:
+        """Record time spent waiting for the rate limiter"""
+        if seconds:
+            with self._lock:
+                self._rate_limit_wait += seconds
+
+    def reset(self) -> None:
+        """Clear every metric"""
+        with self._lock:
+            self._latency.clear()
+            self._statuses.clear()
+            self._bytes.clear()
+            self._cache.clear()
+            self._errors.clear()
+            self._rate_limit_wait = 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a consistent copy of every metric as plain data"""
+        with self._lock:
+            return {
+                "latency": {endpoint: {"counts": list(h.counts), "sum": h.sum, "count": h.count}
+                            for endpoint, h in self._latency.items()},
+                "statuses": dict(self._statuses),
+                "bytes": dict(self._bytes),
+                "cache": dict(self._cache),
+                "errors": dict(self._errors),
+                "rate_limit_wait": self._rate_limit_wait,
+            }
+
+    def to_prometheus(self) -> str:
+        """Render the metrics in the Prometheus text exposition format"""
+        data = self.snapshot()
+        name = self.prefix
+        lines = [
+            f"# HELP {name}_request_duration_seconds Latency of Reddit HTTP requests",
+            f"# TYPE {name}_request_duration_seconds histogram",
+        ]
+        for endpoint, histogram in sorted(data["latency"].items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, histogram["counts"]):
+                cumulative += count
+                lines.append(f'{name}_request_duration_seconds_bucket{{endpoint="{endpoint}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_request_duration_seconds_bucket{{endpoint="{endpoint}",le="+Inf"}} {histogram["count"]}')
+            lines.append(f'{name}_request_duration_seconds_sum{{endpoint="{endpoint}"}} {histogram["sum"]}')
+            lines.append(f'{name}_request_duration_seconds_count{{endpoint="{endpoint}"}} {histogram["count"]}')
+
+        def counter(metric: str, help_text: str, values: Dict[Tuple[str, str], Any], label: str) -> None:
+            lines.append(f"# HELP {name}_{metric} {help_text}")
+            lines.append(f"# TYPE {name}_{metric} counter")
+            for (endpoint, value), count in sorted(values.items()):
+                lines.append(f'{name}_{metric}{{endpoint="{endpoint}",{label}="{value}"}} {count}')
+
+        counter("requests_total", "Reddit HTTP responses by status code", data["statuses"], "status")
+        counter("cache_lookups_total", "Response cache lookups by outcome", data["cache"], "result")
+        counter("errors_total", "Failed Reddit requests by error kind", data["errors"], "kind")
+
+        lines.append(f"# HELP {name}_response_bytes_total Bytes received from Reddit")
+        lines.append(f"# TYPE {name}_response_bytes_total counter")
+        for endpoint, size in sorted(data["bytes"].items()):
+            lines.append(f'{name}_response_bytes_total{{endpoint="{endpoint}"}} {size}')
+
+        lines.append(f"# HELP {name}_rate_limit_wait_seconds_total Time spent waiting for the rate limiter")
+        lines.append(f"# TYPE {name}_rate_limit_wait_seconds_total counter")
+        lines.append(f"{name}_rate_limit_wait_seconds_total {data['rate_limit_wait']}")
+        return "\n".join(lines) + "\n"
+
+    def to_json_lines(self) -> str:
+        """
+        Render the metrics as JSON lines, one object per series
+
+        Every line carries the same `ts`, so snapshots appended to a file
+        over time can be told apart.
+        """
+        data = self.snapshot()
+        ts = time.time()
+        records: List[Dict[str, Any]] = []
+        for endpoint, histogram in sorted(data["latency"].items()):
+            records.append({"ts": ts, "metric": "request_duration_seconds", "endpoint": endpoint,
+                            "buckets": dict(zip([str(b) for b in self.buckets] + ["+Inf"], histogram["counts"])),
+                            "sum": histogram["sum"], "count": histogram["count"]})
+        for metric, label, key in (("requests_total", "status", "statuses"),
+                                   ("cache_lookups_total", "result", "cache"),
+                                   ("errors_total", "kind", "errors")):
+            for (endpoint, value), count in sorted(data[key].items()):
+                records.append({"ts": ts, "metric": metric, "endpoint": endpoint, label: value, "value": count})
+        for endpoint, size in sorted(data["bytes"].items()):
+            records.append({"ts": ts, "metric": "response_bytes_total", "endpoint": endpoint, "value": size})
+        records.append({"ts": ts, "metric": "rate_limit_wait_seconds_total", "value": data["rate_limit_wait"]})
+        return "".join(json.dumps(record) + "\n" for record in records)
+
+    def write_json_lines(self, file: TextIO) -> None:
+        """Append a JSON lines snapshot to an open text file"""
+        file.write(self.to_json_lines())
+        file.flush()
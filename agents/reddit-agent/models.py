@@ -0,0 +1,353 @@
+import sys
+from typing import Any, Dict, Iterator, List, Optional
+
+REDDIT_URL = "https://www.reddit.com"
+
+# Keys of the legacy post dictionary, in Post() argument order ('url' is
+# built from the permalink); parse_post, parse_post_dict and Post.to_dict
+# all follow this list
+POST_KEYS = ("id", "title", "url", "subreddit", "author", "score",
+             "num_comments", "created_utc", "selftext", "is_self", "link_url", "crosspost_parent")
+
+_intern = sys.intern
+
+
+class _Record:
+    """
+    Read-only mapping access for slot-based models
+
+    Lets Post and Comment objects be used where the client used to return
+    plain dictionaries (`post['title']`, `post.get('selftext', '')`,
+    `'top_comments' in post`).
+    """
+
+    __slots__ = ()
+
+    _KEYS: tuple = ()
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._KEYS:
+            raise KeyError(key)
+        value = getattr(self, key)
+        if value is None:
+            # Optional fields that were never loaded behave like missing keys
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: object) -> bool:
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self) -> List[str]:
+        return [key for key in self._KEYS if key in self]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+
+class Comment(_Record):
+    """
+    A Reddit comment
+
+    `replies` is only populated when the comment tree was requested; it is
+    None for the flat top-level comments returned by get_post_details.
+    """
+
+    __slots__ = ("id", "author", "body", "score", "created_utc", "depth", "replies")
+
+    _KEYS = ("id", "author", "body", "score", "created_utc", "depth", "replies")
+
+    def __init__(self, id: str, author: str, body: str, score: int = 0, created_utc: float = 0.0,
+                 depth: int = 0, replies: Optional[List["Comment"]] = None):
+        self.id = id
+        self.author = _intern(author)
+        self.body = body
+        self.score = score
+        self.created_utc = created_utc
+        self.depth = depth
+        self.replies = replies
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the comment in the client's legacy dictionary format"""
+        data = {'author': self.author, 'body': self.body, 'score': self.score}
+        if self.replies is not None:
+            data['replies'] = [reply.to_dict() for reply in self.replies]
+        return data
+
+    def __repr__(self) -> str:
+        return f"Comment(id={self.id!r}, author={self.author!r}, score={self.score})"
+
+
+class Post(_Record):
+    """
+    A Reddit post
+
+    Uses __slots__ and interns the subreddit and author names, so large
+    collections of posts take a fraction of the memory of the equivalent
+    dictionaries. The full URL is derived from the permalink on access.
+
+    `link_url` is the external URL of a link post and `crosspost_parent` the
+    fullname (`t3_...`) of the post a crosspost copies; both are None when
+    they do not apply.
+    """
+
+    __slots__ = ("id", "title", "permalink", "subreddit", "author", "score",
+                 "num_comments", "created_utc", "selftext", "is_self", "link_url", "crosspost_parent",
+                 "top_comments")
+
+    _KEYS = POST_KEYS + ("top_comments",)
+
+    def __init__(self, id: str, title: str, permalink: str, subreddit: str, author: str,
+                 score: int, num_comments: int, created_utc: float, selftext: str = "",
+                 is_self: bool = False, link_url: Optional[str] = None, crosspost_parent: Optional[str] = None,
+                 top_comments: Optional[List[Comment]] = None):
+        self.id = id
+        self.title = title
+        self.permalink = permalink
+        self.subreddit = _intern(subreddit)
+        self.author = _intern(author)
+        self.score = score
+        self.num_comments = num_comments
+        self.created_utc = created_utc
+        self.selftext = selftext
+        self.is_self = is_self
+        self.link_url = link_url
+        self.crosspost_parent = crosspost_parent
+        self.top_comments = top_comments
+
+    @property
+    def url(self) -> str:
+        return REDDIT_URL + self.permalink
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the post in the client's legacy dictionary format"""
+        data = {key: getattr(self, key) for key in POST_KEYS}
+        if self.top_comments is not None:
+            data['top_comments'] = [comment.to_dict() for comment in self.top_comments]
+        return data
+
+    def __repr__(self) -> str:
+        return f"Post(id={self.id!r}, subreddit={self.subreddit!r}, title={self.title!r})"
+
+
+def _post_values(post_data: Dict[str, Any]) -> tuple:
+    # The one place that reads a `t3` thing: values in POST_KEYS order, with the permalink for 'url'
+    return (
+        post_data.get('id', ''),
+        post_data['title'],
+        post_data['permalink'],
+        post_data['subreddit'],
+        post_data['author'],
+        post_data['score'],
+        post_data['num_comments'],
+        post_data['created_utc'],
+        post_data.get('selftext', ''),
+        post_data.get('is_self', False),
+        # Self posts link to themselves; only an external link identifies a shared URL
+        post_data.get('url_overridden_by_dest') or (None if post_data.get('is_self', False) else post_data.get('url')),
+        post_data.get('crosspost_parent'),
+    )
+
+
+def parse_post(post_data: Dict[str, Any]) -> Post:
+    """
+    Build a Post from the `data` object of a Reddit `t3` thing
+
+    Args:
+        post_data: The `data` dictionary of a listing child
+
+    Returns:
+        Parsed Post
+    """
+    return Post(*_post_values(post_data))
+
+
+def parse_post_dict(post_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the legacy post dictionary (the format of Post.to_dict()) from a `t3` thing
+
+    Reads the same fields as parse_post(), without building a Post, for
+    callers that only need dictionaries.
+
+    Args:
+        post_data: The `data` dictionary of a listing child
+
+    Returns:
+        Post dictionary
+    """
+    data = dict(zip(POST_KEYS, _post_values(post_data)))
+    data['url'] = REDDIT_URL + data['url']
+    return data
+
+
+def parse_comment(comment_data: Dict[str, Any]) -> Comment:
+    """
+    Build a Comment from the `data` object of a Reddit `t1` thing
+
+    Args:
+        comment_data: The `data` dictionary of a comment child
+
+    Returns:
+        Parsed Comment
+    """
+    return Comment(
+        comment_data.get('id', ''),
+        comment_data.get('author', '[deleted]'),
+        comment_data['body'],
+        comment_data.get('score', 0),
+        comment_data.get('created_utc', 0.0),
+        comment_data.get('depth', 0),
+    )
+
+
+def parse_listing(data: Dict[str, Any]) -> List[Post]:
+    """
+    Parse every post in a decoded listing response
+
+    Args:
+        data: Decoded JSON of a listing endpoint
+
+    Returns:
+        List of parsed posts
+    """
+    return [parse_post(child['data']) for child in data['data']['children']]
+
+
+def parse_listing_dicts(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Parse every post in a decoded listing response into legacy dictionaries
+
+    Args:
+        data: Decoded JSON of a listing endpoint
+
+    Returns:
+        List of post dictionaries
+    """
+    return [parse_post_dict(child['data']) for child in data['data']['children']]
+
+
+def parse_comments(listing: Dict[str, Any]) -> List[Comment]:
+    """
+    Parse the top-level comments of a decoded comment listing
+
+    Args:
+        listing: Decoded JSON of the comment listing (`data[1]` of a post)
+
+    Returns:
+        List of parsed comments, skipping "more" stubs
+    """
+    return [parse_comment(child['data']) for child in listing['data']['children']
+            if 'body' in child.get('data', {})]
+
+
+class CommentTree:
+    """
+    Incrementally assembled comment tree for one post
+
+    Comments are added from the nested listing of the post endpoint and
+    from the flat `things` list returned by /api/morechildren. "more"
+    stubs that still need expanding are collected in `pending_more`
+    (batchable child IDs) and `pending_threads` ("continue this thread"
+    links, which need their own request per parent).
+    """
+
+    def __init__(self, max_depth: int = 8, max_comments: int = 500):
+        self.max_depth = max_depth
+        self.max_comments = max_comments
+        self.roots: List[Comment] = []
+        self.count = 0
+        self.pending_more: List[str] = []
+        self.pending_threads: List[str] = []
+        self._nodes: Dict[str, Comment] = {}
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.max_comments
+
+    def _attach(self, comment: Comment, parent_id: Optional[str]) -> bool:
+        if self.full or comment.depth > self.max_depth or comment.id in self._nodes:
+            return False
+        parent = self._nodes.get(parent_id[3:]) if parent_id and parent_id.startswith('t1_') else None
+        if parent is not None:
+            parent.replies.append(comment)
+        else:
+            self.roots.append(comment)
+        comment.replies = []
+        self._nodes[comment.id] = comment
+        self.count += 1
+        return True
+
+    def _add_more(self, more_data: Dict[str, Any], depth_offset: int = 0) -> None:
+        if more_data.get('depth', 0) + depth_offset > self.max_depth:
+            return
+        children = more_data.get('children', [])
+        if children:
+            self.pending_more.extend(children)
+        elif more_data.get('parent_id', '').startswith('t1_'):
+            # "Continue this thread": the depth limit of the listing was hit
+            self.pending_threads.append(more_data['parent_id'][3:])
+
+    def add_listing(self, children: List[Dict[str, Any]], parent_id: Optional[str] = None,
+                    depth_offset: int = 0) -> None:
+        """
+        Add the children of a nested comment listing
+
+        Args:
+            children: `data.children` of a comment listing
+            parent_id: Fullname of the parent comment, or None for top level
+            depth_offset: Added to each comment's depth, for listings rooted
+                below the top level of the post
+        """
+        for child in children:
+            kind, data = child.get('kind'), child.get('data', {})
+            if kind == 'more':
+                self._add_more(data, depth_offset)
+            elif kind == 't1' and 'body' in data:
+                comment = parse_comment(data)
+                comment.depth += depth_offset
+                if self._attach(comment, data.get('parent_id', parent_id)):
+                    replies = data.get('replies')
+                    if replies:
+                        self.add_listing(replies['data']['children'], f"t1_{comment.id}", depth_offset)
+
+    def add_thread(self, comment_id: str, children: List[Dict[str, Any]]) -> None:
+        """
+        Add the replies from a "continue this thread" listing
+
+        Args:
+            comment_id: ID of the comment the thread was continued from
+            children: `data.children` of the thread listing, rooted at that comment
+        """
+        parent = self._nodes.get(comment_id)
+        if parent is None:
+            return
+        for child in children:
+            data = child.get('data', {})
+            if data.get('id') == comment_id and data.get('replies'):
+                offset = parent.depth - data.get('depth', 0)
+                self.add_listing(data['replies']['data']['children'], f"t1_{comment_id}", offset)
+
+    def add_things(self, things: List[Dict[str, Any]]) -> None:
+        """
+        Add the flat list of comments returned by /api/morechildren
+
+        Args:
+            things: `json.data.things` of a morechildren response
+        """
+        # Parents are normally listed before their children; sort by depth
+        # so that out-of-order batches still attach to the right parent
+        for child in sorted(things, key=lambda thing: thing.get('data', {}).get('depth', 0)):
+            self.add_listing([child])
+
+    def find(self, comment_id: str) -> Optional[Comment]:
+        """Return an already added comment by ID"""
+        return self._nodes.get(comment_id)
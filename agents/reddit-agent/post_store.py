@@ -0,0 +1,194 @@
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from models import Post
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    id TEXT PRIMARY KEY,
+    subreddit TEXT NOT NULL,
+    title TEXT NOT NULL,
+    permalink TEXT NOT NULL,
+    author TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    num_comments INTEGER NOT NULL,
+    created_utc REAL NOT NULL,
+    selftext TEXT NOT NULL,
+    is_self INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    link_url TEXT,
+    crosspost_parent TEXT
+);
+CREATE INDEX IF NOT EXISTS posts_subreddit_created ON posts (subreddit COLLATE NOCASE, created_utc DESC);
+CREATE TABLE IF NOT EXISTS sync_state (
+    subreddit TEXT PRIMARY KEY COLLATE NOCASE,
+    newest_created_utc REAL NOT NULL DEFAULT 0,
+    refreshed_at REAL NOT NULL DEFAULT 0
+);
+"""
+
+UPSERT = """
+INSERT INTO posts (id, subreddit, title, permalink, author, score, num_comments,
+                   created_utc, selftext, is_self, fetched_at, link_url, crosspost_parent)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    title = excluded.title,
+    score = excluded.score,
+    num_comments = excluded.num_comments,
+    selftext = excluded.selftext,
+    fetched_at = excluded.fetched_at
+"""
+
+COLUMNS = ("id, title, permalink, subreddit, author, score, num_comments, created_utc, selftext, is_self, "
+           "link_url, crosspost_parent")
+
+# Columns added after the first release, created on databases that predate them
+ADDED_COLUMNS = (("link_url", "TEXT"), ("crosspost_parent", "TEXT"))
+
+
+class PostStore:
+    """
+    Local SQLite store of fetched Reddit posts
+
+    Runs in WAL mode so readers never block the writer, and writes posts
+    in batched upserts. Tracks the newest `created_utc` seen and the last
+    score refresh per subreddit, which lets RedditClient sync a `new`
+    listing incrementally instead of downloading it again.
+    """
+
+    def __init__(self, path: str = "reddit_posts.db"):
+        """
+        Open (or create) the store
+
+        Args:
+            path: SQLite database file, or ":memory:" for a temporary store
+        """
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+            existing = {row[1] for row in self._conn.execute("PRAGMA table_info(posts)")}
+            for name, kind in ADDED_COLUMNS:
+                if name not in existing:
+                    self._conn.execute(f"ALTER TABLE posts ADD COLUMN {name} {kind}")
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+    def upsert_posts(self, posts: Iterable[Post]) -> int:
+        """
+        Insert new posts and update scores and comment counts of known ones
+
+        Args:
+            posts: Posts to store
+
+        Returns:
+            Number of rows written
+        """
+        now = time.time()
+        rows = [(post.id, post.subreddit, post.title, post.permalink, post.author, post.score,
+                 post.num_comments, post.created_utc, post.selftext, int(post.is_self), now,
+                 post.link_url, post.crosspost_parent)
+                for post in posts]
+        if not rows:
+            return 0
+        with self._lock, self._conn:
+            self._conn.executemany(UPSERT, rows)
+        return len(rows)
+
+    def update_counts(self, counts: Iterable[Tuple[str, int, int]]) -> None:
+        """
+        Update score and comment count of stored posts in one batch
+
+        Args:
+            counts: (post_id, score, num_comments) tuples
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE posts SET score = ?, num_comments = ?, fetched_at = ? WHERE id = ?",
+                [(score, num_comments, now, post_id) for post_id, score, num_comments in counts],
+            )
+
+    def get_sync_state(self, subreddit: str) -> Tuple[float, float]:
+        """
+        Return (newest created_utc seen, last score refresh time) for a subreddit
+
+        Both are 0 if the subreddit has never been synced.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT newest_created_utc, refreshed_at FROM sync_state WHERE subreddit = ?", (subreddit,)
+            ).fetchone()
+        return row if row else (0.0, 0.0)
+
+    def set_sync_state(self, subreddit: str, newest_created_utc: Optional[float] = None,
+                       refreshed_at: Optional[float] = None) -> None:
+        """Record sync progress for a subreddit; None leaves a value unchanged"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO sync_state (subreddit, newest_created_utc, refreshed_at)
+                VALUES (:subreddit, COALESCE(:newest, 0), COALESCE(:refreshed, 0))
+                ON CONFLICT (subreddit) DO UPDATE SET
+                    newest_created_utc = MAX(newest_created_utc, COALESCE(:newest, 0)),
+                    refreshed_at = COALESCE(:refreshed, refreshed_at)
+                """,
+                {"subreddit": subreddit, "newest": newest_created_utc, "refreshed": refreshed_at},
+            )
+
+    def count(self, subreddit: str) -> int:
+        """Return the number of stored posts in a subreddit"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM posts WHERE subreddit = ? COLLATE NOCASE", (subreddit,)
+            ).fetchone()[0]
+
+    def recent_ids(self, subreddit: str, since: float) -> List[str]:
+        """Return IDs of stored posts in a subreddit created after `since`"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM posts WHERE subreddit = ? COLLATE NOCASE AND created_utc >= ?",
+                (subreddit, since),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def get_posts(self, subreddit: str, limit: int = 25) -> List[Post]:
+        """
+        Return the newest stored posts of a subreddit
+
+        Args:
+            subreddit: Name of the subreddit (without 'r/')
+            limit: Maximum number of posts to return
+
+        Returns:
+            Posts ordered from newest to oldest
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {COLUMNS} FROM posts WHERE subreddit = ? COLLATE NOCASE "
+                "ORDER BY created_utc DESC LIMIT ?",
+                (subreddit, limit),
+            ).fetchall()
+        return [_row_to_post(row) for row in rows]
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of stored posts and synced subreddits"""
+        with self._lock:
+            posts = self._conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+            subreddits = self._conn.execute("SELECT COUNT(*) FROM sync_state").fetchone()[0]
+        return {"posts": posts, "subreddits": subreddits}
+
+
+def _row_to_post(row: tuple) -> Post:
+    (post_id, title, permalink, subreddit, author, score, num_comments, created_utc, selftext, is_self,
+     link_url, crosspost_parent) = row
+    return Post(post_id, title, permalink, subreddit, author, score, num_comments,
+                created_utc, selftext, bool(is_self), link_url, crosspost_parent)
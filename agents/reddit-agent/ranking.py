@@ -0,0 +1,150 @@
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from reddit import PostRecord
+
+# Relative weight of each engagement signal in the combined score
+DEFAULT_WEIGHTS = {
+    "velocity": 1.0,        # score gained per hour since posting
+    "comment_rate": 1.0,    # comments per hour since posting
+    "discussion": 0.5,      # comments per upvote: active threads with room to be seen
+    "recency": 1.0,         # exponential decay with post age
+}
+
+
+class PostColumns:
+    """
+    Columnar view of a list of posts, for vectorized ranking
+
+    Attributes:
+        posts: The posts, in the same order as the arrays
+        score: Post scores
+        num_comments: Comment counts
+        created_utc: Creation times (UNIX seconds)
+    """
+
+    __slots__ = ("posts", "score", "num_comments", "created_utc")
+
+    def __init__(self, posts: List[PostRecord], score: np.ndarray, num_comments: np.ndarray,
+                 created_utc: np.ndarray):
+        self.posts = posts
+        self.score = score
+        self.num_comments = num_comments
+        self.created_utc = created_utc
+
+    @classmethod
+    def from_posts(cls, posts: Sequence[PostRecord]) -> "PostColumns":
+        """
+        Build the columns from RedditClient output (dictionaries or Post objects)
+
+        Args:
+            posts: Posts to rank
+
+        Returns:
+            PostColumns over `posts`
+        """
+        posts = list(posts)
+        count = len(posts)
+        return cls(
+            posts,
+            np.fromiter((post['score'] for post in posts), dtype=np.float64, count=count),
+            np.fromiter((post['num_comments'] for post in posts), dtype=np.float64, count=count),
+            np.fromiter((post['created_utc'] for post in posts), dtype=np.float64, count=count),
+        )
+
+    def __len__(self) -> int:
+        return len(self.posts)
+
+
+class EngagementRanker:
+    """
+    Ranks posts by engagement opportunity
+
+    Every signal is computed for all posts at once with NumPy, squashed
+    with log1p so a single viral post does not dominate, scaled to [0, 1]
+    and combined with configurable weights. top_k() selects the best
+    posts with argpartition, sorting only the k winners.
+    """
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None, half_life_hours: float = 6.0,
+                 min_age_hours: float = 0.25, clock: Callable[[], float] = time.time):
+        """
+        Initialize the ranker
+
+        Args:
+            weights: Signal weights, merged over DEFAULT_WEIGHTS
+            half_life_hours: Age at which the recency signal halves
+            min_age_hours: Floor on post age, so brand-new posts don't get
+                huge per-hour rates from a handful of votes
+            clock: Wall clock returning UNIX seconds (injectable for testing)
+        """
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        unknown = set(self.weights) - set(DEFAULT_WEIGHTS)
+        if unknown:
+            raise ValueError(f"Unknown ranking weights: {', '.join(sorted(unknown))}")
+        self.half_life_hours = half_life_hours
+        self.min_age_hours = min_age_hours
+        self.clock = clock
+
+    def scores(self, columns: PostColumns, now: Optional[float] = None) -> np.ndarray:
+        """
+        Compute the engagement score of every post
+
+        Args:
+            columns: Posts to score
+            now: Reference UNIX time (defaults to the clock)
+
+        Returns:
+            Array of scores aligned with `columns.posts`; higher is better
+        """
+        now = self.clock() if now is None else now
+        age_hours = np.maximum((now - columns.created_utc) / 3600.0, self.min_age_hours)
+        score = np.maximum(columns.score, 0.0)
+
+        signals = {
+            "velocity": np.log1p(score / age_hours),
+            "comment_rate": np.log1p(columns.num_comments / age_hours),
+            "discussion": np.log1p(columns.num_comments / (score + 1.0)),
+            "recency": np.exp2(-age_hours / self.half_life_hours),
+        }
+
+        total = np.zeros(len(columns))
+        for name, values in signals.items():
+            weight = self.weights[name]
+            if not weight or not len(values):
+                continue
+            peak = values.max()
+            if peak > 0:
+                total += values * (weight / peak)
+        return total
+
+    def top_k(self, posts: Union[PostColumns, Sequence[PostRecord]], k: int = 25,
+              now: Optional[float] = None) -> List[PostRecord]:
+        """
+        Return the k most promising posts, best first
+
+        Args:
+            posts: Posts to rank, or PostColumns built from them
+            k: Number of posts to return
+            now: Reference UNIX time (defaults to the clock)
+
+        Returns:
+            Up to k posts ordered by descending engagement score
+        """
+        columns = posts if isinstance(posts, PostColumns) else PostColumns.from_posts(posts)
+        return [columns.posts[i] for i in self.top_k_indices(columns, k, now)]
+
+    def top_k_indices(self, columns: PostColumns, k: int = 25, now: Optional[float] = None) -> np.ndarray:
+        """Return the indices of the k best posts, best first"""
+        scores = self.scores(columns, now)
+        k = min(k, len(scores))
+        if k <= 0:
+            return np.empty(0, dtype=np.intp)
+        if k < len(scores):
+            # O(n) selection of the k best, then sort only those
+            candidates = np.argpartition(scores, -k)[-k:]
+        else:
+            candidates = np.arange(len(scores))
+        return candidates[np.argsort(-scores[candidates], kind="stable")]
@@ -0,0 +1,134 @@
+import threading
+import time
+from typing import Callable, Mapping, Optional
+
+
+class RateLimiter:
+    """
+    Token-bucket rate limiter that adapts to Reddit's rate limit headers
+
+    Tokens refill continuously at `rate` per second up to `burst`. Every
+    response feeds its X-Ratelimit-Remaining / X-Ratelimit-Reset headers
+    back through `update()`, which re-paces the bucket so the remaining
+    quota is spread evenly over the rest of the window. A 429 with
+    Retry-After (or an exhausted quota) blocks all callers until the
+    server says it is safe again.
+
+    A single instance is shared by every RedditClient in the process (see
+    `shared()`), since Reddit applies the quota per client IP.
+    """
+
+    _shared: Optional["RateLimiter"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, rate: float = 2.0, burst: int = 10,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        """
+        Initialize the rate limiter
+
+        Args:
+            rate: Initial refill rate in requests per second, used until
+                the first rate limit headers arrive
+            burst: Maximum number of requests that may be sent back to back
+            clock: Monotonic clock in seconds (injectable for testing)
+            sleep: Sleep function (injectable for testing)
+        """
+        self.rate = rate
+        self.default_rate = rate
+        self.burst = burst
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.clock = clock
+        self.sleep = sleep
+        self.blocked_until = 0.0
+        self.window_end = 0.0
+        self.total_wait = 0.0
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> "RateLimiter":
+        """Return the process-wide limiter, creating it on first use"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def _refill(self, now: float) -> None:
+        if self.window_end and now >= self.window_end:
+            # The quota window rolled over; pace at the default rate until
+            # the next response reports the new quota
+            self._updated = self.window_end
+            self.tokens = max(self.tokens, 1.0)
+            self.rate = self.default_rate
+            self.capacity = float(self.burst)
+            self.window_end = 0.0
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """
+        Block until a request may be sent and consume one token
+
+        Returns:
+            Number of seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self.clock()
+                self._refill(now)
+                if now >= self.blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    self.total_wait += waited
+                    return waited
+                if now < self.blocked_until:
+                    delay = self.blocked_until - now
+                elif self.rate > 0:
+                    delay = (1 - self.tokens) / self.rate
+                else:
+                    # Quota exhausted: nothing refills until the window resets
+                    delay = max(self.window_end - now, 0.01)
+            self.sleep(delay)
+            waited += delay
+
+    def update(self, headers: Mapping[str, str], status_code: int = 200) -> None:
+        """
+        Re-pace the limiter from a response's rate limit headers
+
+        Args:
+            headers: Response headers (case-insensitive mapping)
+            status_code: HTTP status code of the response
+        """
+        remaining = _parse_float(headers.get("X-Ratelimit-Remaining"))
+        reset = _parse_float(headers.get("X-Ratelimit-Reset"))
+        retry_after = _parse_float(headers.get("Retry-After"))
+
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+
+            if remaining is not None and reset is not None and reset > 0:
+                # Spend what is left evenly across the rest of the window
+                self.rate = max(remaining, 0.0) / reset
+                self.capacity = float(max(1, min(self.burst, int(remaining))))
+                self.tokens = min(self.tokens, self.capacity, max(remaining, 0.0))
+                self.window_end = now + reset
+
+            if status_code == 429:
+                # Retry-After is authoritative; otherwise wait out the window
+                delay = retry_after if retry_after is not None else (reset or 1.0)
+                self.blocked_until = max(self.blocked_until, now + delay)
+                self.tokens = 0.0
+
+
+def _parse_float(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
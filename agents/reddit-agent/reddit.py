@@ -1,7 +1,134 @@
+import json
 import requests
+import threading
 import time
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, List, Dict, Any, Iterator, Optional, Tuple, Union
 from datetime import datetime
+from requests.adapters import HTTPAdapter
+
+from metrics import ClientMetrics
+from models import CommentTree, Post, parse_comments, parse_listing, parse_listing_dicts, parse_post
+from post_store import PostStore
+from rate_limiter import RateLimiter
+from resilience import INVALID_RESPONSE, NOT_FOUND, TRANSIENT, CircuitBreaker, RedditError, RetryPolicy
+from response_cache import CacheEntry, ResponseCache
+from search_index import SearchIndex
+from single_flight import SingleFlight
+
+try:
+    # orjson decodes Reddit listings several times faster when it is installed
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
+TIMEFRAMES = ["hour", "day", "week", "month", "year", "all"]
+
+# Posts are returned as dictionaries, or as Post objects with models=True
+PostRecord = Union[Dict[str, Any], Post]
+
+
+def _time_left(deadline: Optional[float]) -> Optional[float]:
+    """Seconds until a time.monotonic() deadline, or None without one"""
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def _expired(deadline: Optional[float]) -> bool:
+    return deadline is not None and time.monotonic() >= deadline
+
+
+def _timeout_before(timeout: Optional[Union[float, Tuple[float, float]]],
+                    deadline: Optional[float]) -> Optional[Union[float, Tuple[float, float]]]:
+    """Shorten a request timeout (or each part of a (connect, read) tuple) to end by the deadline; None if it passed"""
+    remaining = _time_left(deadline)
+    if remaining is None:
+        return timeout
+    if remaining <= 0:
+        return None
+    if isinstance(timeout, tuple):
+        return tuple(min(part, remaining) for part in timeout)
+    return remaining if timeout is None else min(timeout, remaining)
+
+
+class SubredditResult:
+    """
+    Outcome of fetching one subreddit in a multi-subreddit fetch
+    
+    Attributes:
+        subreddit: Name of the subreddit (without 'r/')
+        posts: Posts returned, empty if the fetch failed
+        error: Error message, or None if the fetch succeeded
+        error_kind: Error kind from resilience.py (e.g. "transient",
+            "banned", "circuit_open"), or None if the fetch succeeded
+        elapsed: Time spent on the request in seconds
+    """
+    
+    __slots__ = ("subreddit", "posts", "error", "error_kind", "elapsed")
+    
+    def __init__(self, subreddit: str, posts: List[PostRecord], error: Optional[str] = None, elapsed: float = 0.0,
+                 error_kind: Optional[str] = None):
+        self.subreddit = subreddit
+        self.posts = posts
+        self.error = error
+        self.error_kind = error_kind
+        self.elapsed = elapsed
+    
+    @property
+    def ok(self) -> bool:
+        """True if the subreddit was fetched successfully (even if empty)"""
+        return self.error is None
+    
+    @property
+    def empty(self) -> bool:
+        """True if the subreddit was fetched successfully but has no posts"""
+        return self.ok and not self.posts
+    
+    def __repr__(self) -> str:
+        status = f"error={self.error!r}" if self.error else f"posts={len(self.posts)}"
+        return f"SubredditResult(r/{self.subreddit}, {status}, elapsed={self.elapsed:.3f}s)"
+
+
+class PostDetailsResult:
+    """
+    Outcome of fetching one post in a bulk details fetch
+    
+    Attributes:
+        url: Normalized URL of the post
+        post: Post details, or None if the fetch failed
+        error: Error message, or None if the fetch succeeded
+        error_kind: Error kind from resilience.py, or None if the fetch succeeded
+        elapsed: Time spent on the request in seconds
+    """
+    
+    __slots__ = ("url", "post", "error", "error_kind", "elapsed")
+    
+    def __init__(self, url: str, post: Optional[PostRecord], error: Optional[str] = None, elapsed: float = 0.0,
+                 error_kind: Optional[str] = None):
+        self.url = url
+        self.post = post
+        self.error = error
+        self.error_kind = error_kind
+        self.elapsed = elapsed
+    
+    @property
+    def ok(self) -> bool:
+        """True if the post was fetched successfully"""
+        return self.error is None
+    
+    def __repr__(self) -> str:
+        status = f"error={self.error!r}" if self.error else "ok"
+        return f"PostDetailsResult({self.url}, {status}, elapsed={self.elapsed:.3f}s)"
+
+
+def error_kind(error: Exception) -> str:
+    """Return the RedditError kind of an exception; anything else is an invalid response"""
+    return error.kind if isinstance(error, RedditError) else INVALID_RESPONSE
+
+
+def normalize_post_url(post_url: str) -> str:
+    """Strip query string, fragment and trailing slash from a post URL"""
+    return post_url.split('#', 1)[0].split('?', 1)[0].rstrip('/')
+
 
 class RedditClient:
     """
@@ -12,59 +139,441 @@ class RedditClient:
     requiring authentication (using the public JSON API).
     """
     
-    def __init__(self, user_agent: str = None):
+    def __init__(self, user_agent: str = None,
+                 pool_connections: int = 4,
+                 pool_maxsize: int = 16,
+                 keep_alive: bool = True,
+                 timeout: Union[float, Tuple[float, float]] = (3.05, 10),
+                 compression: bool = True,
+                 base_url: str = "https://www.reddit.com",
+                 rate_limiter: Optional[RateLimiter] = None,
+                 cache: Optional[ResponseCache] = None,
+                 models: bool = False,
+                 store: Optional[PostStore] = None,
+                 sync_refresh_window: float = 24 * 3600,
+                 sync_refresh_interval: float = 60,
+                 sync_max_items: int = 1000,
+                 index: Optional[SearchIndex] = None,
+                 retry: Optional[RetryPolicy] = None,
+                 breaker: Optional[CircuitBreaker] = None,
+                 single_flight: Optional[SingleFlight] = None,
+                 metrics: Optional[ClientMetrics] = None):
         """
         Initialize the Reddit client
         
+        All requests go through a single pooled session, so repeated calls
+        to www.reddit.com reuse the same TCP+TLS connections instead of
+        opening a new one per request.
+        
         Args:
             user_agent: Custom user agent string for API requests
+            pool_connections: Number of host pools to keep in the session
+            pool_maxsize: Maximum number of connections kept per host
+            keep_alive: Keep connections open between requests
+            timeout: Request timeout in seconds, or a (connect, read) tuple
+            compression: Ask Reddit for gzip/deflate compressed responses
+            base_url: Root URL for API requests
+            rate_limiter: Limiter pacing requests; defaults to the limiter
+                shared by every client in the process
+            cache: Optional response cache; responses are not cached if None
+            models: Return compact Post/Comment objects instead of dictionaries
+                (use Post.to_dict() for the dictionary format)
+            store: Optional local post store; `new` listings are then synced
+                incrementally and served from disk
+            sync_refresh_window: Posts younger than this many seconds get
+                their scores and comment counts refreshed on sync
+            sync_refresh_interval: Minimum seconds between score refreshes
+                of the same subreddit
+            sync_max_items: Maximum number of new posts downloaded per sync
+            index: Optional full-text index; every post the client fetches
+                is added to it and can be searched offline with search_local
+            retry: Backoff policy for 5xx, 429 and network errors; defaults
+                to RetryPolicy()
+            breaker: Per-subreddit circuit breaker; defaults to a new
+                CircuitBreaker() for this client
+            single_flight: Coalesces identical concurrent requests; defaults
+                to the instance shared by every client in the process
+            metrics: Optional request instrumentation (latency, status codes,
+                bytes, cache and rate limit waits); disabled if None
         """
-        self.base_url = "https://www.reddit.com"
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter or RateLimiter.shared()
+        self.cache = cache
+        self.models = models
+        self.store = store
+        self.sync_refresh_window = sync_refresh_window
+        self.sync_refresh_interval = sync_refresh_interval
+        self.sync_max_items = sync_max_items
+        self.index = index
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.single_flight = single_flight or SingleFlight.shared()
+        self.metrics = metrics
         self.headers = {
-            "User-Agent": user_agent or "RedditAssistant/1.0"
+            "User-Agent": user_agent or "RedditAssistant/1.0",
+            "Accept-Encoding": "gzip, deflate" if compression else "identity",
+            "Connection": "keep-alive" if keep_alive else "close",
         }
+        
+        # One session per client: its adapter holds the connection pool
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+    
+    def close(self) -> None:
+        """Close the underlying session and release pooled connections"""
+        self.session.close()
     
-    def get_hot_posts(self, subreddit: str, limit: int = 5) -> List[Dict[str, Any]]:
+    def __enter__(self) -> "RedditClient":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    def _get(self, url: str, params: Optional[Dict[str, Any]] = None,
+             timeout: Optional[Union[float, Tuple[float, float]]] = None, deadline: Optional[float] = None) -> Any:
         """
-        Get hot posts from a specific subreddit
+        Perform a GET request on the pooled session and decode the JSON body
+        
+        Requests are paced by the rate limiter, which is updated from every
+        response. Retryable statuses and network errors are retried with
+        exponential backoff and jitter; a 429 waits for the server's
+        Retry-After in the rate limiter instead.
+        
+        With a cache configured, fresh entries are served without a request
+        and stale ones are revalidated with If-None-Match/If-Modified-Since.
+        
+        Identical requests already in flight (from any thread or client
+        sharing the SingleFlight) are not repeated: the caller waits for
+        the in-flight request and receives its result. Requests are only
+        shared between clients with the same user agent, encoding and
+        timeout; a caller served by another client's request stores the
+        result in its own cache and counts it as "coalesced" in its metrics.
+        
+        Args:
+            url: Absolute URL to fetch
+            params: Optional query string parameters
+            timeout: Overrides the client's timeout for each attempt
+            deadline: time.monotonic() value after which no attempt is
+                started or waited on; attempt timeouts and backoff are cut
+                short to fit, so retries cannot overrun it (a Retry-After
+                wait in the rate limiter still can)
+            
+        Returns:
+            Decoded JSON response
+            
+        Raises:
+            RedditError: The request failed; its `kind` tells why
+        """
+        key = ResponseCache.make_key(url, params)
+        entry = None
+        if self.cache is not None:
+            entry, fresh = self.cache.lookup(key)
+            if self.metrics is not None:
+                self.metrics.observe_cache(ResponseCache.endpoint_type(url),
+                                           "hit" if fresh else "stale" if entry is not None else "miss")
+            if fresh:
+                return entry.data
+        flight_key = (key, self.headers["User-Agent"], self.headers["Accept-Encoding"], timeout or self.timeout)
+        try:
+            fetched, shared = self.single_flight.run(flight_key,
+                                                     lambda: self._request(url, params, timeout, key, entry, deadline))
+        except RedditError as e:
+            if self.metrics is not None:
+                self.metrics.observe_error(ResponseCache.endpoint_type(url), e.kind)
+            raise
+        if shared:
+            # The leading client cached and measured its own request; do the same for this one
+            if self.cache is not None:
+                self.cache.store(key, fetched.data, fetched.size, fetched.etag, fetched.last_modified)
+            if self.metrics is not None:
+                self.metrics.observe_cache(ResponseCache.endpoint_type(url), "coalesced")
+        return fetched.data
+    
+    def _request(self, url: str, params: Optional[Dict[str, Any]], timeout: Optional[Union[float, Tuple[float, float]]],
+                 key: Tuple, entry: Optional[CacheEntry], deadline: Optional[float] = None) -> CacheEntry:
+        """
+        Send a request for _get, with retries, revalidating a stale cache entry if given
+        
+        Returns:
+            The decoded body with its size and validators, so callers that
+            shared the request can cache it too
+        """
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        
+        metrics = self.metrics
+        endpoint = ResponseCache.endpoint_type(url) if metrics is not None else None
+        attempts = self.retry.max_attempts
+        for attempt in range(attempts):
+            waited = self.rate_limiter.acquire()
+            attempt_timeout = _timeout_before(timeout or self.timeout, deadline)
+            if attempt_timeout is None:
+                raise RedditError(TRANSIENT, f"Deadline passed before attempt {attempt + 1} for {url}")
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, headers=headers, timeout=attempt_timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if metrics is not None:
+                    metrics.observe_rate_limit_wait(waited)
+                    metrics.observe_request(endpoint, "network", time.perf_counter() - start)
+                if attempt + 1 >= attempts or _expired(deadline):
+                    raise RedditError(TRANSIENT, f"{type(e).__name__} for {url}: {e}") from e
+                self.retry.backoff(attempt, _time_left(deadline))
+                continue
+            if metrics is not None:
+                metrics.observe_rate_limit_wait(waited)
+                metrics.observe_request(endpoint, str(response.status_code), time.perf_counter() - start,
+                                        len(response.content))
+            self.rate_limiter.update(response.headers, response.status_code)
+            if (response.status_code not in self.retry.retry_statuses or attempt + 1 >= attempts
+                    or _expired(deadline)):
+                break
+            if response.status_code != 429:
+                self.retry.backoff(attempt, _time_left(deadline))
+        
+        if response.status_code == 304 and entry is not None:
+            self.cache.revalidated(key, entry)
+            if metrics is not None:
+                metrics.observe_cache(endpoint, "revalidated")
+            return entry
+        
+        if response.status_code >= 400:
+            raise self._response_error(response, url)
+        if response.history and "/subreddits/search" in response.url:
+            # Reddit redirects unknown subreddits to a subreddit search
+            raise RedditError(NOT_FOUND, f"Subreddit not found for {url}", 404)
+        try:
+            data = json_loads(response.content)
+        except ValueError as e:
+            raise RedditError(INVALID_RESPONSE, f"Invalid JSON from {url}: {e}", response.status_code) from e
+        fetched = CacheEntry(data, len(response.content), response.headers.get("ETag"),
+                             response.headers.get("Last-Modified"), 0.0)
+        if self.cache is not None:
+            self.cache.store(key, fetched.data, fetched.size, fetched.etag, fetched.last_modified)
+        return fetched
+    
+    @staticmethod
+    def _response_error(response: requests.Response, url: str) -> RedditError:
+        """Build a RedditError from an error response, using Reddit's `reason` field if present"""
+        reason = None
+        try:
+            body = json_loads(response.content)
+            if isinstance(body, dict):
+                reason = body.get("reason")
+        except ValueError:
+            pass
+        return RedditError.from_status(response.status_code, reason, url)
+    
+    def _parse_listing(self, data: Dict[str, Any], as_models: bool = False) -> List[PostRecord]:
+        """
+        Extract posts from a decoded listing response
+        
+        Args:
+            data: Decoded JSON of a listing endpoint
+            as_models: Always return Post objects, whatever the client's models setting
+            
+        Returns:
+            List of Post objects if the client was created with models=True,
+            otherwise a list of post dictionaries containing metadata
+        """
+        if not (self.models or as_models or self.index is not None):
+            # Nothing needs Post objects: build the dictionaries directly
+            return parse_listing_dicts(data)
+        posts = parse_listing(data)
+        if self.index is not None:
+            self.index.add_posts(posts)
+        if self.models or as_models:
+            return posts
+        return [post.to_dict() for post in posts]
+    
+    def _listing(self, url: str, params: Optional[Dict[str, Any]] = None) -> List[PostRecord]:
+        """
+        Fetch a listing endpoint and extract post metadata
+        
+        Unlike the public get_* methods, errors are raised to the caller.
+        
+        Args:
+            url: Absolute URL of the listing endpoint
+            params: Optional query string parameters
+            
+        Returns:
+            List of post dictionaries containing metadata
+        """
+        return self._parse_listing(self._get(url, params))
+    
+    def _iter_listing(self, url: str, params: Optional[Dict[str, Any]] = None,
+                      max_items: Optional[int] = None, time_budget: Optional[float] = None,
+                      page_size: int = 100, as_models: bool = False) -> Iterator[PostRecord]:
+        """
+        Lazily page through a listing endpoint by following its `after` cursor
+        
+        Pages are only requested as the caller consumes posts. Errors are
+        raised to the caller.
+        
+        Args:
+            url: Absolute URL of the listing endpoint
+            params: Optional query string parameters (without limit/after)
+            max_items: Stop after yielding this many posts (None for no cap)
+            time_budget: Stop requesting new pages after this many seconds
+            page_size: Posts requested per page (Reddit allows at most 100)
+            as_models: Always yield Post objects, whatever the client's models setting
+            
+        Yields:
+            Post dictionaries containing metadata
+        """
+        deadline = time.monotonic() + time_budget if time_budget is not None else None
+        after = None
+        count = 0
+        
+        while max_items is None or count < max_items:
+            if deadline is not None and time.monotonic() >= deadline:
+                return
+            
+            page_params = dict(params or {})
+            page_params["limit"] = min(page_size, 100) if max_items is None else min(page_size, 100, max_items - count)
+            page_params["count"] = count
+            if after:
+                page_params["after"] = after
+            
+            data = self._get(url, page_params)
+            posts = self._parse_listing(data, as_models)
+            for post in posts:
+                yield post
+                count += 1
+                if max_items is not None and count >= max_items:
+                    return
+            
+            after = data['data'].get('after')
+            if not after or not posts:
+                return
+    
+    def _subreddit_endpoint(self, subreddit: str, post_type: str = "hot", timeframe: str = "day") -> Tuple[str, Dict[str, Any]]:
+        """
+        Build the listing URL and base parameters for a subreddit
         
         Args:
             subreddit: Name of the subreddit (without 'r/')
+            post_type: Type of posts to get (hot, new, top)
+            timeframe: Time period for top posts
+            
+        Returns:
+            (url, params) tuple
+        """
+        if post_type == "new":
+            return f"{self.base_url}/r/{subreddit}/new.json", {}
+        if post_type == "top":
+            if timeframe not in TIMEFRAMES:
+                timeframe = "day"  # Default to day if invalid timeframe
+            return f"{self.base_url}/r/{subreddit}/top.json", {"t": timeframe}
+        return f"{self.base_url}/r/{subreddit}/hot.json", {}
+    
+    def _fetch_subreddit(self, subreddit: str, post_type: str = "hot", timeframe: str = "day", limit: int = 5) -> List[PostRecord]:
+        """
+        Fetch one subreddit listing, raising on failure
+        
+        Requests go through the subreddit's circuit breaker: a subreddit
+        whose circuit is open fails immediately without a request.
+        
+        Args:
+            subreddit: Name of the subreddit (without 'r/')
+            post_type: Type of posts to get (hot, new, top)
+            timeframe: Time period for top posts
             limit: Maximum number of posts to return
             
         Returns:
             List of post dictionaries containing metadata
+            
+        Raises:
+            RedditError: The subreddit could not be fetched
         """
+        self.breaker.check(subreddit)
         try:
-            url = f"{self.base_url}/r/{subreddit}/hot.json?limit={limit}"
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            
-            data = response.json()
-            posts = []
-            
-            for post in data['data']['children']:
-                post_data = post['data']
-                # Extract relevant fields
-                posts.append({
-                    'title': post_data['title'],
-                    'url': f"https://www.reddit.com{post_data['permalink']}",
-                    'subreddit': post_data['subreddit'],
-                    'author': post_data['author'],
-                    'score': post_data['score'],
-                    'num_comments': post_data['num_comments'],
-                    'created_utc': post_data['created_utc'],
-                    'selftext': post_data.get('selftext', ''),
-                    'is_self': post_data['is_self']
-                })
+            if post_type == "new" and self.store is not None:
+                posts = self._sync_new(subreddit, limit)
+                posts = posts if self.models else [post.to_dict() for post in posts]
+            else:
+                url, params = self._subreddit_endpoint(subreddit, post_type, timeframe)
+                posts = self._listing(url, {**params, "limit": limit})
+        except RedditError as e:
+            self.breaker.record_failure(subreddit, e)
+            raise
+        self.breaker.record_success(subreddit)
+        return posts
+    
+    def _sync_new(self, subreddit: str, limit: int = 5) -> List[Post]:
+        """
+        Incrementally sync a subreddit's `new` listing into the local store
+        
+        Only posts newer than the newest one already stored are downloaded;
+        the listing is paged until a known post is reached. Scores and
+        comment counts of recent stored posts are refreshed in bulk through
+        /api/info (100 posts per request) at most once per refresh interval.
+        
+        Args:
+            subreddit: Name of the subreddit (without 'r/')
+            limit: Number of posts to return
             
-            return posts
+        Returns:
+            The newest `limit` posts of the subreddit, read from the store
+        """
+        newest, refreshed_at = self.store.get_sync_state(subreddit)
+        url, params = self._subreddit_endpoint(subreddit, "new")
+        
+        fresh = []
+        # Cold start: fetch just what was asked for; warm: page until a known post
+        warm = newest and self.store.count(subreddit) >= limit
+        max_items = self.sync_max_items if warm else limit
+        for post in self._iter_listing(url, params, max_items, page_size=min(max(limit, 25), 100), as_models=True):
+            if warm and post.created_utc <= newest:
+                break
+            fresh.append(post)
+        
+        self.store.upsert_posts(fresh)
+        if fresh:
+            self.store.set_sync_state(subreddit, newest_created_utc=max(post.created_utc for post in fresh))
+        
+        now = time.time()
+        if newest and now - refreshed_at >= self.sync_refresh_interval:
+            fresh_ids = {post.id for post in fresh}
+            stale_ids = [post_id for post_id in self.store.recent_ids(subreddit, now - self.sync_refresh_window)
+                         if post_id not in fresh_ids]
+            counts = []
+            for i in range(0, len(stale_ids), 100):
+                batch = ",".join(f"t3_{post_id}" for post_id in stale_ids[i:i + 100])
+                data = self._get(f"{self.base_url}/api/info.json", {"id": batch})
+                counts.extend((post.id, post.score, post.num_comments) for post in parse_listing(data))
+            self.store.update_counts(counts)
+            self.store.set_sync_state(subreddit, refreshed_at=now)
+        
+        return self.store.get_posts(subreddit, limit)
+    
+    def get_hot_posts(self, subreddit: str, limit: int = 5) -> List[PostRecord]:
+        """
+        Get hot posts from a specific subreddit
+        
+        Args:
+            subreddit: Name of the subreddit (without 'r/')
+            limit: Maximum number of posts to return
+            
+        Returns:
+            List of post dictionaries containing metadata
+        """
+        try:
+            return self._fetch_subreddit(subreddit, "hot", limit=limit)
         
         except Exception as e:
             print(f"Error fetching posts from r/{subreddit}: {str(e)}")
             return []
     
-    def get_new_posts(self, subreddit: str, limit: int = 5) -> List[Dict[str, Any]]:
+    def get_new_posts(self, subreddit: str, limit: int = 5) -> List[PostRecord]:
         """
         Get new posts from a specific subreddit
         
@@ -76,34 +585,13 @@ class RedditClient:
             List of post dictionaries containing metadata
         """
         try:
-            url = f"{self.base_url}/r/{subreddit}/new.json?limit={limit}"
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            
-            data = response.json()
-            posts = []
-            
-            for post in data['data']['children']:
-                post_data = post['data']
-                posts.append({
-                    'title': post_data['title'],
-                    'url': f"https://www.reddit.com{post_data['permalink']}",
-                    'subreddit': post_data['subreddit'],
-                    'author': post_data['author'],
-                    'score': post_data['score'],
-                    'num_comments': post_data['num_comments'],
-                    'created_utc': post_data['created_utc'],
-                    'selftext': post_data.get('selftext', ''),
-                    'is_self': post_data['is_self']
-                })
-            
-            return posts
+            return self._fetch_subreddit(subreddit, "new", limit=limit)
         
         except Exception as e:
             print(f"Error fetching new posts from r/{subreddit}: {str(e)}")
             return []
     
-    def get_top_posts(self, subreddit: str, timeframe: str = "day", limit: int = 5) -> List[Dict[str, Any]]:
+    def get_top_posts(self, subreddit: str, timeframe: str = "day", limit: int = 5) -> List[PostRecord]:
         """
         Get top posts from a specific subreddit
         
@@ -115,39 +603,14 @@ class RedditClient:
         Returns:
             List of post dictionaries containing metadata
         """
-        valid_timeframes = ["hour", "day", "week", "month", "year", "all"]
-        if timeframe not in valid_timeframes:
-            timeframe = "day"  # Default to day if invalid timeframe
-            
         try:
-            url = f"{self.base_url}/r/{subreddit}/top.json?t={timeframe}&limit={limit}"
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            
-            data = response.json()
-            posts = []
-            
-            for post in data['data']['children']:
-                post_data = post['data']
-                posts.append({
-                    'title': post_data['title'],
-                    'url': f"https://www.reddit.com{post_data['permalink']}",
-                    'subreddit': post_data['subreddit'],
-                    'author': post_data['author'],
-                    'score': post_data['score'],
-                    'num_comments': post_data['num_comments'],
-                    'created_utc': post_data['created_utc'],
-                    'selftext': post_data.get('selftext', ''),
-                    'is_self': post_data['is_self']
-                })
-            
-            return posts
+            return self._fetch_subreddit(subreddit, "top", timeframe, limit)
         
         except Exception as e:
             print(f"Error fetching top posts from r/{subreddit}: {str(e)}")
             return []
     
-    def search_posts(self, query: str, subreddit: str = None, sort: str = "relevance", limit: int = 5) -> List[Dict[str, Any]]:
+    def search_posts(self, query: str, subreddit: str = None, sort: str = "relevance", limit: int = 5) -> List[PostRecord]:
         """
         Search for posts across Reddit or within a specific subreddit
         
@@ -162,38 +625,152 @@ class RedditClient:
         """
         try:
             # Build URL based on whether a subreddit is specified
+            params = {"q": query, "sort": sort, "limit": limit}
             if subreddit:
-                url = f"{self.base_url}/r/{subreddit}/search.json?q={query}&sort={sort}&limit={limit}"
+                url = f"{self.base_url}/r/{subreddit}/search.json"
             else:
-                url = f"{self.base_url}/search.json?q={query}&sort={sort}&limit={limit}"
+                url = f"{self.base_url}/search.json"
                 
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            
-            data = response.json()
-            posts = []
-            
-            for post in data['data']['children']:
-                post_data = post['data']
-                posts.append({
-                    'title': post_data['title'],
-                    'url': f"https://www.reddit.com{post_data['permalink']}",
-                    'subreddit': post_data['subreddit'],
-                    'author': post_data['author'],
-                    'score': post_data['score'],
-                    'num_comments': post_data['num_comments'],
-                    'created_utc': post_data['created_utc'],
-                    'selftext': post_data.get('selftext', ''),
-                    'is_self': post_data['is_self']
-                })
-            
-            return posts
+            return self._listing(url, params)
         
         except Exception as e:
             print(f"Error searching for '{query}': {str(e)}")
             return []
     
-    def get_post_details(self, post_url: str) -> Optional[Dict[str, Any]]:
+    def search_local(self, query: str, subreddit: str = None, since: Optional[float] = None,
+                     until: Optional[float] = None, limit: int = 25) -> List[PostRecord]:
+        """
+        Search every post this client has fetched, without any network call
+        
+        Titles, selftext and loaded comments are indexed; results are
+        ranked with BM25.
+        
+        Args:
+            query: Search query
+            subreddit: Optional subreddit to limit search (without 'r/')
+            since: Only return posts created at or after this UNIX time
+            until: Only return posts created before this UNIX time
+            limit: Maximum number of posts to return
+            
+        Returns:
+            List of post dictionaries containing metadata, best match first
+        """
+        if self.index is None:
+            raise ValueError("search_local requires a RedditClient created with index=SearchIndex(...)")
+        posts = self.index.search(query, subreddit, since, until, limit)
+        return posts if self.models else [post.to_dict() for post in posts]
+    
+    def _stream(self, posts: Iterator[PostRecord], error_message: str) -> Iterator[PostRecord]:
+        """Yield from a paginated listing, stopping with a printed error on failure"""
+        try:
+            yield from posts
+        except Exception as e:
+            print(f"{error_message}: {str(e)}")
+    
+    def iter_hot_posts(self, subreddit: str, max_items: Optional[int] = None,
+                       time_budget: Optional[float] = None) -> Iterator[PostRecord]:
+        """
+        Stream hot posts from a subreddit, following pagination lazily
+        
+        Args:
+            subreddit: Name of the subreddit (without 'r/')
+            max_items: Maximum number of posts to yield (None for no cap)
+            time_budget: Stop requesting new pages after this many seconds
+            
+        Yields:
+            Post dictionaries containing metadata
+        """
+        url, params = self._subreddit_endpoint(subreddit, "hot")
+        return self._stream(self._iter_listing(url, params, max_items, time_budget),
+                            f"Error fetching posts from r/{subreddit}")
+    
+    def iter_new_posts(self, subreddit: str, max_items: Optional[int] = None,
+                       time_budget: Optional[float] = None) -> Iterator[PostRecord]:
+        """
+        Stream new posts from a subreddit, following pagination lazily
+        
+        Args:
+            subreddit: Name of the subreddit (without 'r/')
+            max_items: Maximum number of posts to yield (None for no cap)
+            time_budget: Stop requesting new pages after this many seconds
+            
+        Yields:
+            Post dictionaries containing metadata
+        """
+        url, params = self._subreddit_endpoint(subreddit, "new")
+        return self._stream(self._iter_listing(url, params, max_items, time_budget),
+                            f"Error fetching new posts from r/{subreddit}")
+    
+    def iter_top_posts(self, subreddit: str, timeframe: str = "day", max_items: Optional[int] = None,
+                       time_budget: Optional[float] = None) -> Iterator[PostRecord]:
+        """
+        Stream top posts from a subreddit, following pagination lazily
+        
+        Args:
+            subreddit: Name of the subreddit (without 'r/')
+            timeframe: Time period for top posts (hour, day, week, month, year, all)
+            max_items: Maximum number of posts to yield (None for no cap)
+            time_budget: Stop requesting new pages after this many seconds
+            
+        Yields:
+            Post dictionaries containing metadata
+        """
+        url, params = self._subreddit_endpoint(subreddit, "top", timeframe)
+        return self._stream(self._iter_listing(url, params, max_items, time_budget),
+                            f"Error fetching top posts from r/{subreddit}")
+    
+    def iter_search_posts(self, query: str, subreddit: str = None, sort: str = "relevance",
+                          max_items: Optional[int] = None, time_budget: Optional[float] = None) -> Iterator[PostRecord]:
+        """
+        Stream search results, following pagination lazily
+        
+        Args:
+            query: Search query
+            subreddit: Optional subreddit to limit search (without 'r/')
+            sort: Sort method (relevance, hot, new, top)
+            max_items: Maximum number of posts to yield (None for no cap)
+            time_budget: Stop requesting new pages after this many seconds
+            
+        Yields:
+            Post dictionaries containing metadata
+        """
+        if subreddit:
+            url = f"{self.base_url}/r/{subreddit}/search.json"
+        else:
+            url = f"{self.base_url}/search.json"
+        return self._stream(self._iter_listing(url, {"q": query, "sort": sort}, max_items, time_budget),
+                            f"Error searching for '{query}'")
+    
+    def _fetch_post_details(self, post_url: str, timeout: Optional[Union[float, Tuple[float, float]]] = None,
+                            deadline: Optional[float] = None) -> PostRecord:
+        """
+        Fetch a post with its top-level comments, raising on failure
+        
+        Args:
+            post_url: URL of the Reddit post
+            timeout: Overrides the client's timeout for each attempt
+            deadline: time.monotonic() value by which retries must give up
+            
+        Returns:
+            Post details including top comments
+        """
+        # Convert URL to API endpoint
+        if post_url.endswith('/'):
+            api_url = f"{post_url}.json"
+        else:
+            api_url = f"{post_url}/.json"
+            
+        data = self._get(api_url, timeout=timeout, deadline=deadline)
+        post = parse_post(data[0]['data']['children'][0]['data'])
+        
+        # Get top comments
+        post.top_comments = parse_comments(data[1])
+        if self.index is not None:
+            self.index.add_posts([post])
+        
+        return post if self.models else post.to_dict()
+    
+    def get_post_details(self, post_url: str) -> Optional[PostRecord]:
         """
         Get detailed information about a specific post including top comments
         
@@ -201,48 +778,218 @@ class RedditClient:
             post_url: URL of the Reddit post
             
         Returns:
-            Dictionary containing post details and top comments, or None if error
+            Post details including top comments (a dictionary, or a Post with
+            models=True), or None if error
         """
         try:
-            # Convert URL to API endpoint
-            if post_url.endswith('/'):
-                api_url = f"{post_url}.json"
-            else:
-                api_url = f"{post_url}/.json"
-                
-            response = requests.get(api_url, headers=self.headers)
-            response.raise_for_status()
-            
-            data = response.json()
-            post_data = data[0]['data']['children'][0]['data']
-            
-            # Get top comments
-            comments = []
-            for comment in data[1]['data']['children']:
-                if 'body' in comment.get('data', {}):
-                    comments.append({
-                        'author': comment['data'].get('author', '[deleted]'),
-                        'body': comment['data']['body'],
-                        'score': comment['data'].get('score', 0)
-                    })
-            
-            return {
-                'title': post_data['title'],
-                'url': f"https://www.reddit.com{post_data['permalink']}",
-                'subreddit': post_data['subreddit'],
-                'author': post_data['author'],
-                'score': post_data['score'],
-                'num_comments': post_data['num_comments'],
-                'created_utc': post_data['created_utc'],
-                'selftext': post_data.get('selftext', ''),
-                'top_comments': comments
-            }
+            return self._fetch_post_details(post_url)
             
         except Exception as e:
             print(f"Error fetching post details: {str(e)}")
             return None
     
-    def get_posts_from_multiple_subreddits(self, subreddits: List[str], post_type: str = "hot", limit_per_sub: int = 3) -> List[Dict[str, Any]]:
+    def iter_post_details(self, post_urls: List[str], max_workers: int = 8,
+                          timeout: Optional[Union[float, Tuple[float, float]]] = None) -> Iterator[PostDetailsResult]:
+        """
+        Fetch details for many posts concurrently, yielding each as it completes
+        
+        URLs are deduplicated (ignoring trailing slashes, query strings and
+        fragments) before any request is made, so each post is fetched once.
+        
+        Args:
+            post_urls: URLs of the Reddit posts
+            max_workers: Maximum number of requests in flight at once
+            timeout: Time limit for each post in seconds (a (connect, read)
+                tuple counts as their sum), covering every retry and backoff
+                from the moment its request starts; defaults to the client's
+                timeout per attempt with no overall limit
+            
+        Yields:
+            One PostDetailsResult per unique URL, in completion order
+        """
+        unique_urls = list(dict.fromkeys(normalize_post_url(url) for url in post_urls))
+        if not unique_urls:
+            return
+        
+        budget = sum(timeout) if isinstance(timeout, tuple) else timeout
+        
+        def fetch(post_url: str) -> PostDetailsResult:
+            start = time.perf_counter()
+            deadline = time.monotonic() + budget if budget is not None else None
+            try:
+                post = self._fetch_post_details(post_url, timeout, deadline)
+                return PostDetailsResult(post_url, post, elapsed=time.perf_counter() - start)
+            except Exception as e:
+                return PostDetailsResult(post_url, None, error=str(e), elapsed=time.perf_counter() - start,
+                                         error_kind=error_kind(e))
+        
+        workers = max(1, min(max_workers, len(unique_urls)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="reddit-details") as executor:
+            futures = [executor.submit(fetch, url) for url in unique_urls]
+            for future in as_completed(futures):
+                yield future.result()
+    
+    def get_many_post_details(self, post_urls: List[str], max_workers: int = 8,
+                              timeout: Optional[Union[float, Tuple[float, float]]] = None) -> Dict[str, Optional[PostRecord]]:
+        """
+        Fetch details for many posts concurrently
+        
+        Args:
+            post_urls: URLs of the Reddit posts
+            max_workers: Maximum number of requests in flight at once
+            timeout: Time limit for each post, retries included (see iter_post_details)
+            
+        Returns:
+            Dictionary mapping each normalized URL to its post details, or
+            None if that post could not be fetched
+        """
+        results = {}
+        for result in self.iter_post_details(post_urls, max_workers, timeout):
+            if not result.ok:
+                print(f"Error fetching post details for {result.url}: {result.error}")
+            results[result.url] = result.post
+        return results
+    
+    def get_comment_tree(self, post_url: str, max_depth: int = 8, max_comments: int = 500,
+                         max_workers: int = 4) -> Optional[PostRecord]:
+        """
+        Get a post with its full comment tree, expanding "more" stubs
+        
+        The first request asks Reddit for the tree down to `max_depth`, so
+        deep threads arrive in one response. Collapsed "more" children are
+        then expanded through /api/morechildren in batches of up to 100
+        IDs, with all batches of a round fetched concurrently. Each round
+        only costs one round trip however many stubs it expands. A failed
+        expansion request only loses the comments it would have added; the
+        rest of the tree is still returned.
+        
+        Args:
+            post_url: URL of the Reddit post
+            max_depth: Deepest reply level to keep (0 keeps top-level comments only)
+            max_comments: Maximum number of comments in the tree
+            max_workers: Maximum number of expansion requests in flight at once
+            
+        Returns:
+            Post whose top_comments hold the tree of comments and their
+            replies (a dictionary, or a Post with models=True), or None if error
+        """
+        try:
+            api_url = post_url.rstrip('/') + "/.json"
+            data = self._get(api_url, {"depth": max_depth + 1, "limit": min(max_comments, 500), "raw_json": 1})
+            post = parse_post(data[0]['data']['children'][0]['data'])
+            
+            tree = CommentTree(max_depth, max_comments)
+            tree.add_listing(data[1]['data']['children'])
+            
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="reddit-comments") as executor:
+                while (tree.pending_more or tree.pending_threads) and not tree.full:
+                    # Never ask for more children than the remaining budget
+                    budget = tree.max_comments - tree.count
+                    more_ids, tree.pending_more = tree.pending_more[:budget], []
+                    # A thread stub is only expandable if its parent made it into the tree
+                    threads = [comment_id for comment_id in tree.pending_threads if tree.find(comment_id) is not None]
+                    tree.pending_threads = []
+                    
+                    batches = [more_ids[i:i + 100] for i in range(0, len(more_ids), 100)]
+                    more_futures = [executor.submit(self._get, f"{self.base_url}/api/morechildren.json", {
+                        "api_type": "json",
+                        "link_id": f"t3_{post.id}",
+                        "children": ",".join(batch),
+                        "limit_children": "false",
+                        "raw_json": 1,
+                    }) for batch in batches]
+                    thread_futures = [(comment_id, executor.submit(
+                        self._get, f"{self.base_url}/comments/{post.id}/_/{comment_id}/.json",
+                        {"depth": max_depth + 1 - tree.find(comment_id).depth, "raw_json": 1}
+                    )) for comment_id in threads]
+                    
+                    for future in more_futures:
+                        try:
+                            tree.add_things(future.result()['json']['data']['things'])
+                        except Exception as e:
+                            print(f"Error expanding comments, keeping the partial tree: {str(e)}")
+                    for comment_id, future in thread_futures:
+                        try:
+                            tree.add_thread(comment_id, future.result()[1]['data']['children'])
+                        except Exception as e:
+                            print(f"Error expanding comment thread {comment_id}, keeping the partial tree: {str(e)}")
+            
+            post.top_comments = tree.roots
+            if self.index is not None:
+                self.index.add_posts([post])
+            return post if self.models else post.to_dict()
+        
+        except Exception as e:
+            print(f"Error fetching comment tree: {str(e)}")
+            return None
+    
+    def fetch_subreddit(self, subreddit: str, post_type: str = "hot", timeframe: str = "day",
+                        limit: int = 5) -> SubredditResult:
+        """
+        Fetch one subreddit, reporting failure instead of returning an empty list
+        
+        Args:
+            subreddit: Name of the subreddit (without 'r/')
+            post_type: Type of posts to get (hot, new, top)
+            timeframe: Time period for top posts
+            limit: Maximum number of posts to return
+            
+        Returns:
+            SubredditResult; check `ok`/`empty` and `error_kind` to tell an
+            empty subreddit from a failed, banned or skipped one
+        """
+        start = time.perf_counter()
+        try:
+            posts = self._fetch_subreddit(subreddit, post_type, timeframe, limit)
+            return SubredditResult(subreddit, posts, elapsed=time.perf_counter() - start)
+        except Exception as e:
+            return SubredditResult(subreddit, [], error=str(e), elapsed=time.perf_counter() - start,
+                                   error_kind=error_kind(e))
+    
+    def fetch_subreddits(self, subreddits: List[str], post_type: str = "hot", limit_per_sub: int = 3,
+                         timeframe: str = "day", max_workers: int = 8,
+                         on_result: Optional[Callable[[SubredditResult, int, int], None]] = None) -> List[SubredditResult]:
+        """
+        Fetch several subreddits concurrently
+        
+        Requests fan out over a bounded thread pool sharing this client's
+        connection pool, so total latency is close to the slowest single
+        request rather than the sum of all of them.
+        
+        Args:
+            subreddits: List of subreddit names (without 'r/')
+            post_type: Type of posts to get (hot, new, top)
+            limit_per_sub: Maximum number of posts per subreddit
+            timeframe: Time period for top posts
+            max_workers: Maximum number of requests in flight at once
+            on_result: Called as on_result(result, done, total) as each
+                subreddit finishes (e.g. for progress), from worker threads
+            
+        Returns:
+            One SubredditResult per subreddit, in the same order as `subreddits`
+        """
+        done = 0
+        done_lock = threading.Lock()
+        
+        def fetch(subreddit: str) -> SubredditResult:
+            nonlocal done
+            result = self.fetch_subreddit(subreddit, post_type, timeframe, limit_per_sub)
+            if on_result is not None:
+                with done_lock:
+                    done += 1
+                    on_result(result, done, len(subreddits))
+            return result
+        
+        if not subreddits:
+            return []
+        
+        workers = max(1, min(max_workers, len(subreddits)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="reddit-fetch") as executor:
+            # map() yields results in input order regardless of completion order
+            return list(executor.map(fetch, subreddits))
+    
+    def get_posts_from_multiple_subreddits(self, subreddits: List[str], post_type: str = "hot", limit_per_sub: int = 3,
+                                           timeframe: str = "day", max_workers: int = 8) -> List[PostRecord]:
         """
         Get posts from multiple subreddits
         
@@ -250,26 +997,18 @@ class RedditClient:
             subreddits: List of subreddit names (without 'r/')
             post_type: Type of posts to get (hot, new, top)
             limit_per_sub: Maximum number of posts per subreddit
+            timeframe: Time period for top posts
+            max_workers: Maximum number of requests in flight at once
             
         Returns:
             List of post dictionaries from all specified subreddits
         """
         all_posts = []
         
-        for subreddit in subreddits:
-            if post_type == "hot":
-                posts = self.get_hot_posts(subreddit, limit_per_sub)
-            elif post_type == "new":
-                posts = self.get_new_posts(subreddit, limit_per_sub)
-            elif post_type == "top":
-                posts = self.get_top_posts(subreddit, "day", limit_per_sub)
-            else:
-                posts = self.get_hot_posts(subreddit, limit_per_sub)
-                
-            all_posts.extend(posts)
-            
-            # Sleep briefly to avoid hitting rate limits
-            time.sleep(0.5)
+        for result in self.fetch_subreddits(subreddits, post_type, limit_per_sub, timeframe, max_workers):
+            if not result.ok:
+                print(f"Error fetching posts from r/{result.subreddit}: {result.error}")
+            all_posts.extend(result.posts)
         
         return all_posts
         
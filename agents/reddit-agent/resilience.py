@@ -0,0 +1,195 @@
+import random
+import threading
+import time
+from typing import Callable, Dict, FrozenSet, Optional
+
+# Error kinds reported by RedditError
+TRANSIENT = "transient"            # 5xx, timeout or connection failure
+RATE_LIMITED = "rate_limited"      # 429 after every retry
+NOT_FOUND = "not_found"            # subreddit or post does not exist
+FORBIDDEN = "forbidden"            # private or quarantined subreddit
+BANNED = "banned"                  # banned subreddit
+HTTP_ERROR = "http_error"          # any other 4xx
+INVALID_RESPONSE = "invalid_response"
+CIRCUIT_OPEN = "circuit_open"      # skipped without a request
+
+# Failures that will not go away by retrying soon
+PERMANENT_KINDS = frozenset({NOT_FOUND, FORBIDDEN, BANNED})
+# Failures that say nothing about one subreddit's health: Reddit's quota is per
+# client (429s are paced by the RateLimiter) and a garbled body is not the subreddit's fault
+UNTRACKED_KINDS = frozenset({RATE_LIMITED, INVALID_RESPONSE, CIRCUIT_OPEN})
+
+
+class RedditError(Exception):
+    """
+    A failed Reddit request, classified so callers can react to it
+
+    Attributes:
+        kind: One of the error kinds defined in this module
+        status: HTTP status code, or None if no response was received
+        retryable: True if the same request may succeed later
+    """
+
+    def __init__(self, kind: str, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.kind = kind
+        self.status = status
+
+    @property
+    def retryable(self) -> bool:
+        return self.kind in (TRANSIENT, RATE_LIMITED)
+
+    @property
+    def permanent(self) -> bool:
+        return self.kind in PERMANENT_KINDS
+
+    @classmethod
+    def from_status(cls, status: int, reason: Optional[str] = None, url: str = "") -> "RedditError":
+        """
+        Classify an error response
+
+        Args:
+            status: HTTP status code
+            reason: `reason` field of Reddit's JSON error body, if any
+            url: Requested URL, included in the message
+        """
+        if reason == "banned":
+            kind = BANNED
+        elif status == 404:
+            kind = NOT_FOUND
+        elif status == 403:
+            kind = FORBIDDEN
+        elif status == 429:
+            kind = RATE_LIMITED
+        elif status >= 500:
+            kind = TRANSIENT
+        else:
+            kind = HTTP_ERROR
+        detail = f" ({reason})" if reason else ""
+        return cls(kind, f"HTTP {status}{detail} for {url}", status)
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter for retryable failures
+
+    The n-th retry waits a random time between 0 and
+    min(max_delay, base_delay * 2 ** n), so clients that failed together
+    do not retry in lockstep. 429s are paced by the RateLimiter from the
+    server's Retry-After instead and are not slept on here.
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0,
+                 retry_statuses: FrozenSet[int] = frozenset({429, 500, 502, 503, 504}),
+                 sleep: Callable[[float], None] = time.sleep,
+                 rand: Callable[[], float] = random.random):
+        """
+        Initialize the retry policy
+
+        Args:
+            max_attempts: Total attempts per request, including the first
+            base_delay: Backoff ceiling of the first retry in seconds
+            max_delay: Upper bound of the backoff ceiling in seconds
+            retry_statuses: HTTP statuses worth retrying
+            sleep: Sleep function (injectable for testing)
+            rand: Uniform [0, 1) random source (injectable for testing)
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_statuses = retry_statuses
+        self.sleep = sleep
+        self.rand = rand
+
+    def delay(self, attempt: int) -> float:
+        """Return the backoff before retry number `attempt` (0-based)"""
+        return self.rand() * min(self.max_delay, self.base_delay * 2 ** attempt)
+
+    def backoff(self, attempt: int, max_wait: Optional[float] = None) -> None:
+        """Sleep before retry number `attempt` (0-based), for at most `max_wait` seconds if given"""
+        delay = self.delay(attempt)
+        self.sleep(delay if max_wait is None else max(0.0, min(delay, max_wait)))
+
+
+class CircuitBreaker:
+    """
+    Per-subreddit circuit breaker
+
+    A subreddit that fails permanently (banned, private, not found) is
+    skipped for `permanent_cooldown` seconds; one that fails transiently
+    `failure_threshold` times in a row is skipped for `cooldown` seconds.
+    After the cooldown a single trial request is let through: success
+    closes the circuit, another failure reopens it. Rate limiting and
+    invalid responses (UNTRACKED_KINDS) are not counted.
+    """
+
+    def __init__(self, failure_threshold: int = 3, cooldown: float = 60,
+                 permanent_cooldown: float = 3600,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the circuit breaker
+
+        Args:
+            failure_threshold: Consecutive transient failures that open the circuit
+            cooldown: Seconds a circuit stays open after transient failures
+            permanent_cooldown: Seconds a circuit stays open after a permanent failure
+            clock: Monotonic clock in seconds (injectable for testing)
+        """
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.permanent_cooldown = permanent_cooldown
+        self.clock = clock
+        self._failures: Dict[str, int] = {}
+        self._open: Dict[str, float] = {}
+        self._errors: Dict[str, RedditError] = {}
+        self._lock = threading.Lock()
+
+    def check(self, key: str) -> None:
+        """
+        Raise a CIRCUIT_OPEN RedditError if requests for `key` should be skipped
+
+        Once the cooldown has passed, the first caller is let through as a
+        trial and the circuit stays open for everyone else until it reports.
+        """
+        key = key.lower()
+        with self._lock:
+            open_until = self._open.get(key)
+            if open_until is None:
+                return
+            now = self.clock()
+            if now >= open_until:
+                # Half-open: hold the circuit open while the trial request runs
+                self._open[key] = now + self.cooldown
+                return
+            error = self._errors[key]
+        raise RedditError(CIRCUIT_OPEN, f"skipped for {open_until - now:.0f}s after: {error}", error.status)
+
+    def record_success(self, key: str) -> None:
+        """Close the circuit for `key`"""
+        key = key.lower()
+        with self._lock:
+            self._failures.pop(key, None)
+            self._open.pop(key, None)
+            self._errors.pop(key, None)
+
+    def record_failure(self, key: str, error: RedditError) -> None:
+        """Count a failure for `key`, opening the circuit if warranted"""
+        if error.kind in UNTRACKED_KINDS:
+            return
+        key = key.lower()
+        with self._lock:
+            failures = self._failures.get(key, 0) + 1
+            self._failures[key] = failures
+            if error.permanent:
+                self._open[key] = self.clock() + self.permanent_cooldown
+            elif failures >= self.failure_threshold or key in self._open:
+                self._open[key] = self.clock() + self.cooldown
+            else:
+                return
+            self._errors[key] = error
+
+    def open_circuits(self) -> Dict[str, str]:
+        """Return the error message of every currently open circuit"""
+        now = self.clock()
+        with self._lock:
+            return {key: str(self._errors[key]) for key, until in self._open.items() if until > now}
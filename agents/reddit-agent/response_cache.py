@@ -0,0 +1,148 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+# Seconds a response stays fresh, by endpoint type
+DEFAULT_TTLS = {
+    "hot": 60,
+    "new": 30,
+    "top": 300,
+    "search": 120,
+    "details": 60,
+}
+
+
+class CacheEntry:
+    """A cached response body with its validators"""
+
+    __slots__ = ("data", "size", "etag", "last_modified", "expires_at")
+
+    def __init__(self, data: Any, size: int, etag: Optional[str], last_modified: Optional[str], expires_at: float):
+        self.data = data
+        self.size = size
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """
+    In-memory TTL + LRU cache for Reddit JSON responses
+
+    Entries are keyed by URL and query parameters and stay fresh for a TTL
+    that depends on the endpoint type (hot, new, top, search, details).
+    Stale entries are kept for conditional revalidation with ETag /
+    If-Modified-Since, so an unchanged listing costs a 304 instead of a
+    full download. The least recently used entries are evicted once
+    either the entry count or the total byte size is exceeded.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 32 * 1024 * 1024,
+                 ttls: Optional[Dict[str, float]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Maximum number of cached responses
+            max_bytes: Maximum total size of cached response bodies
+            ttls: Per endpoint type TTLs in seconds, merged over DEFAULT_TTLS
+            clock: Monotonic clock in seconds (injectable for testing)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+        self.size = 0
+        self._entries: "OrderedDict[Tuple, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(url: str, params: Optional[Dict[str, Any]] = None) -> Tuple:
+        """Build a cache key from a URL and its query parameters"""
+        return (url, tuple(sorted((str(k), str(v)) for k, v in (params or {}).items())))
+
+    @staticmethod
+    def endpoint_type(url: str) -> str:
+        """Classify a Reddit URL as hot, new, top, search or details"""
+        name = urlparse(url).path.rstrip("/").rsplit("/", 1)[-1]
+        name = name[:-5] if name.endswith(".json") else name
+        return name if name in ("hot", "new", "top", "search") else "details"
+
+    def lookup(self, key: Tuple) -> Tuple[Optional[CacheEntry], bool]:
+        """
+        Look up a cached response
+
+        Args:
+            key: Key from make_key()
+
+        Returns:
+            (entry, fresh) tuple; entry is None on a miss, and fresh is False
+            if the entry has expired and must be revalidated
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, False
+            self._entries.move_to_end(key)
+            if self.clock() < entry.expires_at:
+                self.hits += 1
+                return entry, True
+            return entry, False
+
+    def store(self, key: Tuple, data: Any, size: int,
+              etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """
+        Cache a response body
+
+        Args:
+            key: Key from make_key()
+            data: Decoded JSON body
+            size: Size of the raw body in bytes
+            etag: ETag response header, if any
+            last_modified: Last-Modified response header, if any
+        """
+        if size > self.max_bytes:
+            return
+        expires_at = self.clock() + self.ttls[self.endpoint_type(key[0])]
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old.size
+            self._entries[key] = CacheEntry(data, size, etag, last_modified, expires_at)
+            self.size += size
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= evicted.size
+                self.evictions += 1
+
+    def revalidated(self, key: Tuple, entry: CacheEntry) -> None:
+        """Mark a stale entry as confirmed unchanged by a 304 response"""
+        with self._lock:
+            entry.expires_at = self.clock() + self.ttls[self.endpoint_type(key[0])]
+            self.revalidations += 1
+
+    def clear(self) -> None:
+        """Drop every cached entry (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit, miss, revalidation and eviction counters"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidations": self.revalidations,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self.size,
+            }
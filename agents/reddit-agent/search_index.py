@@ -0,0 +1,177 @@
+import hashlib
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Iterable, List, Optional
+
+from models import Comment, Post
+
+SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS post_search USING fts5(
+    title,
+    selftext,
+    comments,
+    post_id UNINDEXED,
+    subreddit UNINDEXED,
+    permalink UNINDEXED,
+    author UNINDEXED,
+    score UNINDEXED,
+    num_comments UNINDEXED,
+    created_utc UNINDEXED,
+    is_self UNINDEXED,
+    tokenize = 'porter unicode61'
+)
+"""
+
+# BM25 column weights: title matches count most, comment matches least
+BM25_WEIGHTS = (4.0, 1.0, 0.5, 0, 0, 0, 0, 0, 0, 0, 0)
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+class SearchIndex:
+    """
+    Offline full-text index of every post a RedditClient has seen
+
+    Backed by an SQLite FTS5 table over titles, selftext and comment
+    bodies, ranked with BM25. Queries never touch the network, and the
+    results of recent queries are memoized until the index changes, so
+    repeat searches answer in milliseconds and are not rate limited.
+    """
+
+    RESULT_CACHE_SIZE = 128
+
+    def __init__(self, path: str = ":memory:"):
+        """
+        Open (or create) the index
+
+        Args:
+            path: SQLite database file (may be shared with PostStore), or
+                ":memory:" for an index that lives as long as the process
+        """
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._results: "OrderedDict[tuple, list]" = OrderedDict()
+        with self._lock:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(SCHEMA)
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+    def add_posts(self, posts: Iterable[Post]) -> None:
+        """
+        Index posts, replacing earlier versions of the same posts
+
+        Comments already indexed for a post are kept when the new version
+        of the post has none loaded (e.g. when it comes from a listing).
+
+        Args:
+            posts: Posts to index
+        """
+        rows = []
+        for post in posts:
+            rows.append((_rowid(post.id), post.title, post.selftext,
+                         _comment_text(post.top_comments) if post.top_comments is not None else None,
+                         post.id, post.subreddit, post.permalink, post.author, post.score,
+                         post.num_comments, post.created_utc, int(post.is_self)))
+        if not rows:
+            return
+        with self._lock, self._conn:
+            self._results.clear()
+            for row in rows:
+                if row[3] is None:
+                    existing = self._conn.execute(
+                        "SELECT comments FROM post_search WHERE rowid = ?", (row[0],)
+                    ).fetchone()
+                    row = row[:3] + (existing[0] if existing else "",) + row[4:]
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO post_search (rowid, title, selftext, comments, post_id, subreddit, "
+                    "permalink, author, score, num_comments, created_utc, is_self) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    row,
+                )
+
+    def search(self, query: str, subreddit: Optional[str] = None, since: Optional[float] = None,
+               until: Optional[float] = None, limit: int = 25) -> List[Post]:
+        """
+        Search indexed posts
+
+        Args:
+            query: Free-text query; every word must match (title, selftext
+                or comments), with stemming
+            subreddit: Only return posts from this subreddit (without 'r/')
+            since: Only return posts created at or after this UNIX time
+            until: Only return posts created before this UNIX time
+            limit: Maximum number of posts to return
+
+        Returns:
+            Matching posts, best BM25 match first
+        """
+        tokens = _TOKEN.findall(query)
+        if not tokens:
+            return []
+        key = (tuple(token.lower() for token in tokens), (subreddit or "").lower(), since, until, limit)
+        with self._lock:
+            rows = self._results.get(key)
+            if rows is not None:
+                self._results.move_to_end(key)
+                return _rows_to_posts(rows)
+        match = " ".join(f'"{token}"' for token in tokens)
+
+        sql = ("SELECT post_id, title, permalink, subreddit, author, score, num_comments, "
+               "created_utc, selftext, is_self FROM post_search WHERE post_search MATCH ?")
+        params: list = [match]
+        if subreddit:
+            sql += " AND subreddit = ? COLLATE NOCASE"
+            params.append(subreddit)
+        if since is not None:
+            sql += " AND created_utc >= ?"
+            params.append(since)
+        if until is not None:
+            sql += " AND created_utc < ?"
+            params.append(until)
+        sql += f" ORDER BY bm25(post_search, {', '.join(str(w) for w in BM25_WEIGHTS)}) LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+            self._results[key] = rows
+            if len(self._results) > self.RESULT_CACHE_SIZE:
+                self._results.popitem(last=False)
+        return _rows_to_posts(rows)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM post_search").fetchone()[0]
+
+
+def _rows_to_posts(rows: List[tuple]) -> List[Post]:
+    return [Post(post_id, title, permalink, subreddit, author, score, num_comments,
+                 created_utc, selftext, bool(is_self))
+            for post_id, title, permalink, subreddit, author, score, num_comments,
+            created_utc, selftext, is_self in rows]
+
+
+def _rowid(post_id: str) -> int:
+    # Reddit IDs are base-36 integers, which makes them stable FTS rowids
+    try:
+        return int(post_id, 36)
+    except ValueError:
+        return int.from_bytes(hashlib.sha1(post_id.encode()).digest()[:7], "big")
+
+
+def _comment_text(comments: List[Comment]) -> str:
+    bodies = []
+    stack = list(comments)
+    while stack:
+        comment = stack.pop()
+        bodies.append(comment.body)
+        if comment.replies:
+            stack.extend(comment.replies)
+    return "\n".join(bodies)
@@ -0,0 +1,115 @@
+import asyncio
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Call:
+    """One in-flight call and the outcome its waiters will share"""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Collapses identical concurrent calls into one
+
+    The first caller for a key runs the function; callers arriving with
+    the same key while it is still running wait for it and receive the
+    same result (or exception) instead of starting their own call. Once
+    the call finishes the key is released, so later calls run again.
+
+    Works across threads; asyncio tasks use `do_async`, which waits in a
+    worker thread and therefore also coalesces with threaded callers.
+
+    A single instance is shared by every RedditClient in the process (see
+    `shared()`), so concurrent Streamlit sessions asking for the same
+    listing trigger one request between them.
+    """
+
+    _shared: Optional["SingleFlight"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._in_flight: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> "SingleFlight":
+        """Return the process-wide instance, creating it on first use"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Run `fn`, or wait for an identical call already in flight
+
+        Args:
+            key: Identifies calls that are interchangeable
+            fn: Function to call if no call with `key` is in flight
+
+        Returns:
+            The result of the (possibly shared) call; its exception is
+            raised in every waiter
+        """
+        return self.run(key, fn)[0]
+
+    def run(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Like do(), but also tell the caller whether it got another caller's result
+
+        Args:
+            key: Identifies calls that are interchangeable
+            fn: Function to call if no call with `key` is in flight
+
+        Returns:
+            (result, shared) tuple; shared is True if `fn` was not called
+            because an identical call was already in flight
+        """
+        with self._lock:
+            call = self._in_flight.get(key)
+            if call is None:
+                call = self._in_flight[key] = _Call()
+                leader = True
+                self.calls += 1
+            else:
+                leader = False
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            call.done.set()
+        return call.result, False
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Async version of do(); `fn` runs in a worker thread"""
+        return await asyncio.to_thread(self.do, key, fn)
+
+    def stats(self) -> Dict[str, int]:
+        """Return upstream calls made, calls saved by coalescing and calls in flight"""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._in_flight),
+            }
@@ -1,8 +1,10 @@
 # Import the email function at the top with other imports
 import streamlit as st
 import os
+import sys
 import time
 import json
+import uuid
 from datetime import datetime
 from typing import List, Dict, Any
 from anthropic import Anthropic
@@ -10,8 +12,24 @@ from toolhouse import Toolhouse, Provider
 
 import pandas as pd
 
+# Make the shared agent_runtime package (at the repository root) importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from agent_runtime import AgentRuntime, ToolResult, ToolSchemaCache, send_email
+
 # Import the Reddit client
 from reddit import RedditClient
+from dedup import NearDuplicateDetector
+from engagement import (BATCH, BATCH_PROMPT, BATCH_SUBMIT_PROMPT, PER_POST, RESPONSE_TOOL, extract_payload,
+                        format_analysis, format_email_html, format_posts_for_prompt, index_posts,
+                        iter_generated_responses, parse_responses, prompt_version)
+from generation_cache import GeneratedResponseCache
+from jobs import Job, JobRunner
+from metrics import ClientMetrics
+from post_store import PostStore
+from ranking import EngagementRanker
+from response_cache import ResponseCache
+from search_index import SearchIndex
+from watcher import SubredditWatcher
 
 
 # Set page configuration
@@ -67,16 +85,12 @@ st.sidebar.header("API Configuration")
 anthropic_api_key_input = st.sidebar.text_input("Anthropic API Key", type="password")
 toolhouse_api_key_input = st.sidebar.text_input("Toolhouse API Key", type="password")
 
+# The model clients are cached per key pair (see initialize_clients), so a new key
+# needs no cache clearing that would also drop other sessions' clients and jobs
 if anthropic_api_key_input:
-    # Clear cached resources when API key changes
-    if "ANTHROPIC_API_KEY" not in st.session_state or st.session_state["ANTHROPIC_API_KEY"] != anthropic_api_key_input:
-        st.cache_resource.clear()
     st.session_state["ANTHROPIC_API_KEY"] = anthropic_api_key_input
     
 if toolhouse_api_key_input:
-    # Clear cached resources when API key changes
-    if "TOOLHOUSE_API_KEY" not in st.session_state or st.session_state["TOOLHOUSE_API_KEY"] != toolhouse_api_key_input:
-        st.cache_resource.clear()
     st.session_state["TOOLHOUSE_API_KEY"] = toolhouse_api_key_input
 
 # Initialize session state
@@ -90,6 +104,9 @@ if 'email_sent' not in st.session_state:
     st.session_state.email_sent = False
 if 'messages' not in st.session_state:
     st.session_state.messages = []
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+session_id = st.session_state.session_id
 
 # Popular Subreddits
 POPULAR_SUBREDDITS = [
@@ -99,44 +116,56 @@ POPULAR_SUBREDDITS = [
 ]
 
 # Initialize clients
-@st.cache_resource
-def initialize_clients():
-    """Initialize Reddit, Anthropic, and Toolhouse clients"""
-    # Initialize clients
-    anthropic_client = Anthropic(api_key=st.session_state.get("ANTHROPIC_API_KEY", ""))
+@st.cache_resource(max_entries=16)
+def initialize_clients(anthropic_api_key: str, toolhouse_api_key: str):
+    """Initialize the Anthropic and Toolhouse clients for a pair of API keys"""
+    anthropic_client = Anthropic(api_key=anthropic_api_key)
     
     # Fix: Use proper Toolhouse initialization with API key
-    # Note: Use the API key from session state, not directly from the input
-    th_client = Toolhouse(api_key=st.session_state.get("TOOLHOUSE_API_KEY", ""), 
-                         provider=Provider.ANTHROPIC)
+    th_client = Toolhouse(api_key=toolhouse_api_key, provider=Provider.ANTHROPIC)
     
-    reddit_client = RedditClient(user_agent="RedditEngagementAssistant/1.0")
+    # Fetch the Toolhouse tool schemas once instead of on every model call
+    tool_schemas = ToolSchemaCache(th_client)
     
-    return anthropic_client, th_client, reddit_client
+    return anthropic_client, th_client, tool_schemas
+
+@st.cache_resource
+def initialize_reddit_client():
+    """Initialize the Reddit client, shared by every session"""
+    # Cache listings so reruns and repeated fetches within the TTL skip the network,
+    # keep fetched posts on disk so "New" refreshes only download newer posts,
+    # and index everything fetched for offline search
+    db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "reddit_posts.db")
+    reddit_client = RedditClient(user_agent="RedditEngagementAssistant/1.0", cache=ResponseCache(),
+                                 store=PostStore(db_path), index=SearchIndex(db_path),
+                                 metrics=ClientMetrics())
+    return reddit_client
+
+anthropic_client, th_client, tool_schemas = initialize_clients(st.session_state.get("ANTHROPIC_API_KEY", ""),
+                                                               st.session_state.get("TOOLHOUSE_API_KEY", ""))
+reddit_client = initialize_reddit_client()
+
+@st.cache_resource
+def initialize_generation_cache():
+    """Open the persistent cache of generated responses, shared by every session"""
+    return GeneratedResponseCache(os.path.join(os.path.dirname(os.path.abspath(__file__)), "reddit_posts.db"))
+
+generation_cache = initialize_generation_cache()
 
-anthropic_client, th_client, reddit_client = initialize_clients()
+@st.cache_resource
+def initialize_job_runner():
+    """Start the background runner for fetch and generation jobs, shared by every session"""
+    return JobRunner(max_workers=4)
+
+job_runner = initialize_job_runner()
 
-def send_engagement_email(anthropic_client, th_client, email_address, subject, email_content):
+def send_engagement_email_with_llm(anthropic_client, th_client, tool_schemas, email_address, subject,
+                                   email_content) -> ToolResult:
     """
-    A dedicated function to send emails via Toolhouse.ai
-    
-    Parameters:
-    -----------
-    anthropic_client : Anthropic
-        Initialized Anthropic client
-    th_client : Toolhouse
-        Initialized Toolhouse client
-    email_address : str
-        Recipient email address
-    subject : str
-        Email subject line
-    email_content : str
-        The formatted email content (markdown formatted)
+    Send an email by asking the model to call Toolhouse's send_email tool
     
-    Returns:
-    --------
-    bool
-        True if email was successfully sent, False otherwise
+    Slower and limited by the output token budget; only used as a fallback
+    when the direct send_email call fails and the user opted in.
     """
     # Create a system prompt specifically for email sending
     email_system_prompt = """
@@ -168,26 +197,76 @@ def send_engagement_email(anthropic_client, th_client, email_address, subject, e
     email_messages = [{"role": "user", "content": email_message}]
     
     # Generate response using Anthropic model with Toolhouse tools
+    start = time.perf_counter()
     try:
         response = anthropic_client.messages.create(
             model="claude-3-7-sonnet-20250219",
             max_tokens=1024,
             system=email_system_prompt,
-            tools=th_client.get_tools(),
+            tools=tool_schemas.get(),
             messages=email_messages
         )
         
         # Run tools based on the response
         email_result = th_client.run_tools(response)
         
-        # Check if email was sent successfully
-        email_success = any("send_email" in str(msg) for msg in email_result)
-        
-        return email_success
+        # The model may answer without calling the tool
+        if not any(getattr(block, "type", None) == "tool_use" and block.name == "send_email"
+                   for block in response.content):
+            return ToolResult("send_email", {}, error="The model did not call send_email", error_kind="not_run",
+                              elapsed=time.perf_counter() - start)
+        return ToolResult("send_email", {}, str(email_result), elapsed=time.perf_counter() - start)
     
     except Exception as e:
         print(f"Error sending email: {str(e)}")
-        return False
+        return ToolResult("send_email", {}, error=str(e), error_kind="transport", elapsed=time.perf_counter() - start)
+
+def send_engagement_email(anthropic_client, th_client, tool_schemas, email_address, subject, email_content,
+                          html_content=None, llm_fallback=False) -> ToolResult:
+    """
+    A dedicated function to send emails via Toolhouse.ai
+    
+    Calls the send_email tool directly with the finished content: no model
+    round trip, no token cost and no truncation. The model-driven path is
+    only tried when the direct call fails and llm_fallback is set.
+    
+    Parameters:
+    -----------
+    anthropic_client : Anthropic
+        Initialized Anthropic client (used only for the fallback)
+    th_client : Toolhouse
+        Initialized Toolhouse client
+    tool_schemas : ToolSchemaCache
+        Cached tool schemas of th_client
+    email_address : str
+        Recipient email address
+    subject : str
+        Email subject line
+    email_content : str
+        The formatted email content (markdown formatted)
+    html_content : str, optional
+        HTML version of the content, sent instead of email_content
+    llm_fallback : bool
+        Let the model send the email if the direct call fails
+    
+    Returns:
+    --------
+    ToolResult
+        Check `ok`; `error` and `error_kind` describe a failure
+    """
+    try:
+        tools = tool_schemas.get()
+    except Exception as e:
+        print(f"Error loading Toolhouse tools: {str(e)}")
+        tools = None
+    
+    result = send_email(th_client, email_address, subject, html_content or email_content, tools=tools)
+    if not result.ok:
+        print(f"Error sending email ({result.error_kind}): {result.error}")
+        if llm_fallback:
+            result = send_engagement_email_with_llm(anthropic_client, th_client, tool_schemas, email_address, subject,
+                                                    email_content)
+    return result
 
 # System prompt for the assistant
 def create_system_prompt() -> str:
@@ -206,21 +285,182 @@ Your response should be:
 - Sound natural, not corporate or robotic
 - Encourage further conversation
 
-REQUIRED FORMAT - You MUST present your responses in a properly formatted markdown table with these EXACT columns:
-| Post Title | Suggested Response | Engagement Potential |
-
-Include a header row and separator row like this:
-| Post Title | Suggested Response | Engagement Potential |
-|-----------|-------------------|---------------------|
-
-For each post:
-1. Post Title: Use the exact title of the post (no need for links)
-2. Suggested Response: Write a brief, engaging comment (2-3 sentences)
-3. Engagement Potential: Rate as "High", "Medium", or "Low"
+REQUIRED FORMAT - When asked for your responses, submit them with the submit_responses tool,
+one entry per post:
+1. post_id: The exact ID from the post's "ID:" line
+2. suggested_response: A brief, engaging comment (2-3 sentences)
+3. engagement_potential: "High", "Medium", or "Low"
+4. rationale: One sentence on why the comment should get upvotes
 
 Remember: Reddit rewards authenticity and value. No fluff or jargon.
 """
 
+def render_response_card(post_id: str, data: Dict[str, Any], interactive: bool = True) -> None:
+    """Render one generated response; interactive=False omits widgets (for cards shown while generating)"""
+    post = data['post']
+    suggested_response = data['suggested_response']
+    engagement_potential = data['engagement_potential']
+    
+    # Create a card-like container for each response
+    with st.container():
+        st.markdown("""
+        <style>
+        .response-card {
+            border: 1px solid #e6e6e6;
+            border-radius: 8px;
+            padding: 15px;
+            margin-bottom: 20px;
+            background-color: white;
+            box-shadow: 0 2px 5px rgba(0,0,0,0.05);
+        }
+        </style>
+        """, unsafe_allow_html=True)
+        
+        st.markdown(f"<div class='response-card'>", unsafe_allow_html=True)
+        
+        # Post title and link, marked when the response came from the generation cache
+        cached_badge = " <span style='font-size: 0.8em; color: #6c757d;'>⚡ Cached</span>" if data.get('cached') else ""
+        st.markdown(f"<div class='post-title'>{post['title']}{cached_badge}</div>", unsafe_allow_html=True)
+        st.markdown(f"<div class='post-info'>r/{post['subreddit']} • <a href='{post['url']}' target='_blank' class='reddit-link'>View on Reddit</a></div>", unsafe_allow_html=True)
+        
+        # Add post preview if it's a text post
+        if post.get('is_self', False) and post.get('selftext', ''):
+            preview = post['selftext'][:150] + "..." if len(post['selftext']) > 150 else post['selftext']
+            with st.expander("Show Post Content", expanded=False):
+                st.markdown(preview)
+        
+        # Suggested response with improved formatting
+        st.markdown("<br><span style='font-weight: bold; color: #0078D7;'>Suggested Response:</span>", unsafe_allow_html=True)
+        st.markdown(f"<div class='response-box'>{suggested_response}</div>", unsafe_allow_html=True)
+        
+        # Engagement potential with colored indicator
+        potential_color = "#2E8B57" if engagement_potential.lower() == "high" else "#FFA500" if engagement_potential.lower() == "medium" else "#6495ED"
+        st.markdown(f"<span style='font-weight: bold;'>Engagement Potential:</span> <span style='color: {potential_color}; font-weight: bold;'>{engagement_potential}</span>", unsafe_allow_html=True)
+        
+        # Copy button for the response
+        if interactive and st.button("Copy to Clipboard", key=f"copy_{post_id}"):
+            st.code(suggested_response)
+            st.success("Response copied! You can now paste it on Reddit.")
+        
+        st.markdown("</div>", unsafe_allow_html=True)
+
+def fetch_posts_job(job: Job, reddit_client: RedditClient, subreddits: List[str], post_type: str, limit: int,
+                    timeframe: str, collapse_duplicates: bool, rank_posts: bool) -> Dict[str, Any]:
+    """Background job: fetch, collapse and rank posts; returns the posts and notes to show"""
+    def report(result, done, total):
+        job.report(done / total, f"Fetched r/{result.subreddit} ({done} of {total})")
+    
+    results = reddit_client.fetch_subreddits(subreddits, post_type, limit, timeframe, on_result=report)
+    if job.cancelled:
+        return {}
+    
+    posts, notes = [], []
+    for result in results:
+        if result.error_kind == "circuit_open":
+            notes.append(("info", f"Skipped r/{result.subreddit}: {result.error}"))
+        elif not result.ok:
+            notes.append(("warning", f"Could not fetch r/{result.subreddit}: {result.error}"))
+        elif result.empty:
+            notes.append(("info", f"r/{result.subreddit} has no {post_type} posts"))
+        posts.extend(result.posts)
+    
+    if collapse_duplicates:
+        fetched = len(posts)
+        posts = NearDuplicateDetector().deduplicate(posts)
+        if len(posts) < fetched:
+            notes.append(("info", f"Collapsed {fetched - len(posts)} duplicate posts"))
+    
+    if rank_posts:
+        posts = EngagementRanker().top_k(posts, len(posts))
+    return {"posts": posts, "notes": notes}
+
+def generate_responses_job(job: Job, anthropic_client: Anthropic, th_client: Toolhouse, tool_schemas: ToolSchemaCache,
+                           reddit_client: RedditClient, generation_cache: GeneratedResponseCache, posts_by_id: Dict[str, Any],
+                           cached: Dict[str, Dict[str, Any]], generation_mode: str, system_prompt: str,
+                           version: str) -> Dict[str, Any]:
+    """Background job: generate responses for the uncached posts; partial results are (post_id, response) pairs"""
+    for post_id, data in cached.items():
+        job.report(partial=(post_id, data))
+    pending_posts = [post for post_id, post in posts_by_id.items() if post_id not in cached]
+    generated, payload, problems, messages, research_steps = {}, None, [], [], []
+    
+    # Fetch comment context for every pending post concurrently
+    job.report(0.0, "Loading comments...")
+    post_details = {}
+    selected_urls = [post['url'] for post in pending_posts]
+    for done, result in enumerate(reddit_client.iter_post_details(selected_urls, timeout=10), 1):
+        if result.ok:
+            post_details[result.url] = result.post
+        job.report(0.2 * done / len(set(selected_urls)), f"Loaded comments for {done} posts")
+    
+    if job.cancelled:
+        return {}
+    
+    if generation_mode == "Per Post (Parallel)":
+        # One small request per post; each response becomes visible as soon as its request finishes
+        for done, result in enumerate(iter_generated_responses(anthropic_client, pending_posts, system_prompt,
+                                                               post_details, max_workers=4, timeout=60), 1):
+            if result.ok:
+                generated[result.post_id] = result.response
+                job.report(partial=(result.post_id, result.response))
+            else:
+                problems.append(f"No response for post {result.post_id} ({result.post['title']}): {result.error}")
+            job.report(0.2 + 0.8 * done / len(pending_posts), f"Generated {done} of {len(pending_posts)} responses")
+            if job.cancelled:
+                return {}
+    elif pending_posts:
+        # Create a message to Claude
+        formatted_posts = format_posts_for_prompt(pending_posts, post_details)
+        user_message = BATCH_PROMPT.format(posts=formatted_posts)
+        
+        # Add user message to message history
+        messages = [{"role": "user", "content": user_message}]
+        
+        # Step 1: Research the posts with tools until the model has what it needs;
+        # tool calls from the same response run concurrently
+        job.report(0.3, "Researching posts...")
+        runtime = AgentRuntime(anthropic_client, th_client, model="claude-3-7-sonnet-20250219", system=system_prompt,
+                               tool_schemas=tool_schemas)
+        research = runtime.run(messages, max_steps=4,
+                               on_step=lambda step: job.report(message=f"Researching posts (step {step.number})..."))
+        research_steps = [repr(step) for step in research.steps]
+        
+        # Combine original user message with the research for the final response
+        final_messages = messages + research.messages
+        notes = [block for block in research.response.content if getattr(block, "type", None) == "text"]
+        if notes:
+            final_messages.append({"role": "assistant", "content": notes})
+        
+        # Step 2: Generate final response with the research incorporated
+        final_user_message = BATCH_SUBMIT_PROMPT.format(tool=RESPONSE_TOOL['name'])
+        
+        final_messages.append({"role": "user", "content": final_user_message})
+        
+        # Force structured output: the reply is a validated tool call, not a table to scrape
+        job.report(0.6, "Writing responses...")
+        final_response = anthropic_client.messages.create(
+            model="claude-3-7-sonnet-20250219",
+            max_tokens=2048,
+            system=system_prompt,
+            tools=[RESPONSE_TOOL],
+            tool_choice={"type": "tool", "name": RESPONSE_TOOL['name']},
+            messages=final_messages
+        )
+        
+        try:
+            payload = extract_payload(final_response.content)
+            generated, problems = parse_responses(payload, index_posts(pending_posts))
+        except ValueError as e:
+            payload, problems = None, [f"Could not read structured responses: {str(e)}"]
+    
+    generation_cache.put_many(generated, version)
+    
+    # Show the cards in selection order, not completion order
+    responses = {post_id: cached.get(post_id) or generated[post_id]
+                 for post_id in posts_by_id if post_id in cached or post_id in generated}
+    return {"responses": responses, "payload": payload, "problems": problems, "messages": messages,
+            "research_steps": research_steps}
+
 # Sidebar
 with st.sidebar:
     st.markdown("<h2 style='text-align: center; color: #FF4500;'>Reddit Engagement Assistant</h2>", unsafe_allow_html=True)
@@ -255,15 +495,44 @@ with st.sidebar:
     # Limit posts per subreddit
     posts_per_subreddit = st.slider("Posts per Subreddit:", 1, 10, 3)
     
+    # Keep one copy of crossposts and near-identical posts, so each gets only one response
+    collapse_duplicates = st.checkbox("Collapse Crossposts and Near-Duplicates", value=True)
+    
+    # One concurrent request per post, or all posts in one prompt
+    generation_mode = st.radio("Generation Mode:", ["Per Post (Parallel)", "Single Batch"])
+    
+    # Order fetched posts by velocity, comment activity and recency instead of fetch order
+    rank_posts = st.checkbox("Rank by Engagement Opportunity", value=True)
+    
     # Fetch posts button
     fetch_button = st.button("Fetch Posts", type="primary")
     
+    # Search posts fetched earlier without calling Reddit
+    local_query = st.text_input("Search Fetched Posts:", placeholder="e.g., fine-tuning")
+    search_button = st.button("Search Offline")
+    
+    # Poll the selected subreddits for posts that appeared since the last check
+    watch_button = st.button("Check for New Posts")
+    
+    with st.expander("Cache Statistics", expanded=False):
+        st.json({"cache": reddit_client.cache.stats(), "coalescing": reddit_client.single_flight.stats(),
+                 "store": reddit_client.store.stats(), "generated_responses": generation_cache.stats(),
+                 "tool_schemas": tool_schemas.stats(), "indexed_posts": len(reddit_client.index)})
+    
+    with st.expander("Request Metrics", expanded=False):
+        st.code(reddit_client.metrics.to_prometheus(), language="text")
+        st.download_button("Download JSON Lines", reddit_client.metrics.to_json_lines(),
+                           file_name="reddit_metrics.jsonl", mime="application/x-ndjson")
+    
     st.markdown("---")
     
     # Email section
     st.subheader("Email Options")
     email_address = st.text_input("Email Address:", placeholder="your@email.com")
     
+    # Emails go straight to the send_email tool; optionally let the model retry a failed send
+    llm_email_fallback = st.checkbox("Retry Failed Sends via AI", value=False)
+    
     # Email options
     if st.session_state.responses:
         email_button = st.button("Email Responses", type="secondary")
@@ -294,20 +563,46 @@ tab1, tab2, tab3 = st.tabs(["📊 Reddit Posts", "💬 Responses", "📧 Email"]
 # Tab 1: Reddit Posts
 with tab1:
     if fetch_button and selected_subreddits:
-        # Clear previous posts
+        # Clear previous posts and fetch in the background; reruns pick the job up instead of restarting it
         st.session_state.posts = []
-        
-        with st.spinner(f"Fetching {post_type.lower()} posts from {', '.join(['r/' + sub for sub in selected_subreddits])}..."):
-            for subreddit in selected_subreddits:
-                if post_type == "Hot":
-                    posts = reddit_client.get_hot_posts(subreddit, posts_per_subreddit)
-                elif post_type == "New":
-                    posts = reddit_client.get_new_posts(subreddit, posts_per_subreddit)
-                else:  # Top
-                    posts = reddit_client.get_top_posts(subreddit, timeframe, posts_per_subreddit)
-                
-                st.session_state.posts.extend(posts)
-                time.sleep(0.5)  # To avoid hitting rate limits
+        job_runner.submit(session_id, "fetch", fetch_posts_job, reddit_client, selected_subreddits,
+                          post_type.lower(), posts_per_subreddit, timeframe, collapse_duplicates, rank_posts)
+    
+    fetch_job = job_runner.get(session_id, "fetch")
+    fetching = fetch_job is not None and not fetch_job.done
+    if fetching:
+        state = fetch_job.snapshot()
+        st.progress(state["progress"], text=state["message"] or "Fetching posts...")
+    elif fetch_job is not None:
+        job_runner.pop(session_id, "fetch")
+        state = fetch_job.snapshot()
+        if state["status"] == "done":
+            st.session_state.posts = state["result"]["posts"]
+            for level, note in state["result"]["notes"]:
+                getattr(st, level)(note)
+        elif state["status"] == "failed":
+            st.error(f"Could not fetch posts: {state['error']}")
+    
+    if search_button and local_query:
+        st.session_state.posts = reddit_client.search_local(local_query, limit=25)
+    
+    if watch_button and selected_subreddits:
+        watcher = st.session_state.get('watcher')
+        if watcher is None or set(watcher.intervals) != set(selected_subreddits):
+            # Posts on screen seed the seen-set, so the first poll can already report
+            # newer ones; with nothing on screen, the first poll only primes it
+            watcher = SubredditWatcher(reddit_client, selected_subreddits, limit=posts_per_subreddit,
+                                       skip_existing=not st.session_state.posts)
+            watcher.mark_seen(st.session_state.posts)
+            st.session_state.watcher = watcher
+        with st.spinner("Checking for new posts..."):
+            new_posts = watcher.poll_due(force=True)
+        for subreddit, error in watcher.errors.items():
+            st.warning(f"Could not check r/{subreddit}: {error}")
+        if new_posts:
+            st.session_state.posts = new_posts[::-1] + st.session_state.posts
+        else:
+            st.info("No new posts since the last check")
     
     if st.session_state.posts:
         st.markdown(f"<h2 class='sub-header'>Found {len(st.session_state.posts)} Posts</h2>", unsafe_allow_html=True)
@@ -348,6 +643,7 @@ with tab1:
             if st.button("Generate Responses for Selected Posts", type="primary"):
                 # Clear previous responses
                 st.session_state.responses = {}
+                st.session_state.generated_for = None
                 
                 # Switch to responses tab
                 st.session_state.active_tab = "responses"
@@ -355,7 +651,11 @@ with tab1:
         else:
             st.info("Select posts to generate engagement responses")
     
-    elif not fetch_button:
+    elif search_button and local_query:
+        st.warning("No fetched posts match your search.")
+    elif fetching:
+        pass
+    elif not fetch_button and fetch_job is None:
         st.info("Select subreddits and click 'Fetch Posts' to begin")
     else:
         st.warning("No posts found. Try different subreddits or post types.")
@@ -365,246 +665,61 @@ with tab2:
     if hasattr(st.session_state, 'active_tab') and st.session_state.active_tab == "responses":
         st.session_state.active_tab = None  # Reset
 
-    if st.session_state.selected_posts and not st.session_state.responses:
-        with st.spinner("Generating optimized responses for maximum engagement..."):
-            # Clear previous messages when generating new responses
-            st.session_state.messages = []
-            
-            # Format posts for Claude in a simpler way
-            formatted_posts = "Here are the Reddit posts to respond to:\n\n"
-            for i, post in enumerate(st.session_state.selected_posts, 1):
-                formatted_posts += f"POST {i}:\n"
-                formatted_posts += f"Title: {post['title']}\n"
-                formatted_posts += f"Subreddit: r/{post['subreddit']}\n"
-                
-                # Include post content if it's a text post
-                if post.get('is_self', False) and post.get('selftext', ''):
-                    # Truncate very long self texts
-                    selftext = post['selftext']
-                    if len(selftext) > 300:
-                        selftext = selftext[:300] + "..."
-                    formatted_posts += f"Content: {selftext}\n"
-                
-                formatted_posts += f"URL: {post['url']}\n\n"
-
-            # Create a message to Claude
-            user_message = f"Help me write engaging Reddit responses for these posts. For each one, give me a brief but valuable response that would likely get upvotes. Format your response in a table with Post Title, Suggested Response, and Engagement Potential columns.\n\n{formatted_posts}"
-            
-            # Add user message to message history
-            st.session_state.messages = [{"role": "user", "content": user_message}]
-            
-            # Step 1: Generate initial response with tools
-            response = anthropic_client.messages.create(
-                model="claude-3-7-sonnet-20250219",
-                max_tokens=1024,
-                system=create_system_prompt(),
-                tools=th_client.get_tools(),
-                messages=[{"role": "user", "content": user_message}]
-            )
-            
-            # Step 2: Run tools based on response (if any tools were called)
-            tool_results = th_client.run_tools(response)
-            
-            # Combine original user message with tool results for final response
-            final_messages = [{"role": "user", "content": user_message}]
-            if tool_results:
-                final_messages.extend(tool_results)
-            
-            # Step 3: Generate final response with tool results incorporated
-            # Force a direct response by adding specific instructions to generate a table
-            final_user_message = """
-I need you to provide engaging Reddit responses for the posts I shared earlier.
-IMPORTANT: Present your responses in a markdown table with these exact columns:
-| Post Title | Suggested Response | Engagement Potential |
-
-For each post, provide:
-1. The exact post title
-2. A 2-3 sentence response that would get upvotes
-3. Rate the engagement potential as High, Medium, or Low
-
-Please format as a proper markdown table, including the header row and separator row.
-"""
-            
-            final_messages.append({"role": "user", "content": final_user_message})
-            
-            # Get final response with explicit table request
-            final_response = anthropic_client.messages.create(
-                model="claude-3-7-sonnet-20250219",
-                max_tokens=1024,
-                system=create_system_prompt(),
-                messages=final_messages
-            )
-            
-            # Extract text content from response
-            agent_reply = ""
-            for content_block in final_response.content:
-                if hasattr(content_block, "text"):
-                    agent_reply += content_block.text
+    # Generate once per selection, even if no valid responses came back
+    selection_ids = list(index_posts(st.session_state.selected_posts))
+    if (st.session_state.selected_posts and not st.session_state.responses
+            and st.session_state.get('generated_for') != selection_ids):
+        st.session_state.generated_for = selection_ids
+        # Clear previous messages when generating new responses
+        st.session_state.messages = []
+        
+        # Label every post with its ID; responses are matched back by ID only
+        posts_by_id = index_posts(st.session_state.selected_posts)
+        
+        # Responses generated earlier for the same post content and prompt render instantly
+        version = prompt_version(create_system_prompt(),
+                                 PER_POST if generation_mode == "Per Post (Parallel)" else BATCH)
+        cached = generation_cache.get_many(posts_by_id, version)
+        job_runner.submit(session_id, "generate", generate_responses_job, anthropic_client, th_client,
+                          tool_schemas, reddit_client, generation_cache, posts_by_id, cached, generation_mode,
+                          create_system_prompt(), version)
+    
+    generate_job = job_runner.get(session_id, "generate")
+    if generate_job is not None and not generate_job.done:
+        # Show cached and finished responses while the rest are generated
+        state = generate_job.snapshot()
+        st.progress(state["progress"], text=state["message"] or "Generating optimized responses for maximum engagement...")
+        for post_id, data in state["partial"]:
+            render_response_card(post_id, data, interactive=False)
+    elif generate_job is not None:
+        job_runner.pop(session_id, "generate")
+        state = generate_job.snapshot()
+        if state["status"] == "failed":
+            st.error(f"Could not generate responses: {state['error']}")
+        elif state["status"] == "done":
+            result = state["result"]
+            payload, problems = result["payload"], result["problems"]
+            st.session_state.responses = result["responses"]
+            st.session_state.messages = result["messages"]
+            st.session_state.debug_info = {"parsing_steps": problems,
+                                           "responses_found": len(st.session_state.responses),
+                                           "research_steps": result["research_steps"],
+                                           "cached": sum(1 for data in st.session_state.responses.values()
+                                                         if data.get('cached'))}
             
             # Add AI's response to message history
-            st.session_state.messages.append({"role": "assistant", "content": agent_reply})
+            st.session_state.messages.append({"role": "assistant",
+                                              "content": format_analysis(st.session_state.responses)})
             
             # Add debug expander to show raw response
-            with st.expander("Debug: Raw Response", expanded=False):
-                st.code(agent_reply, language="markdown")
+            if payload is not None:
+                with st.expander("Debug: Raw Response", expanded=False):
+                    st.code(json.dumps(payload, indent=2), language="json")
             
-            # Parse the table from the response and create structured data for each post
-            try:
-                # Enhanced debugging
-                st.session_state.debug_info = {"parsing_steps": []}
-                
-                # Simple table parsing
-                lines = agent_reply.split('\n')
-                table_start = -1
-                table_end = -1
-                
-                # Add debug info
-                st.session_state.debug_info["parsing_steps"].append(f"Total lines in response: {len(lines)}")
-                
-                # Find the table boundaries
-                for i, line in enumerate(lines):
-                    if '|' in line and ('Post Title' in line or 'Reddit Post' in line or 'Post' in line):
-                        table_start = i
-                        st.session_state.debug_info["parsing_steps"].append(f"Found table header at line {i}: {line}")
-                        break
-                
-                # Find separator line (contains only |, -, and spaces)
-                if table_start != -1:
-                    separator_line = table_start + 1
-                    if separator_line < len(lines) and all(c in '|-: ' for c in lines[separator_line]):
-                        st.session_state.debug_info["parsing_steps"].append(f"Found separator at line {separator_line}: {lines[separator_line]}")
-                    else:
-                        st.session_state.debug_info["parsing_steps"].append(f"Warning: No proper separator line found after header")
-                
-                # Find end of table
-                if table_start != -1:
-                    for i in range(table_start + 2, len(lines)):
-                        if not lines[i].strip() or '|' not in lines[i]:
-                            table_end = i
-                            st.session_state.debug_info["parsing_steps"].append(f"Found table end at line {i}")
-                            break
-                
-                if table_end == -1:
-                    table_end = len(lines)
-                    st.session_state.debug_info["parsing_steps"].append(f"Table extends to end of response")
-                
-                # Extract table rows
-                if table_start != -1:
-                    st.session_state.debug_info["parsing_steps"].append(f"Processing table rows from {table_start+2} to {table_end}")
-                    
-                    for i in range(table_start + 2, table_end):  # Skip header and separator
-                        if '|' in lines[i]:
-                            cells = [cell.strip() for cell in lines[i].split('|')]
-                            st.session_state.debug_info["parsing_steps"].append(f"Row {i} has {len(cells)} cells: {cells}")
-                            
-                            if len(cells) >= 3:  # Accounting for empty cells at start/end
-                                # Extract post title/link (accounting for various formats)
-                                title_cell = cells[1] if len(cells) > 1 else ""
-                                response_cell = cells[2] if len(cells) > 2 else ""
-                                potential_cell = cells[3] if len(cells) > 3 else "Medium"
-                                
-                                url = ""
-                                title = title_cell
-                                
-                                # Try to extract URL if it's in markdown format
-                                if '[' in title_cell and ']' in title_cell and '(' in title_cell and ')' in title_cell:
-                                    title = title_cell.split('[')[1].split(']')[0]
-                                    url = title_cell.split('(')[1].split(')')[0]
-                                    st.session_state.debug_info["parsing_steps"].append(f"Extracted title: {title}, URL: {url}")
-                                
-                                # Find the matching post
-                                matching_post = None
-                                for post in st.session_state.selected_posts:
-                                    if post['title'] == title or post['url'] == url:
-                                        matching_post = post
-                                        st.session_state.debug_info["parsing_steps"].append(f"Found exact match for: {title}")
-                                        break
-                                
-                                # If no exact match, try partial match on title
-                                if not matching_post:
-                                    for post in st.session_state.selected_posts:
-                                        if title.lower() in post['title'].lower() or post['title'].lower() in title.lower():
-                                            matching_post = post
-                                            st.session_state.debug_info["parsing_steps"].append(f"Found partial match: {title} ~ {post['title']}")
-                                            break
-                                
-                                # If still no match, use the first unmatched post
-                                if not matching_post and st.session_state.selected_posts:
-                                    for post in st.session_state.selected_posts:
-                                        if post['url'] not in st.session_state.responses:
-                                            matching_post = post
-                                            st.session_state.debug_info["parsing_steps"].append(f"Using first unmatched post as fallback: {post['title']}")
-                                            break
-                                
-                                if matching_post:
-                                    # Store the suggested response
-                                    st.session_state.responses[matching_post['url']] = {
-                                        'post': matching_post,
-                                        'suggested_response': response_cell,
-                                        'engagement_potential': potential_cell
-                                    }
-                                    st.session_state.debug_info["parsing_steps"].append(f"Stored response for: {matching_post['title']}")
-                
-                # If no responses were parsed from the table, create responses for each post
-                if not st.session_state.responses:
-                    st.session_state.debug_info["parsing_steps"].append("Table parsing failed, trying alternative extraction")
-                    
-                    # First try to look for post titles directly
-                    for post in st.session_state.selected_posts:
-                        post_title = post['title']
-                        response_text = ""
-                        potential = "Medium"
-                        
-                        for i, line in enumerate(lines):
-                            # Check if this line contains the post title
-                            if post_title.lower() in line.lower():
-                                st.session_state.debug_info["parsing_steps"].append(f"Found title '{post_title}' at line {i}")
-                                
-                                # Look for response in the next few lines
-                                for j in range(i+1, min(i+5, len(lines))):
-                                    if lines[j].strip() and lines[j].strip() != '---' and not lines[j].startswith('#'):
-                                        response_text = lines[j].strip()
-                                        st.session_state.debug_info["parsing_steps"].append(f"Found response text at line {j}: {response_text[:50]}...")
-                                        break
-                                
-                                if response_text:
-                                    break
-                        
-                        # If a response was found, store it
-                        if response_text:
-                            st.session_state.responses[post['url']] = {
-                                'post': post,
-                                'suggested_response': response_text,
-                                'engagement_potential': potential
-                            }
-                        else:
-                            # Create a generic response if nothing was found
-                            st.session_state.responses[post['url']] = {
-                                'post': post,
-                                'suggested_response': "Please see the full analysis for the suggested response to this post.",
-                                'engagement_potential': "Medium"
-                            }
-                            st.session_state.debug_info["parsing_steps"].append(f"Created generic response for: {post['title']}")
-                
-                # Debug: Show parsing results
-                st.session_state.debug_info["responses_found"] = len(st.session_state.responses)
-                
-            except Exception as e:
-                st.error(f"Error parsing response: {str(e)}")
-                # Log the full exception for debugging
-                import traceback
-                error_details = traceback.format_exc()
-                
-                with st.expander("Debug: Error Details", expanded=True):
-                    st.code(error_details)
-                
-                # Create a fallback response
-                for post in st.session_state.selected_posts:
-                    st.session_state.responses[post['url']] = {
-                        'post': post,
-                        'suggested_response': "Error parsing the assistant's response. Please check the full analysis.",
-                        'engagement_potential': "Unknown"
-                    }
+            if problems and st.session_state.responses:
+                st.warning(f"{len(problems)} problems with the generated responses; see Debug: Parsing Information")
+            elif problems:
+                st.error("No valid responses were generated: " + "; ".join(problems))
     
     # Display responses
     if st.session_state.responses:
@@ -613,10 +728,14 @@ Please format as a proper markdown table, including the header row and separator
         # Show debug information if available
         if hasattr(st.session_state, 'debug_info'):
             with st.expander("Debug: Parsing Information", expanded=False):
-                st.write("### Parsing Steps")
+                st.write("### Problems")
                 for step in st.session_state.debug_info.get("parsing_steps", []):
                     st.write(f"- {step}")
                 st.write(f"### Results: Found {st.session_state.debug_info.get('responses_found', 0)} responses")
+                if st.session_state.debug_info.get("research_steps"):
+                    st.write("### Research Steps")
+                    for step in st.session_state.debug_info["research_steps"]:
+                        st.write(f"- {step}")
         
         # Display the full response
         if st.session_state.messages and len(st.session_state.messages) >= 1:
@@ -630,52 +749,8 @@ Please format as a proper markdown table, including the header row and separator
         st.markdown("<div style='margin-top: 20px;'></div>", unsafe_allow_html=True)
         
         # Display each post with its suggested response
-        for url, data in st.session_state.responses.items():
-            post = data['post']
-            suggested_response = data['suggested_response']
-            engagement_potential = data['engagement_potential']
-            
-            # Create a card-like container for each response
-            with st.container():
-                st.markdown("""
-                <style>
-                .response-card {
-                    border: 1px solid #e6e6e6;
-                    border-radius: 8px;
-                    padding: 15px;
-                    margin-bottom: 20px;
-                    background-color: white;
-                    box-shadow: 0 2px 5px rgba(0,0,0,0.05);
-                }
-                </style>
-                """, unsafe_allow_html=True)
-                
-                st.markdown(f"<div class='response-card'>", unsafe_allow_html=True)
-                
-                # Post title and link
-                st.markdown(f"<div class='post-title'>{post['title']}</div>", unsafe_allow_html=True)
-                st.markdown(f"<div class='post-info'>r/{post['subreddit']} • <a href='{post['url']}' target='_blank' class='reddit-link'>View on Reddit</a></div>", unsafe_allow_html=True)
-                
-                # Add post preview if it's a text post
-                if post.get('is_self', False) and post.get('selftext', ''):
-                    preview = post['selftext'][:150] + "..." if len(post['selftext']) > 150 else post['selftext']
-                    with st.expander("Show Post Content", expanded=False):
-                        st.markdown(preview)
-                
-                # Suggested response with improved formatting
-                st.markdown("<br><span style='font-weight: bold; color: #0078D7;'>Suggested Response:</span>", unsafe_allow_html=True)
-                st.markdown(f"<div class='response-box'>{suggested_response}</div>", unsafe_allow_html=True)
-                
-                # Engagement potential with colored indicator
-                potential_color = "#2E8B57" if engagement_potential.lower() == "high" else "#FFA500" if engagement_potential.lower() == "medium" else "#6495ED"
-                st.markdown(f"<span style='font-weight: bold;'>Engagement Potential:</span> <span style='color: {potential_color}; font-weight: bold;'>{engagement_potential}</span>", unsafe_allow_html=True)
-                
-                # Copy button for the response
-                if st.button("Copy to Clipboard", key=f"copy_{post['url']}"):
-                    st.code(suggested_response)
-                    st.success("Response copied! You can now paste it on Reddit.")
-                
-                st.markdown("</div>", unsafe_allow_html=True)
+        for post_id, data in st.session_state.responses.items():
+            render_response_card(post_id, data)
     
     elif not st.session_state.selected_posts:
         st.info("Select posts in the 'Reddit Posts' tab to generate responses")
@@ -706,7 +781,7 @@ with tab3:
         email_content += "| Post Title & Link | Suggested Response | Engagement Potential |\n"
         email_content += "|-------------------|-------------------|---------------------|\n"
         
-        for url, data in st.session_state.responses.items():
+        for post_id, data in st.session_state.responses.items():
             post = data['post']
             title_md = f"[{post['title']}]({post['url']})"
             response = data['suggested_response'].replace('\n', ' ')
@@ -733,19 +808,22 @@ with tab3:
             else:
                 with st.spinner("Sending email..."):
                     # Use our dedicated email sender function
-                    email_success = send_engagement_email(
+                    email_result = send_engagement_email(
                         anthropic_client, 
                         th_client, 
+                        tool_schemas, 
                         email_address, 
                         subject, 
-                        email_content
+                        email_content,
+                        html_content=format_email_html(st.session_state.responses, include_full_analysis),
+                        llm_fallback=llm_email_fallback
                     )
                     
-                    if email_success:
+                    if email_result.ok:
                         st.session_state.email_sent = True
                         st.success(f"✅ Email sent successfully to {email_address}")
                     else:
-                        st.error("Failed to send email. Please try again.")
+                        st.error(f"Failed to send email: {email_result.error}")
 
 # Handle any email request from the sidebar
 if hasattr(st.session_state, 'email_requested') and st.session_state.email_requested:
@@ -759,7 +837,7 @@ if hasattr(st.session_state, 'email_requested') and st.session_state.email_reque
         email_content += "| Post Title & Link | Suggested Response | Engagement Potential |\n"
         email_content += "|-------------------|-------------------|---------------------|\n"
         
-        for url, data in st.session_state.responses.items():
+        for post_id, data in st.session_state.responses.items():
             post = data['post']
             title_md = f"[{post['title']}]({post['url']})"
             response = data['suggested_response'].replace('\n', ' ')
@@ -776,19 +854,28 @@ if hasattr(st.session_state, 'email_requested') and st.session_state.email_reque
                 email_content += assistant_response
         
         # Use our dedicated email sender function for sidebar emails too
-        email_success = send_engagement_email(
+        email_result = send_engagement_email(
             anthropic_client, 
             th_client, 
+            tool_schemas, 
             email_address, 
             "Reddit Engagement Opportunities", 
-            email_content
+            email_content,
+            html_content=format_email_html(st.session_state.responses),
+            llm_fallback=llm_email_fallback
         )
         
         # Reset the email request flag
         st.session_state.email_requested = False
         
         # Show success message
-        if email_success:
+        if email_result.ok:
             st.sidebar.success(f"✅ Email sent to {email_address}")
         else:
-            st.sidebar.error("Failed to send email. Please try again.")
\ No newline at end of file
+            st.sidebar.error(f"Failed to send email: {email_result.error}")
+
+# Keep polling while this session has background work, so progress and partial results update
+if any(job is not None and not job.done
+       for job in (job_runner.get(session_id, "fetch"), job_runner.get(session_id, "generate"))):
+    time.sleep(0.5)
+    st.rerun()
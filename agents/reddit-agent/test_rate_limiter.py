@@ -0,0 +1,143 @@
+"""
+Tests for RateLimiter and the client's 429 handling
+
+Run from this folder with `python -m pytest test_rate_limiter.py`. The
+limiter runs on a fake clock, so no test really sleeps.
+"""
+import pytest
+
+from fake_reddit import FakeRedditServer
+from rate_limiter import RateLimiter
+from reddit import RedditClient
+from resilience import RATE_LIMITED, RedditError, RetryPolicy
+from single_flight import SingleFlight
+
+
+class FakeClock:
+    """Monotonic clock that only moves when something sleeps on it"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+        self.sleeps = []
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def make_limiter(clock: FakeClock, rate: float = 2.0, burst: int = 2) -> RateLimiter:
+    return RateLimiter(rate=rate, burst=burst, clock=clock.time, sleep=clock.sleep)
+
+
+def test_bucket_refills_up_to_burst():
+    clock = FakeClock()
+    limiter = make_limiter(clock, rate=2.0, burst=2)
+
+    assert limiter.acquire() == 0
+    assert limiter.acquire() == 0
+    # Empty bucket: the next token arrives after 1 / rate seconds
+    assert limiter.acquire() == pytest.approx(0.5)
+
+    # A long pause refills the bucket to the burst size, not beyond
+    clock.now += 60
+    assert limiter.acquire() == 0
+    assert limiter.acquire() == 0
+    assert limiter.acquire() == pytest.approx(0.5)
+    assert limiter.total_wait == pytest.approx(1.0)
+
+
+def test_headers_repace_the_remaining_quota_over_the_window():
+    clock = FakeClock()
+    limiter = make_limiter(clock, rate=2.0, burst=5)
+
+    limiter.update({"X-Ratelimit-Remaining": "10", "X-Ratelimit-Reset": "100"})
+
+    assert limiter.rate == pytest.approx(0.1)
+    assert limiter.window_end == pytest.approx(clock.now + 100)
+    for _ in range(5):
+        assert limiter.acquire() == 0
+    # Burst used up: the rest of the quota is spread at 10 requests per 100 s
+    assert limiter.acquire() == pytest.approx(10.0)
+
+
+def test_headers_cap_the_burst_to_the_remaining_quota():
+    clock = FakeClock()
+    limiter = make_limiter(clock, rate=2.0, burst=10)
+
+    limiter.update({"X-Ratelimit-Remaining": "2", "X-Ratelimit-Reset": "20"})
+
+    assert limiter.capacity == 2
+    assert limiter.acquire() == 0
+    assert limiter.acquire() == 0
+    assert limiter.acquire() == pytest.approx(10.0)
+
+
+def test_429_waits_for_retry_after():
+    clock = FakeClock()
+    limiter = make_limiter(clock, rate=100.0, burst=10)
+
+    limiter.update({"Retry-After": "30"}, status_code=429)
+
+    assert limiter.acquire() == pytest.approx(30.0)
+    assert clock.sleeps == [pytest.approx(30.0)]
+
+
+def test_429_without_retry_after_waits_for_the_window_reset():
+    clock = FakeClock()
+    limiter = make_limiter(clock, rate=100.0, burst=10)
+
+    limiter.update({"X-Ratelimit-Remaining": "0", "X-Ratelimit-Reset": "12"}, status_code=429)
+
+    assert limiter.acquire() == pytest.approx(12.0)
+
+
+def test_exhausted_quota_waits_for_the_next_window():
+    clock = FakeClock()
+    limiter = make_limiter(clock, rate=2.0, burst=4)
+
+    limiter.update({"X-Ratelimit-Remaining": "0", "X-Ratelimit-Reset": "60"})
+
+    # Nothing refills until the window ends, then the default pace resumes
+    assert limiter.acquire() == pytest.approx(60.0)
+    assert limiter.window_end == 0.0
+    assert limiter.rate == limiter.default_rate
+    assert limiter.acquire() == pytest.approx(0.5)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def make_client(server: FakeRedditServer, clock: FakeClock, backoffs: list, max_attempts: int = 3) -> RedditClient:
+    return RedditClient(base_url=server.url, rate_limiter=make_limiter(clock, rate=100.0, burst=10),
+                        retry=RetryPolicy(max_attempts=max_attempts, sleep=backoffs.append),
+                        single_flight=SingleFlight())
+
+
+def test_client_retries_a_429_after_retry_after(clock):
+    backoffs = []
+    with FakeRedditServer(throttle=1, retry_after=5) as server, make_client(server, clock, backoffs) as client:
+        data = client._get(f"{server.url}/r/python/hot.json", {"limit": 3})
+
+    assert len(data["data"]["children"]) == 3
+    assert server.requests == 2
+    # The retry waited for Retry-After in the limiter, not in the backoff policy
+    assert clock.sleeps == [pytest.approx(5.0)]
+    assert backoffs == []
+
+
+def test_client_raises_rate_limited_when_every_attempt_gets_429(clock):
+    backoffs = []
+    with FakeRedditServer(throttle=10, retry_after=2) as server, \
+            make_client(server, clock, backoffs, max_attempts=3) as client:
+        with pytest.raises(RedditError) as excinfo:
+            client._get(f"{server.url}/r/python/hot.json", {"limit": 3})
+
+    assert excinfo.value.kind == RATE_LIMITED
+    assert excinfo.value.status == 429
+    assert server.requests == 3
+    assert backoffs == []
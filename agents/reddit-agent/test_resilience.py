@@ -0,0 +1,113 @@
+"""
+Tests for CircuitBreaker's state changes
+
+Run from this folder with `python -m pytest test_resilience.py`. The
+breaker runs on a fake clock, so no test waits for a cooldown.
+"""
+import pytest
+
+from resilience import (BANNED, CIRCUIT_OPEN, INVALID_RESPONSE, RATE_LIMITED, TRANSIENT, CircuitBreaker,
+                        RedditError)
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker(failure_threshold=3, cooldown=60, permanent_cooldown=3600, clock=clock)
+
+
+def fail(breaker: CircuitBreaker, kind: str, times: int = 1, key: str = "python") -> None:
+    for _ in range(times):
+        breaker.record_failure(key, RedditError(kind, f"{kind} error", 503))
+
+
+def is_open(breaker: CircuitBreaker, key: str = "python") -> bool:
+    try:
+        breaker.check(key)
+    except RedditError as e:
+        assert e.kind == CIRCUIT_OPEN
+        return True
+    return False
+
+
+def test_transient_failures_open_the_circuit_at_the_threshold(breaker):
+    fail(breaker, TRANSIENT, 2)
+    assert not is_open(breaker)
+
+    fail(breaker, TRANSIENT)
+    assert is_open(breaker)
+    # Keys are case-insensitive, like subreddit names
+    assert is_open(breaker, "Python")
+    assert list(breaker.open_circuits()) == ["python"]
+
+
+def test_success_resets_the_failure_count(breaker):
+    fail(breaker, TRANSIENT, 2)
+    breaker.record_success("python")
+    fail(breaker, TRANSIENT, 2)
+
+    assert not is_open(breaker)
+
+
+def test_permanent_failure_opens_the_circuit_at_once_for_the_long_cooldown(breaker, clock):
+    fail(breaker, BANNED)
+    assert is_open(breaker)
+
+    clock.now += 60
+    assert is_open(breaker)
+    clock.now += 3540
+    assert not is_open(breaker)
+
+
+def test_half_open_trial_closes_on_success(breaker, clock):
+    fail(breaker, TRANSIENT, 3)
+    clock.now += 60
+
+    # The first caller after the cooldown is the trial; everyone else is still skipped
+    assert not is_open(breaker)
+    assert is_open(breaker)
+
+    breaker.record_success("python")
+    assert not is_open(breaker)
+    assert breaker.open_circuits() == {}
+
+
+def test_half_open_trial_reopens_on_failure(breaker, clock):
+    fail(breaker, TRANSIENT, 3)
+    clock.now += 60
+    assert not is_open(breaker)
+
+    fail(breaker, TRANSIENT)
+    clock.now += 59
+    assert is_open(breaker)
+    clock.now += 1
+    assert not is_open(breaker)
+
+
+@pytest.mark.parametrize("kind", [RATE_LIMITED, INVALID_RESPONSE, CIRCUIT_OPEN])
+def test_client_wide_failures_never_open_a_subreddit_circuit(breaker, kind):
+    fail(breaker, kind, 10)
+    assert not is_open(breaker)
+
+    # Nor do they count towards the transient threshold
+    fail(breaker, TRANSIENT, 2)
+    assert not is_open(breaker)
+
+
+def test_circuits_are_per_subreddit(breaker):
+    fail(breaker, TRANSIENT, 3, key="python")
+
+    assert is_open(breaker, "python")
+    assert not is_open(breaker, "learnpython")
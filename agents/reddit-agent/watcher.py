@@ -0,0 +1,179 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional
+
+from reddit import PostRecord, RedditClient, SubredditResult
+
+
+class SeenSet:
+    """Bounded set of post IDs that forgets the oldest IDs first"""
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._ids: "OrderedDict[str, None]" = OrderedDict()
+
+    def add(self, post_id: str) -> bool:
+        """Add an ID; returns False if it was already present"""
+        if post_id in self._ids:
+            return False
+        self._ids[post_id] = None
+        if len(self._ids) > self.max_size:
+            self._ids.popitem(last=False)
+        return True
+
+    def __contains__(self, post_id: str) -> bool:
+        return post_id in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+class SubredditWatcher:
+    """
+    Polls the `new` listing of many subreddits and streams only unseen posts
+
+    Each subreddit has its own polling interval: it halves whenever a poll
+    finds new posts and grows by half when it finds none, within
+    [min_interval, max_interval]. Busy subreddits are therefore polled
+    often and quiet ones rarely, and every poll is a single request.
+    Posts are deduplicated by ID with a bounded seen-set.
+
+    Use it as an async iterator:
+
+        async for post in SubredditWatcher(client, ["Python", "LocalLLaMA"]):
+            ...
+
+    or with a callback from a background thread via start()/stop().
+    """
+
+    def __init__(self, client: RedditClient, subreddits: List[str], limit: int = 25,
+                 min_interval: float = 15, max_interval: float = 300, initial_interval: float = 60,
+                 seen_size: int = 10000, skip_existing: bool = True, max_workers: int = 8,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the watcher
+
+        Args:
+            client: Reddit client used for polling
+            subreddits: Subreddit names to watch (without 'r/')
+            limit: Posts requested per poll
+            min_interval: Shortest polling interval in seconds
+            max_interval: Longest polling interval in seconds
+            initial_interval: Polling interval before any activity is observed
+            seen_size: Maximum number of post IDs remembered for deduplication
+            skip_existing: Don't emit the posts found by the first successful
+                poll of each subreddit, only posts that appear afterwards
+            max_workers: Maximum number of polls in flight at once
+            clock: Monotonic clock in seconds (injectable for testing)
+        """
+        self.client = client
+        self.limit = limit
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.skip_existing = skip_existing
+        self.max_workers = max_workers
+        self.clock = clock
+        self.seen = SeenSet(seen_size)
+        self.intervals: Dict[str, float] = {sub: initial_interval for sub in subreddits}
+        self.next_due: Dict[str, float] = {sub: 0.0 for sub in subreddits}
+        self.errors: Dict[str, str] = {}
+        self.requests = 0
+        self._primed = set()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def mark_seen(self, posts: Iterable[PostRecord]) -> None:
+        """
+        Remember posts (e.g. already on screen) so they are never emitted
+
+        When the seen-set is seeded this way, create the watcher with
+        skip_existing=False, or the first poll also drops genuinely new posts.
+        """
+        for post in posts:
+            self.seen.add(post['id'])
+
+    def _process(self, result: SubredditResult) -> List[PostRecord]:
+        subreddit = result.subreddit
+        if result.ok:
+            self.errors.pop(subreddit, None)
+        else:
+            self.errors[subreddit] = result.error
+
+        new_posts = [post for post in result.posts if self.seen.add(post['id'])]
+        # Only a successful poll has seen the existing listing; after a failure the next one primes
+        if result.ok and subreddit not in self._primed:
+            self._primed.add(subreddit)
+            if self.skip_existing:
+                new_posts = []
+
+        interval = self.intervals[subreddit]
+        if new_posts:
+            interval = max(self.min_interval, interval / 2)
+        else:
+            interval = min(self.max_interval, interval * 1.5)
+        self.intervals[subreddit] = interval
+        self.next_due[subreddit] = self.clock() + interval
+
+        # Listings are newest first; emit in the order the posts were created
+        return list(reversed(new_posts))
+
+    def poll_due(self, force: bool = False) -> List[PostRecord]:
+        """
+        Poll every subreddit whose interval has elapsed, concurrently
+
+        Each due subreddit costs one request to its `new` listing, after
+        which it is rescheduled according to whether it had new posts.
+
+        Args:
+            force: Poll every subreddit regardless of its schedule
+
+        Returns:
+            Posts not seen before, oldest first within each subreddit
+        """
+        now = self.clock()
+        due = [sub for sub, at in self.next_due.items() if force or at <= now]
+        if not due:
+            return []
+        self.requests += len(due)
+        results = self.client.fetch_subreddits(due, "new", self.limit, max_workers=self.max_workers)
+        return [post for result in results for post in self._process(result)]
+
+    def seconds_until_due(self) -> float:
+        """Seconds until the next subreddit is due for polling"""
+        return max(0.0, min(self.next_due.values(), default=0.0) - self.clock())
+
+    async def __aiter__(self) -> AsyncIterator[PostRecord]:
+        while not self._stop.is_set():
+            for post in await asyncio.to_thread(self.poll_due):
+                yield post
+            await asyncio.sleep(self.seconds_until_due())
+
+    def start(self, callback: Callable[[PostRecord], None]) -> threading.Thread:
+        """
+        Watch in a background thread, calling `callback` for every new post
+
+        Args:
+            callback: Called with each new post
+
+        Returns:
+            The watcher thread
+        """
+        def run():
+            while not self._stop.is_set():
+                for post in self.poll_due():
+                    callback(post)
+                self._stop.wait(self.seconds_until_due())
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, name="subreddit-watcher", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self) -> None:
+        """Stop watching"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
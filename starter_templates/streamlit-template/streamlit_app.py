@@ -1,7 +1,12 @@
 import streamlit as st
 import os
+import sys
 from toolhouse import Toolhouse
 
+# Make the shared agent_runtime package (at the repository root) importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from agent_runtime import AgentRuntime, ConversationHistory, model_summarizer
+
 # Page setup
 st.set_page_config(page_title="ToolHouse Query", page_icon="🔍")
 st.title("ToolHouse Streamlit Template")
@@ -39,9 +44,25 @@ with st.sidebar:
     st.markdown("[ToolHouse Console](https://toolhouse.ai/settings)")
 
 
+@st.cache_resource
+def initialize_runtime(toolhouse_key, provider, llm_key, model):
+    """Create the clients once per key, provider and model; the tool schemas are fetched once and reused"""
+    th = Toolhouse(api_key=toolhouse_key, provider=provider)
+    if provider == "openai":
+        from openai import OpenAI
+        client = OpenAI(api_key=llm_key)
+    else:
+        from anthropic import Anthropic
+        client = Anthropic(api_key=llm_key)
+    return AgentRuntime(client, th, model=model, max_tokens=1000, provider=provider)
+
+
 # Initialize session state
 if "messages" not in st.session_state:
     st.session_state.messages = []
+# What is sent to the model: recent turns verbatim, older ones summarized to stay within the token budget
+if "history" not in st.session_state:
+    st.session_state.history = ConversationHistory(max_tokens=8000, keep_turns=6)
 
 # Display message history
 for message in st.session_state.messages:
@@ -59,6 +80,7 @@ query = st.chat_input("Ask a question...", key="user_input")
 if query:
     # Display user message
     st.session_state.messages.append({"role": "user", "content": query})
+    st.session_state.history.append({"role": "user", "content": query})
     with st.chat_message("user"):
         st.write(query)
     
@@ -71,79 +93,38 @@ if query:
             message_placeholder = st.empty()
             with st.spinner("Thinking..."):
                 try:
-                    # Initialize ToolHouse client
-                    th = Toolhouse(api_key=toolhouse_key, provider=provider)
-                    
-                    # Get current messages
-                    messages = st.session_state.messages.copy()
+                    # Reuse the clients and cached tool schemas for these settings
+                    runtime = initialize_runtime(toolhouse_key, provider, llm_key, model)
                     
-                    # Process based on the provider
-                    if provider == "openai":
-                        # Import OpenAI
-                        from openai import OpenAI
-                        client = OpenAI(api_key=llm_key)
-                        
-                        # First API call with tools
-                        response = client.chat.completions.create(
-                            model=model,
-                            messages=messages,
-                            tools=th.get_tools()
-                        )
-                        
-                        # Process tool calls
-                        tool_messages = th.run_tools(response)
-                        messages += tool_messages
-                        
-                        # Final call with tool results
-                        response = client.chat.completions.create(
-                            model=model,
-                            messages=messages,
-                            tools=th.get_tools()
-                        )
-                        
-                        # Get the response
-                        assistant_response = response.choices[0].message.content
+                    # Get current messages, summarizing older turns if over the token budget
+                    messages = st.session_state.history.for_request(model_summarizer(runtime))
                     
-                    elif provider == "anthropic":
-                        # Import Anthropic
-                        from anthropic import Anthropic
-                        client = Anthropic(api_key=llm_key)
-                        
-                        # First API call with tools
-                        response = client.messages.create(
-                            model=model,
-                            messages=messages,
-                            max_tokens=1000,
-                            tools=th.get_tools()
-                        )
-                        
-                        # Process tool calls
-                        tool_messages = th.run_tools(response)
-                        messages += tool_messages
-                        
-                        # Final call with tool results
-                        response = client.messages.create(
-                            model=model,
-                            messages=messages,
-                            max_tokens=1000,
-                            tools=th.get_tools()
-                        )
-                        
-                        # Get the response
-                        assistant_response = response.content[0].text
+                    # Model call with tools, running tools until the model answers (one call if it answers directly)
+                    response, tool_messages = runtime.respond(messages)
                     
-
+                    # Get the response
+                    assistant_response = runtime.text(response)
                     
                     # Display response
                     message_placeholder.write(assistant_response)
                     
                     # Save to history
                     st.session_state.messages.append({"role": "assistant", "content": assistant_response})
+                    st.session_state.history.append({"role": "assistant", "content": assistant_response})
                     
                 except Exception as e:
                     message_placeholder.error(f"Error: {str(e)}")
 
+# Show how many turns skipped the follow-up model call
+if toolhouse_key and llm_key:
+    stats = initialize_runtime(toolhouse_key, provider, llm_key, model).stats()
+    if stats["runs"]:
+        st.sidebar.caption(f"{stats['direct_answers']} of {stats['runs']} answers without tools "
+                           f"({stats['direct_rate']:.0%}) · {stats['model_calls']} model calls · "
+                           f"{stats['tool_calls']} tool calls")
+
 # Add a clear button
 if st.sidebar.button("Clear Conversation"):
     st.session_state.messages = []
+    st.session_state.history.clear()
     st.rerun()
\ No newline at end of file